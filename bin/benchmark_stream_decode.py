@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Measure stream decoding throughput as the number of threads grows.
+
+Each thread decodes every stream of its own PDF, so that threads do not contend
+for the same Pdf. The PDFs have Pdf.release_gil set, so decoding releases the
+GIL. With --hold-gil, the PDFs keep the default, so that the two runs can be
+compared. Run this on a machine with several CPU cores; no reference figures
+are recorded here.
+
+    python bin/benchmark_stream_decode.py --threads 1 2 4 8
+    python bin/benchmark_stream_decode.py --threads 1 2 4 8 --hold-gil
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pikepdf
+from pikepdf import Name, Pdf, Stream
+
+
+def make_pdf(n_streams: int, stream_size: int, seed: int) -> bytes:
+    """Make a PDF with Flate-compressed streams of moderately compressible data."""
+    rng = random.Random(seed)
+    words = [bytes(rng.choices(b'abcdefghij', k=8)) for _ in range(256)]
+    with Pdf.new() as pdf:
+        streams = []
+        for _ in range(n_streams):
+            data = b' '.join(rng.choices(words, k=stream_size // 9))
+            streams.append(
+                pdf.make_indirect(
+                    Stream(pdf, zlib.compress(data), Filter=Name.FlateDecode)
+                )
+            )
+        pdf.Root.Streams = pikepdf.Array(streams)
+        bio = BytesIO()
+        pdf.save(bio, compress_streams=False)
+        return bio.getvalue()
+
+
+def decode_all(pdf: Pdf) -> int:
+    """Decode every stream of a PDF made by make_pdf; return the bytes decoded."""
+    return sum(len(stream.read_bytes()) for stream in pdf.Root.Streams)
+
+
+def run(pdfs: list[Pdf], threads: int) -> tuple[float, int]:
+    """Decode the first *threads* PDFs, one per thread; return time and bytes."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        total = sum(executor.map(decode_all, pdfs[:threads]))
+    return time.perf_counter() - start, total
+
+
+def main():  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--threads',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8],
+        help="numbers of threads to measure",
+    )
+    parser.add_argument('--streams', type=int, default=32, help="streams per PDF")
+    parser.add_argument(
+        '--stream-size', type=int, default=1 << 20, help="decoded bytes per stream"
+    )
+    parser.add_argument('--repeat', type=int, default=3, help="best of N runs")
+    parser.add_argument(
+        '--hold-gil', action='store_true', help="do not set Pdf.release_gil"
+    )
+    args = parser.parse_args()
+
+    print(f"pikepdf {pikepdf.__version__}, {os.cpu_count()} CPUs")
+    pdfs = [
+        Pdf.open(make_pdf(args.streams, args.stream_size, seed))
+        for seed in range(max(args.threads))
+    ]
+    for pdf in pdfs:
+        pdf.release_gil = not args.hold_gil
+        decode_all(pdf)  # Warm up: parse objects and page in the data
+
+    print(f"{'threads':>8} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+    baseline = None
+    for threads in args.threads:
+        elapsed, total = min(run(pdfs, threads) for _ in range(args.repeat))
+        throughput = total / elapsed / 1e6
+        if baseline is None:
+            baseline = throughput / threads
+        print(
+            f"{threads:>8} {elapsed:>8.3f} {throughput:>8.1f} "
+            f"{throughput / baseline:>7.2f}x"
+        )
+
+    for pdf in pdfs:
+        pdf.close()
+
+
+if __name__ == '__main__':
+    main()
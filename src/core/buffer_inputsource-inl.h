@@ -0,0 +1,117 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <cstdio>
+#include <cstring>
+
+#include <qpdf/Constants.h>
+#include <qpdf/Types.h>
+#include <qpdf/DLL.h>
+#include <qpdf/QPDFExc.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/InputSource.hh>
+#include <qpdf/QUtil.hh>
+#include <qpdf/Buffer.hh>
+#include <qpdf/BufferInputSource.hh>
+
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include "pikepdf.h"
+#include "utils.h"
+
+// An InputSource over the memory of a Python object that supports the buffer
+// protocol, such as bytes, bytearray or memoryview, without copying it. Like
+// MmapInputSource, we delegate to a BufferInputSource that wraps the memory, and
+// preserve InputSource::last_offset by copying it whenever it may change.
+//
+// GIL usage:
+// The GIL must be held while this class is constructed and destroyed, since we
+// acquire and release a Python buffer. While the buffer is held, the exporting
+// object keeps the memory valid and, for resizable objects like bytearray, refuses
+// to resize, so reads never need the GIL.
+class PythonBufferInputSource : public InputSource {
+public:
+    PythonBufferInputSource(const py::object &data, const std::string &description)
+        : InputSource()
+    {
+        py::gil_scoped_acquire acquire; // GIL must be held anyway, issue #295
+        this->data = data;
+        py::buffer view(this->data);
+
+        // .request(false) -> request read-only buffer
+        this->buffer_info = std::make_unique<py::buffer_info>(view.request(false));
+        auto qpdf_buffer  = std::make_unique<Buffer>(
+            static_cast<unsigned char *>(this->buffer_info->ptr),
+            this->buffer_info->size * this->buffer_info->itemsize);
+        this->bis = std::make_unique<BufferInputSource>(description,
+            qpdf_buffer.release(),
+            false // own_memory=false
+        );
+    }
+    virtual ~PythonBufferInputSource()
+    {
+        py::gil_scoped_acquire acquire;
+        try {
+            // Release the buffer before dropping our reference to its exporter.
+            this->bis.reset();
+            this->buffer_info.reset();
+            this->data = py::none();
+        } catch (py::error_already_set &e) {
+            e.discard_as_unraisable(__func__);
+        }
+    }
+    PythonBufferInputSource(const PythonBufferInputSource &)            = delete;
+    PythonBufferInputSource &operator=(const PythonBufferInputSource &) = delete;
+    PythonBufferInputSource(PythonBufferInputSource &&)                 = delete;
+    PythonBufferInputSource &operator=(PythonBufferInputSource &&)      = delete;
+
+    std::string const &getName() const override { return this->bis->getName(); }
+
+    qpdf_offset_t tell() override
+    {
+        auto result       = this->bis->tell();
+        this->last_offset = this->bis->getLastOffset();
+        return result;
+    }
+
+    void seek(qpdf_offset_t offset, int whence) override
+    {
+        this->bis->seek(offset, whence);
+        this->last_offset = this->bis->getLastOffset();
+    }
+
+    // LCOV_EXCL_START
+    void rewind() override
+    {
+        // qpdf never seems to use this but still requires
+        this->bis->rewind();
+        this->last_offset = this->bis->getLastOffset();
+    }
+    // LCOV_EXCL_STOP
+
+    size_t read(char *buffer, size_t length) override
+    {
+        auto result       = this->bis->read(buffer, length);
+        this->last_offset = this->bis->getLastOffset();
+        return result;
+    }
+
+    void unreadCh(char ch) override
+    {
+        this->bis->unreadCh(ch);
+        this->last_offset = this->bis->getLastOffset();
+    }
+
+    qpdf_offset_t findAndSkipNextEOL() override
+    {
+        auto result       = this->bis->findAndSkipNextEOL();
+        this->last_offset = this->bis->getLastOffset();
+        return result;
+    }
+
+private:
+    py::object data;
+    std::unique_ptr<py::buffer_info> buffer_info;
+    std::unique_ptr<BufferInputSource> bis;
+};
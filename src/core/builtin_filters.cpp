@@ -0,0 +1,387 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <cctype>
+#include <cmath>
+#include <locale>
+#include <set>
+#include <sstream>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "pikepdf.h"
+#include "builtin_filters.h"
+#include "content_columnar.h"
+
+#include <qpdf/QUtil.hh>
+
+extern uint DECIMAL_PRECISION;
+
+using Token = QPDFTokenizer::Token;
+
+void InstructionTokenFilter::handleToken(Token const &token)
+{
+    if (token.getType() == QPDFTokenizer::tt_word) {
+        this->handle_instruction(token);
+        this->operands.clear();
+    } else {
+        this->operands.push_back(token);
+    }
+}
+
+void InstructionTokenFilter::handleEOF()
+{
+    // Whitespace, or operands without an operator, at the end of the content
+    for (auto &token : this->operands)
+        this->writeToken(token);
+    this->operands.clear();
+    this->reset();
+}
+
+void InstructionTokenFilter::write_instruction(Token const &op)
+{
+    for (auto &token : this->operands)
+        this->writeToken(token);
+    this->writeToken(op);
+    this->operands.clear();
+}
+
+void InstructionTokenFilter::drop_instruction()
+{
+    for (auto &token : this->operands) {
+        if (token.getType() != QPDFTokenizer::tt_space)
+            break;
+        this->writeToken(token);
+    }
+    this->operands.clear();
+}
+
+void InstructionTokenFilter::discard_instruction() { this->operands.clear(); }
+
+namespace {
+
+bool is_numeric(Token const &token)
+{
+    return token.getType() == QPDFTokenizer::tt_integer ||
+           token.getType() == QPDFTokenizer::tt_real;
+}
+
+double token_number(Token const &token)
+{
+    if (token.getType() == QPDFTokenizer::tt_integer)
+        return static_cast<double>(QUtil::string_to_ll(token.getValue().c_str()));
+    std::istringstream ss(token.getValue());
+    ss.imbue(std::locale::classic());
+    double value = 0.0;
+    ss >> value;
+    return value;
+}
+
+// Names are compared in the form /Name, as the tokenizer returns them
+std::string name_key(py::handle name)
+{
+    std::string s = py::str(name);
+    if (s.empty() || s[0] != '/')
+        s.insert(s.begin(), '/');
+    return s;
+}
+
+// Removes the instructions that show text. Everything else is kept, including
+// text objects and text state, so the graphics state is not disturbed.
+class RemoveText : public InstructionTokenFilter {
+protected:
+    void handle_instruction(Token const &op) override
+    {
+        auto const &value = op.getValue();
+        if (value == "Tj" || value == "TJ" || value == "'" || value == "\"")
+            this->drop_instruction();
+        else
+            this->write_instruction(op);
+    }
+};
+
+// Replaces each instruction with a given operator by some other content.
+class ReplaceOperator : public InstructionTokenFilter {
+public:
+    ReplaceOperator(std::string const &operator_,
+        std::string const &replacement,
+        bool keep_operands)
+        : operator_(operator_), replacement(replacement), keep_operands(keep_operands)
+    {
+        if (this->operator_.empty())
+            throw py::value_error("ReplaceOperator: operator must not be empty");
+    }
+
+    std::string operator_;
+    std::string replacement;
+    bool keep_operands;
+
+protected:
+    void handle_instruction(Token const &op) override
+    {
+        if (op.getValue() != this->operator_) {
+            this->write_instruction(op);
+            return;
+        }
+        if (this->keep_operands) {
+            for (auto &token : this->operands)
+                this->writeToken(token);
+            this->operands.clear();
+        } else {
+            this->drop_instruction();
+        }
+        this->write(this->replacement);
+    }
+};
+
+// Removes marked content sequences (BMC or BDC ... EMC) with some tags, either
+// with their content or leaving the content in place.
+class StripMarkedContent : public InstructionTokenFilter {
+public:
+    StripMarkedContent(std::set<std::string> tags, bool all_tags, bool keep_content)
+        : tags(std::move(tags)), all_tags(all_tags), keep_content(keep_content)
+    {
+    }
+
+    void handleEOF() override
+    {
+        if (this->stripped_depth > 0)
+            this->discard_instruction();
+        InstructionTokenFilter::handleEOF();
+    }
+
+    std::set<std::string> tags;
+    bool all_tags;
+    bool keep_content;
+
+protected:
+    void handle_instruction(Token const &op) override
+    {
+        auto const &value = op.getValue();
+        bool begins       = value == "BMC" || value == "BDC";
+        bool ends         = value == "EMC";
+
+        if (this->stripped_depth > 0) {
+            // Inside a sequence whose content is being removed
+            if (begins)
+                ++this->stripped_depth;
+            else if (ends)
+                --this->stripped_depth;
+            this->discard_instruction();
+            return;
+        }
+        if (begins) {
+            bool match = this->matches();
+            if (match && !this->keep_content) {
+                this->stripped_depth = 1;
+                this->drop_instruction();
+                return;
+            }
+            this->open.push_back(match);
+            if (match)
+                this->drop_instruction();
+            else
+                this->write_instruction(op);
+            return;
+        }
+        if (ends && !this->open.empty()) {
+            bool match = this->open.back();
+            this->open.pop_back();
+            if (match)
+                this->drop_instruction();
+            else
+                this->write_instruction(op);
+            return;
+        }
+        this->write_instruction(op);
+    }
+
+    void reset() override
+    {
+        this->stripped_depth = 0;
+        this->open.clear();
+    }
+
+private:
+    // Whether the tag of the sequence now beginning is one to remove
+    bool matches() const
+    {
+        if (this->all_tags)
+            return true;
+        for (auto &token : this->operands)
+            if (token.getType() == QPDFTokenizer::tt_name)
+                return this->tags.count(token.getValue()) != 0;
+        return false;
+    }
+
+    size_t stripped_depth = 0;
+    // For each open sequence that is kept, whether its operators are removed
+    std::vector<bool> open;
+};
+
+// Replaces colors set by the device color operators g, rg and k (and G, RG
+// and K for stroking) with other colors.
+class ColorMap : public InstructionTokenFilter {
+public:
+    using Color = std::vector<double>;
+
+    ColorMap(std::vector<std::pair<Color, Color>> mapping, double tolerance)
+        : mapping(std::move(mapping)), tolerance(tolerance)
+    {
+    }
+
+    std::vector<std::pair<Color, Color>> mapping;
+    double tolerance;
+
+protected:
+    void handle_instruction(Token const &op) override
+    {
+        auto const &value = op.getValue();
+        size_t components = 0;
+        if (value == "g" || value == "G")
+            components = 1;
+        else if (value == "rg" || value == "RG")
+            components = 3;
+        else if (value == "k" || value == "K")
+            components = 4;
+        if (components == 0) {
+            this->write_instruction(op);
+            return;
+        }
+
+        Color color;
+        for (auto &token : this->operands) {
+            if (token.getType() == QPDFTokenizer::tt_space ||
+                token.getType() == QPDFTokenizer::tt_comment)
+                continue;
+            if (!is_numeric(token)) {
+                this->write_instruction(op);
+                return;
+            }
+            color.push_back(token_number(token));
+        }
+        auto replacement = color.size() == components ? this->find(color) : nullptr;
+        if (!replacement) {
+            this->write_instruction(op);
+            return;
+        }
+
+        bool stroking = std::isupper(static_cast<unsigned char>(value[0]));
+        std::string instruction;
+        for (auto component : *replacement) {
+            instruction += unparse_content_number(component, DECIMAL_PRECISION);
+            instruction += ' ';
+        }
+        switch (replacement->size()) {
+        case 1:
+            instruction += stroking ? "G" : "g";
+            break;
+        case 3:
+            instruction += stroking ? "RG" : "rg";
+            break;
+        default:
+            instruction += stroking ? "K" : "k";
+            break;
+        }
+        this->drop_instruction();
+        this->write(instruction);
+    }
+
+private:
+    Color const *find(Color const &color) const
+    {
+        for (auto &[from, to] : this->mapping) {
+            if (from.size() != color.size())
+                continue;
+            bool same = true;
+            for (size_t i = 0; i < color.size(); ++i)
+                same = same && std::fabs(from[i] - color[i]) <= this->tolerance;
+            if (same)
+                return &to;
+        }
+        return nullptr;
+    }
+};
+
+ColorMap::Color color_from_python(py::handle obj)
+{
+    auto color = obj.cast<ColorMap::Color>();
+    if (color.size() != 1 && color.size() != 3 && color.size() != 4)
+        throw py::value_error(
+            "ColorMap: colors must have 1 (gray), 3 (RGB) or 4 (CMYK) components");
+    for (auto component : color)
+        if (!std::isfinite(component))
+            throw py::value_error("ColorMap: color components must be finite");
+    return color;
+}
+
+} // namespace
+
+void init_builtin_filters(py::module_ &m)
+{
+    using QPDFTokenFilter = QPDFObjectHandle::TokenFilter;
+
+    py::class_<RemoveText, QPDFTokenFilter, std::shared_ptr<RemoveText>>(
+        m, "RemoveText")
+        .def(py::init<>())
+        .def("__repr__", [](RemoveText &) { return "pikepdf.filters.RemoveText()"; });
+
+    py::class_<ReplaceOperator, QPDFTokenFilter, std::shared_ptr<ReplaceOperator>>(
+        m, "ReplaceOperator")
+        .def(py::init([](std::string const &operator_,
+                          py::bytes replacement,
+                          bool keep_operands) {
+            return std::make_shared<ReplaceOperator>(
+                operator_, std::string(replacement), keep_operands);
+        }),
+            py::arg("operator"),
+            py::arg("replacement"),
+            py::kw_only(),
+            py::arg("keep_operands") = false)
+        .def_readonly("operator", &ReplaceOperator::operator_)
+        .def_property_readonly(
+            "replacement", [](ReplaceOperator &f) { return py::bytes(f.replacement); })
+        .def_readonly("keep_operands", &ReplaceOperator::keep_operands);
+
+    py::class_<StripMarkedContent,
+        QPDFTokenFilter,
+        std::shared_ptr<StripMarkedContent>>(m, "StripMarkedContent")
+        .def(py::init([](py::object tags, bool keep_content) {
+            std::set<std::string> tag_set;
+            if (!tags.is_none()) {
+                if (py::isinstance<py::str>(tags))
+                    throw py::type_error(
+                        "StripMarkedContent: tags must be a collection of names, "
+                        "not a single str");
+                for (auto tag : tags)
+                    tag_set.insert(name_key(tag));
+            }
+            return std::make_shared<StripMarkedContent>(
+                std::move(tag_set), tags.is_none(), keep_content);
+        }),
+            py::arg("tags") = py::none(),
+            py::kw_only(),
+            py::arg("keep_content") = false)
+        .def_property_readonly("tags",
+            [](StripMarkedContent &f) -> py::object {
+                if (f.all_tags)
+                    return py::none();
+                return py::cast(f.tags);
+            })
+        .def_readonly("keep_content", &StripMarkedContent::keep_content);
+
+    py::class_<ColorMap, QPDFTokenFilter, std::shared_ptr<ColorMap>>(m, "ColorMap")
+        .def(py::init([](py::dict mapping, double tolerance) {
+            if (!(tolerance >= 0.0))
+                throw py::value_error("ColorMap: tolerance must not be negative");
+            std::vector<std::pair<ColorMap::Color, ColorMap::Color>> colors;
+            for (auto [from, to] : mapping)
+                colors.emplace_back(color_from_python(from), color_from_python(to));
+            return std::make_shared<ColorMap>(std::move(colors), tolerance);
+        }),
+            py::arg("mapping"),
+            py::kw_only(),
+            py::arg("tolerance") = 1e-4)
+        .def_readonly("tolerance", &ColorMap::tolerance);
+}
@@ -0,0 +1,41 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <string>
+#include <vector>
+
+#include <qpdf/QPDFObjectHandle.hh>
+#include <qpdf/QPDFTokenizer.hh>
+
+// Base of the token filters in pikepdf.filters. They are written in C++ and
+// never call Python, so they may run without the GIL.
+//
+// Tokens are held back until the next operator, so that a whole instruction can
+// be written, dropped or rewritten once its operator is known. The held tokens
+// include the whitespace and comments before the operands.
+class InstructionTokenFilter : public QPDFObjectHandle::TokenFilter {
+public:
+    using Token = QPDFTokenizer::Token;
+    virtual ~InstructionTokenFilter() = default;
+
+    void handleToken(Token const &token) override;
+    void handleEOF() override;
+
+protected:
+    // Called for each operator, with the tokens since the previous one in operands
+    virtual void handle_instruction(Token const &op) = 0;
+    // Forget any state kept between instructions
+    virtual void reset() {}
+
+    // Write the instruction unchanged
+    void write_instruction(Token const &op);
+    // Write nothing for the instruction but the whitespace before it, so that
+    // the instructions around it stay apart
+    void drop_instruction();
+    // Discard the instruction entirely
+    void discard_instruction();
+
+    std::vector<Token> operands;
+};
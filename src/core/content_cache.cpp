@@ -0,0 +1,225 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include "content_cache.h"
+#include "parsers.h"
+#include "placements.h"
+
+#include <algorithm>
+#include <atomic>
+#include <iterator>
+#include <utility>
+
+namespace {
+
+using cache_ptr = std::shared_ptr<ContentCache>;
+
+std::atomic<unsigned long long> change_count{0};
+
+// The indirect content streams of a page or stream. Empty if the content is
+// something that cannot be identified by object numbers.
+std::vector<QPDFObjGen> content_streams(QPDFObjectHandle h)
+{
+    std::vector<QPDFObjectHandle> streams;
+    if (h.isStream()) {
+        streams.push_back(h);
+    } else if (h.isDictionary()) {
+        auto contents = h.getKey("/Contents");
+        if (contents.isStream())
+            streams.push_back(contents);
+        else if (contents.isArray())
+            streams = contents.getArrayAsVector();
+    }
+
+    std::vector<QPDFObjGen> result;
+    for (auto &stream : streams) {
+        if (!stream.isStream() || !stream.isIndirect())
+            return {};
+        result.push_back(stream.getObjGen());
+    }
+    return result;
+}
+
+// Copy the direct arrays and dictionaries in an object, which Python could modify
+// in place. Scalars cannot be modified, and indirect objects are not copied.
+QPDFObjectHandle copy_object(QPDFObjectHandle h)
+{
+    if (h.isIndirect())
+        return h;
+    if (h.isArray()) {
+        auto copy = QPDFObjectHandle::newArray();
+        for (auto item : h.aitems())
+            copy.appendItem(copy_object(item));
+        return copy;
+    }
+    if (h.isDictionary()) {
+        auto copy = QPDFObjectHandle::newDictionary();
+        for (auto &[key, value] : h.ditems())
+            copy.replaceKey(key, copy_object(value));
+        return copy;
+    }
+    return h;
+}
+
+ObjectList copy_objects(ObjectList const &objects)
+{
+    ObjectList copy;
+    copy.reserve(objects.size());
+    for (auto const &obj : objects)
+        copy.push_back(copy_object(obj));
+    return copy;
+}
+
+ParsedContent copy_content(ParsedContent const &content)
+{
+    ParsedContent copy{py::list(), content.warning};
+    for (auto item : content.instructions) {
+        if (py::isinstance<ContentStreamInstruction>(item)) {
+            auto &csi = item.cast<ContentStreamInstruction &>();
+            copy.instructions.append(
+                ContentStreamInstruction(copy_objects(csi.operands), csi.operator_));
+        } else if (py::isinstance<ContentStreamInlineImage>(item)) {
+            auto &csii = item.cast<ContentStreamInlineImage &>();
+            copy.instructions.append(ContentStreamInlineImage(
+                copy_objects(csii.image_metadata), csii.image_data));
+        } else {
+            copy.instructions.append(item); // LCOV_EXCL_LINE
+        }
+    }
+    return copy;
+}
+
+} // namespace
+
+ContentCache::ContentCache(size_t max_instructions)
+    : info(std::make_shared<ContentCacheInfo>())
+{
+    this->info->max_instructions = max_instructions;
+}
+
+std::optional<ParsedContent> ContentCache::get(ContentCacheKey const &key)
+{
+    auto found = this->index.find(key);
+    if (found == this->index.end()) {
+        ++this->info->misses;
+        return std::nullopt;
+    }
+    ++this->info->hits;
+    this->entries.splice(this->entries.begin(), this->entries, found->second);
+    // A copy, so that callers may edit what they are given
+    return copy_content(found->second->content);
+}
+
+void ContentCache::put(ContentCacheKey key, ParsedContent const &content)
+{
+    auto size = content.instructions.size();
+    if (size > this->info->max_instructions)
+        return;
+
+    auto found = this->index.find(key);
+    if (found != this->index.end())
+        this->erase(found->second);
+    while (this->info->instructions + size > this->info->max_instructions) {
+        this->erase(std::prev(this->entries.end()));
+        ++this->info->evictions;
+    }
+
+    this->entries.push_front({key, copy_content(content)});
+    this->index[std::move(key)] = this->entries.begin();
+    this->info->instructions += size;
+    ++this->info->entries;
+}
+
+void ContentCache::invalidate(QPDFObjGen og)
+{
+    for (auto it = this->entries.begin(); it != this->entries.end();) {
+        auto &streams = it->key.streams;
+        auto next     = std::next(it);
+        if (std::find(streams.begin(), streams.end(), og) != streams.end()) {
+            this->erase(it);
+            ++this->info->invalidations;
+        }
+        it = next;
+    }
+}
+
+void ContentCache::erase(Entries::iterator it)
+{
+    this->info->instructions -= it->content.instructions.size();
+    --this->info->entries;
+    this->index.erase(it->key);
+    this->entries.erase(it);
+}
+
+std::shared_ptr<ContentCache> get_content_cache(QPDF *q)
+{
+    if (!q)
+        return nullptr;
+    auto pdf = py::cast(q, py::return_value_policy::reference);
+    if (!py::hasattr(pdf, "_content_cache"))
+        return nullptr;
+    auto capsule = pdf.attr("_content_cache").cast<py::capsule>();
+    return *capsule.get_pointer<cache_ptr>();
+}
+
+void set_content_cache(QPDF &q, size_t max_instructions)
+{
+    // Like the Pdf's mutex, the cache is stored on the Python Pdf
+    auto pdf = py::cast(&q, py::return_value_policy::reference);
+    if (py::hasattr(pdf, "_content_cache")) {
+        py::delattr(pdf, "_content_cache");
+        py::delattr(pdf, "_content_cache_info");
+    }
+    if (max_instructions == 0)
+        return;
+    auto cache = std::make_shared<ContentCache>(max_instructions);
+
+    pdf.attr("_content_cache_info") = py::cast(cache->info);
+    pdf.attr("_content_cache")      = py::capsule(
+        new cache_ptr(cache), [](void *p) { delete static_cast<cache_ptr *>(p); });
+}
+
+void invalidate_content_cache(QPDFObjectHandle h)
+{
+    note_pdf_change();
+    auto q = h.getOwningQPDF();
+    if (!q)
+        return;
+    for (auto og : content_streams(h))
+        invalidate_content_cache(*q, og);
+}
+
+void invalidate_content_cache(QPDF &q, QPDFObjGen og)
+{
+    note_pdf_change();
+    auto cache = get_content_cache(&q);
+    if (cache)
+        cache->invalidate(og);
+    // What a form draws is found by parsing it, so it is forgotten too
+    forget_form_draws(q, og);
+}
+
+void note_pdf_change() { ++change_count; }
+
+unsigned long long pdf_change_count() { return change_count.load(); }
+
+py::list cached_content(QPDFObjectHandle h,
+    std::string const &operators,
+    std::function<ParsedContent()> const &parse)
+{
+    std::optional<ParsedContent> content;
+    auto cache = get_content_cache(h.getOwningQPDF());
+    ContentCacheKey key{cache ? content_streams(h) : std::vector<QPDFObjGen>(),
+        operators};
+    if (!key.streams.empty())
+        content = cache->get(key);
+    if (!content) {
+        content = parse();
+        if (!key.streams.empty())
+            cache->put(std::move(key), *content);
+    }
+    // Warn every time, as parsing would
+    if (!content->warning.empty())
+        python_warning(content->warning.c_str());
+    return content->instructions;
+}
@@ -0,0 +1,105 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <cstddef>
+#include <functional>
+#include <list>
+#include <map>
+#include <memory>
+#include <optional>
+#include <string>
+#include <vector>
+
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFObjGen.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+#include <pybind11/pybind11.h>
+
+namespace py = pybind11;
+
+struct ContentCacheInfo {
+    size_t max_instructions = 0;
+    size_t instructions     = 0;
+    size_t entries          = 0;
+    size_t hits             = 0;
+    size_t misses           = 0;
+    size_t evictions        = 0;
+    size_t invalidations    = 0;
+};
+
+// Parsed content is found by the content streams it was parsed from, so pages
+// that share their content streams share entries, and a page whose /Contents is
+// replaced simply stops matching its old entries.
+struct ContentCacheKey {
+    std::vector<QPDFObjGen> streams;
+    std::string operators;
+
+    bool operator<(ContentCacheKey const &other) const
+    {
+        if (this->streams != other.streams)
+            return this->streams < other.streams;
+        return this->operators < other.operators;
+    }
+};
+
+// Instructions parsed from content, and the warning to issue whenever they are
+// returned, if any
+struct ParsedContent {
+    py::list instructions;
+    std::string warning;
+};
+
+// Least recently used cache of parsed content streams, kept on a Pdf.
+//
+// Its size is counted in instructions rather than bytes, since the Python objects
+// that make up an instruction have no fixed size. Entries hold Python objects, so
+// the GIL must be held to use the cache. Operands may be edited in place, so
+// instructions are copied deeply on the way in and out.
+class ContentCache {
+public:
+    explicit ContentCache(size_t max_instructions);
+
+    // A copy of the cached content, if any
+    std::optional<ParsedContent> get(ContentCacheKey const &key);
+    void put(ContentCacheKey key, ParsedContent const &content);
+    // Forget all entries parsed from a content stream
+    void invalidate(QPDFObjGen og);
+
+    std::shared_ptr<ContentCacheInfo> info;
+
+private:
+    struct Entry {
+        ContentCacheKey key;
+        ParsedContent content;
+    };
+    using Entries = std::list<Entry>;
+
+    void erase(Entries::iterator it);
+
+    // Most recently used first
+    Entries entries;
+    std::map<ContentCacheKey, Entries::iterator> index;
+};
+
+// The Pdf's content cache, or nullptr if it is not enabled
+std::shared_ptr<ContentCache> get_content_cache(QPDF *q);
+// Enable the content cache of a Pdf, replacing any existing one, or disable it
+// if max_instructions is 0
+void set_content_cache(QPDF &q, size_t max_instructions);
+// Forget the parsed content of a stream, or of all content streams of a page,
+// whether cached by the content cache or by Page.placements
+void invalidate_content_cache(QPDFObjectHandle h);
+void invalidate_content_cache(QPDF &q, QPDFObjGen og);
+// Count a change made to a Pdf through pikepdf. Results computed from a whole Pdf
+// are kept only while the count is unchanged. Changes to all Pdfs are counted
+// together, since a stream dictionary does not know which Pdf owns it.
+void note_pdf_change();
+unsigned long long pdf_change_count();
+// Parse the content of a page or stream with parse, unless it is cached, and
+// issue the parse warning, if any
+py::list cached_content(QPDFObjectHandle h,
+    std::string const &operators,
+    std::function<ParsedContent()> const &parse);
@@ -0,0 +1,119 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include "content_columnar.h"
+
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+#include <unordered_map>
+
+#include <qpdf/QUtil.hh>
+
+#include "content_parser.h"
+
+// clang-format off
+const std::vector<std::string> standard_content_operators = {
+    "INLINE IMAGE",
+    "\"", "'", "B", "B*", "BDC", "BI", "BMC", "BT", "BX", "CS", "DP", "Do", "EI",
+    "EMC", "ET", "EX", "F", "G", "ID", "J", "K", "M", "MP", "Q", "RG", "S", "SC",
+    "SCN", "T*", "TD", "TJ", "TL", "Tc", "Td", "Tf", "Tj", "Tm", "Tr", "Ts", "Tw",
+    "Tz", "W", "W*", "b", "b*", "c", "cm", "cs", "d", "d0", "d1", "f", "f*", "g",
+    "gs", "h", "i", "j", "k", "l", "m", "n", "q", "re", "rg", "ri", "s", "sc",
+    "scn", "sh", "v", "w", "y",
+};
+// clang-format on
+
+namespace {
+
+// Largest magnitude at which every integer is exactly representable as a double
+constexpr double max_exact_integer = 9007199254740992.0; // 2 ** 53
+
+class ColumnarBuilder : public InstructionHandler {
+public:
+    explicit ColumnarBuilder(ColumnarContent &content) : content(content)
+    {
+        for (size_t i = 0; i < content.operator_names.size(); ++i)
+            this->codes[content.operator_names[i]] = static_cast<uint8_t>(i);
+    }
+
+    void instruction(QPDFObjectHandle op,
+        std::vector<QPDFObjectHandle> const &operands) override
+    {
+        for (auto operand : operands) {
+            auto index = static_cast<int64_t>(this->content.numbers.size());
+            if (operand.isInteger() || operand.isReal()) {
+                this->content.numbers.push_back(operand.getNumericValue());
+            } else {
+                this->content.numbers.push_back(
+                    std::numeric_limits<double>::quiet_NaN());
+                this->content.objects.emplace_back(index, operand);
+            }
+        }
+        this->finish_instruction(op.getOperatorValue());
+    }
+
+    void inline_image(std::vector<QPDFObjectHandle> const &metadata,
+        QPDFObjectHandle data) override
+    {
+        auto index = static_cast<int64_t>(this->content.numbers.size());
+        this->content.numbers.push_back(std::numeric_limits<double>::quiet_NaN());
+        this->content.inline_images.push_back({index, metadata, data});
+        this->finish_instruction("INLINE IMAGE");
+    }
+
+private:
+    void finish_instruction(std::string const &op)
+    {
+        auto found = this->codes.find(op);
+        uint8_t code;
+        if (found != this->codes.end()) {
+            code = found->second;
+        } else {
+            if (this->content.operator_names.size() > 255)
+                throw std::length_error(
+                    "content stream has too many different operators for the "
+                    "columnar format");
+            code = static_cast<uint8_t>(this->content.operator_names.size());
+            this->content.operator_names.push_back(op);
+            this->codes[op] = code;
+        }
+        this->content.operators.push_back(code);
+        this->content.operand_offsets.push_back(
+            static_cast<int64_t>(this->content.numbers.size()));
+    }
+
+    ColumnarContent &content;
+    std::unordered_map<std::string, uint8_t> codes;
+};
+
+} // namespace
+
+ColumnarContent parse_columnar(
+    std::shared_ptr<Buffer> data, OperatorWhitelist const &whitelist)
+{
+    ColumnarContent content;
+    ColumnarBuilder builder(content);
+    ContentParser parser(data, "content stream");
+
+    if (!group_content(parser, whitelist, builder))
+        content.eof_warning = "Unexpected end of stream";
+    content.warnings = std::move(parser.warnings);
+    return content;
+}
+
+std::string unparse_content_number(double value, unsigned int precision)
+{
+    if (!std::isfinite(value))
+        throw std::invalid_argument(
+            "Can't convert NaN or Infinity to PDF real number");
+    if (value == std::trunc(value) && std::fabs(value) < max_exact_integer)
+        return std::to_string(static_cast<long long>(value));
+
+    // Real numbers in PDF have no exponent, so count digits before the point
+    int integer_digits =
+        std::max(1, static_cast<int>(std::floor(std::log10(std::fabs(value)))) + 1);
+    int decimal_places = std::max(1, static_cast<int>(precision) - integer_digits);
+    return QUtil::double_to_string(value, decimal_places, true);
+}
@@ -0,0 +1,53 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/QPDFExc.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+#include "content_parser.h"
+
+// Operators whose codes in the columnar format are always the same, so that
+// codes can be compared across content streams. "INLINE IMAGE" stands for a
+// whole BI-ID-EI sequence, as in parse_content_stream.
+extern const std::vector<std::string> standard_content_operators;
+
+// A content stream parsed into columns; see pikepdf.ColumnarContentStream. The
+// operands of instruction i are numbers[operand_offsets[i]:operand_offsets[i+1]].
+// Operands that are not numbers are NaN there, and are listed in objects or
+// inline_images by their index into numbers.
+struct ColumnarContent {
+    struct InlineImage {
+        int64_t index;
+        std::vector<QPDFObjectHandle> metadata;
+        QPDFObjectHandle data;
+    };
+
+    std::vector<std::string> operator_names = standard_content_operators;
+    std::vector<uint8_t> operators;
+    std::vector<int64_t> operand_offsets = {0};
+    std::vector<double> numbers;
+    std::vector<std::pair<int64_t, QPDFObjectHandle>> objects;
+    std::vector<InlineImage> inline_images;
+
+    // Problems found while parsing, which qpdf would report as warnings
+    std::vector<QPDFExc> warnings;
+    // Set if the content stream ended in the middle of an instruction
+    std::string eof_warning;
+};
+
+// Parse decoded content stream data into columns, keeping only the operators
+// that whitelist allows. Does not use Python, so the GIL need not be held.
+ColumnarContent parse_columnar(
+    std::shared_ptr<Buffer> data, OperatorWhitelist const &whitelist);
+
+// Format a number as a PDF content stream operand, with at most precision
+// significant digits.
+std::string unparse_content_number(double value, unsigned int precision);
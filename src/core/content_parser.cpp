@@ -0,0 +1,334 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include "content_parser.h"
+
+#include <locale>
+#include <sstream>
+
+#include <qpdf/BufferInputSource.hh>
+#include <qpdf/Pl_Buffer.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/QUtil.hh>
+
+// qpdf gives up on objects nested deeper than about 500. Reading deeper than
+// that ensures that qpdf is given every byte it would read to repair the object,
+// while bounding how much this parser keeps of it.
+constexpr size_t content_max_nesting = 1000;
+
+namespace {
+
+// An array or dictionary whose contents are still being read.
+struct Container {
+    bool is_dictionary;
+    std::vector<QPDFObjectHandle> items;
+};
+
+// Keeps the first object that qpdf reads from a content stream, and where it ended.
+class FirstObject : public QPDFObjectHandle::ParserCallbacks {
+public:
+    void handleObject(QPDFObjectHandle obj, size_t offset, size_t length) override
+    {
+        this->object = obj;
+        this->end    = offset + length;
+        this->terminateParsing();
+    }
+    void handleEOF() override {}
+
+    QPDFObjectHandle object;
+    size_t end = 0;
+};
+
+// Copy a direct object, so that the copy does not refer to the QPDF that read it.
+QPDFObjectHandle copy_direct(QPDFObjectHandle h)
+{
+    switch (h.getTypeCode()) {
+    case qpdf_object_type_e::ot_boolean:
+        return QPDFObjectHandle::newBool(h.getBoolValue());
+    case qpdf_object_type_e::ot_integer:
+        return QPDFObjectHandle::newInteger(h.getIntValue());
+    case qpdf_object_type_e::ot_real:
+        return QPDFObjectHandle::newReal(h.getRealValue());
+    case qpdf_object_type_e::ot_name:
+        return QPDFObjectHandle::newName(h.getName());
+    case qpdf_object_type_e::ot_string:
+        return QPDFObjectHandle::newString(h.getStringValue());
+    case qpdf_object_type_e::ot_operator:
+        return QPDFObjectHandle::newOperator(h.getOperatorValue());
+    case qpdf_object_type_e::ot_inlineimage:
+        return QPDFObjectHandle::newInlineImage(h.getInlineImageValue());
+    case qpdf_object_type_e::ot_array: {
+        std::vector<QPDFObjectHandle> items;
+        for (auto &item : h.getArrayAsVector())
+            items.push_back(copy_direct(item));
+        return QPDFObjectHandle::newArray(items);
+    }
+    case qpdf_object_type_e::ot_dictionary: {
+        auto dict = QPDFObjectHandle::newDictionary();
+        for (auto &[key, value] : h.getDictAsMap())
+            dict.replaceKey(key, copy_direct(value));
+        return dict;
+    }
+    default:
+        return QPDFObjectHandle::newNull();
+    }
+}
+
+} // namespace
+
+ContentParser::ContentParser(
+    std::shared_ptr<Buffer> data, std::string const &description)
+    : data(data), description(description)
+{
+    this->input =
+        std::make_shared<BufferInputSource>(description, this->data.get(), false);
+    this->tokenizer.allowEOF();
+}
+
+QPDFObjectHandle ContentParser::read_inline_image()
+{
+    this->expect_inline_image = false;
+    // Discard the whitespace that ended the ID operator
+    char ch;
+    this->input->read(&ch, 1);
+    this->tokenizer.expectInlineImage(this->input);
+    auto token = this->tokenizer.readToken(this->input, this->description, true);
+    if (token.getType() == QPDFTokenizer::tt_bad) {
+        this->warnings.emplace_back(qpdf_e_damaged_pdf,
+            this->input->getName(),
+            "stream data",
+            this->input->tell(),
+            "EOF found while reading inline image");
+        return QPDFObjectHandle();
+    }
+    return QPDFObjectHandle::newInlineImage(token.getValue());
+}
+
+QPDFObjectHandle ContentParser::next()
+{
+    if (this->expect_inline_image) {
+        auto image = this->read_inline_image();
+        if (image.isInitialized())
+            return image;
+    }
+
+    auto start   = this->input->tell();
+    bool damaged = false;
+    auto obj     = this->read_object(damaged);
+    if (damaged)
+        obj = this->repair(start);
+    if (obj.isInitialized() && obj.isOperator() && obj.getOperatorValue() == "ID")
+        this->expect_inline_image = true;
+    return obj;
+}
+
+// Read the next object, as long as it is well formed. If it is not, set damaged,
+// and read on to where the object ends.
+QPDFObjectHandle ContentParser::read_object(bool &damaged)
+{
+    std::vector<Container> stack;
+    while (true) {
+        auto token = this->tokenizer.readToken(this->input, this->description, true);
+        if (!token.getErrorMessage().empty())
+            damaged = true;
+        QPDFObjectHandle obj;
+        switch (token.getType()) {
+        case QPDFTokenizer::tt_eof:
+            if (!stack.empty())
+                damaged = true;
+            return QPDFObjectHandle();
+        case QPDFTokenizer::tt_bad:
+        case QPDFTokenizer::tt_brace_open:
+        case QPDFTokenizer::tt_brace_close:
+            damaged = true;
+            obj     = QPDFObjectHandle::newNull();
+            break;
+        case QPDFTokenizer::tt_array_open:
+        case QPDFTokenizer::tt_dict_open:
+            if (stack.size() >= content_max_nesting) {
+                damaged = true;
+                return QPDFObjectHandle();
+            }
+            stack.push_back(
+                Container{token.getType() == QPDFTokenizer::tt_dict_open, {}});
+            continue;
+        case QPDFTokenizer::tt_array_close:
+            if (stack.empty() || stack.back().is_dictionary) {
+                damaged = true;
+                obj     = QPDFObjectHandle::newNull();
+                break;
+            }
+            obj = QPDFObjectHandle::newArray(stack.back().items);
+            stack.pop_back();
+            break;
+        case QPDFTokenizer::tt_dict_close: {
+            if (stack.empty() || !stack.back().is_dictionary) {
+                damaged = true;
+                obj     = QPDFObjectHandle::newNull();
+                break;
+            }
+            auto &items = stack.back().items;
+            if (items.size() % 2 != 0) {
+                damaged = true;
+                items.push_back(QPDFObjectHandle::newNull());
+            }
+            obj = QPDFObjectHandle::newDictionary();
+            for (size_t i = 0; i < items.size(); i += 2) {
+                if (!items[i].isName() || obj.hasKey(items[i].getName())) {
+                    damaged = true;
+                    continue;
+                }
+                obj.replaceKey(items[i].getName(), items[i + 1]);
+            }
+            stack.pop_back();
+            break;
+        }
+        case QPDFTokenizer::tt_null:
+            obj = QPDFObjectHandle::newNull();
+            break;
+        case QPDFTokenizer::tt_bool:
+            obj = QPDFObjectHandle::newBool(token.getValue() == "true");
+            break;
+        case QPDFTokenizer::tt_integer:
+            obj = QPDFObjectHandle::newInteger(
+                QUtil::string_to_ll(token.getValue().c_str()));
+            break;
+        case QPDFTokenizer::tt_real:
+            obj = QPDFObjectHandle::newReal(token.getValue());
+            break;
+        case QPDFTokenizer::tt_name:
+            obj = QPDFObjectHandle::newName(token.getValue());
+            break;
+        case QPDFTokenizer::tt_string:
+            obj = QPDFObjectHandle::newString(token.getValue());
+            break;
+        case QPDFTokenizer::tt_word:
+            obj = QPDFObjectHandle::newOperator(token.getValue());
+            break;
+        default:
+            // Whitespace and comments are not returned by the tokenizer
+            continue;
+        }
+
+        if (!stack.empty()) {
+            stack.back().items.push_back(obj);
+            continue;
+        }
+        return obj;
+    }
+}
+
+// Let qpdf read a damaged object from where it starts, so that it is repaired
+// exactly as qpdf's content stream parser would repair it, with the same warnings.
+// qpdf reads no further than this parser did, so it is given only those bytes.
+QPDFObjectHandle ContentParser::repair(qpdf_offset_t start)
+{
+    auto end   = this->input->tell();
+    auto slice = std::make_shared<Buffer>(
+        this->data->getBuffer() + start, static_cast<size_t>(end - start));
+    QPDF scratch;
+    // The scratch QPDF's warnings have the wrong offsets, so they are collected
+    // instead of being logged
+    scratch.setSuppressWarnings(true);
+    scratch.emptyPDF();
+    FirstObject first;
+    QPDFObjectHandle::parseContentStream(
+        QPDFObjectHandle::newStream(&scratch, slice), &first);
+    for (auto &warning : scratch.getWarnings())
+        this->warnings.emplace_back(warning.getErrorCode(),
+            this->input->getName(),
+            warning.getObject(),
+            start + warning.getFilePosition(),
+            warning.getMessageDetail());
+
+    if (!first.object.isInitialized()) {
+        // qpdf treats the rest of the content as the end of the stream
+        this->input->seek(0, SEEK_END);
+        return QPDFObjectHandle();
+    }
+    this->input->seek(start + static_cast<qpdf_offset_t>(first.end), SEEK_SET);
+    return copy_direct(first.object);
+}
+
+OperatorWhitelist::OperatorWhitelist(const std::string &operators)
+{
+    std::istringstream f(operators);
+    f.imbue(std::locale::classic());
+    std::string s;
+    while (std::getline(f, s, ' ')) {
+        this->operators.insert(s);
+    }
+}
+
+bool OperatorWhitelist::allows(const std::string &op) const
+{
+    if (this->operators.empty())
+        return true;
+    if (op[0] == 'q' || op[0] == 'Q') {
+        // We have token with multiple stack push/pops
+        return this->operators.count("q") != 0 || this->operators.count("Q") != 0;
+    }
+    return this->operators.count(op) != 0;
+}
+
+bool group_content(ContentParser &parser,
+    OperatorWhitelist const &whitelist,
+    InstructionHandler &handler)
+{
+    std::vector<QPDFObjectHandle> tokens;
+    std::vector<QPDFObjectHandle> inline_metadata;
+    bool parsing_inline_image = false;
+    while (true) {
+        auto obj = parser.next();
+        if (!obj.isInitialized())
+            break;
+        if (!obj.isOperator()) {
+            tokens.push_back(obj);
+            continue;
+        }
+        auto op = obj.getOperatorValue();
+        if (!whitelist.allows(op)) {
+            tokens.clear();
+            continue;
+        }
+        if (op == "BI") {
+            parsing_inline_image = true;
+        } else if (parsing_inline_image) {
+            if (op == "ID") {
+                inline_metadata = tokens;
+            } else if (op == "EI") {
+                if (!tokens.empty())
+                    handler.inline_image(inline_metadata, tokens[0]);
+                inline_metadata.clear();
+                parsing_inline_image = false;
+            }
+        } else {
+            handler.instruction(obj, tokens);
+        }
+        tokens.clear();
+    }
+    return tokens.empty();
+}
+
+InstructionList parse_instructions(
+    std::shared_ptr<Buffer> data, OperatorWhitelist const &whitelist)
+{
+    InstructionList result;
+    ContentParser parser(data, "content stream");
+    if (!group_content(parser, whitelist, result))
+        result.eof_warning = "Unexpected end of stream";
+    result.warnings = std::move(parser.warnings);
+    return result;
+}
+
+std::shared_ptr<Buffer> get_content_data(QPDFObjectHandle h)
+{
+    Pl_Buffer buffer("content stream data");
+    if (h.isStream() || h.isArray()) {
+        std::string all_description;
+        h.pipeContentStreams(&buffer, "content stream", all_description);
+    } else {
+        h.pipePageContents(&buffer);
+    }
+    return buffer.getBufferSharedPointer();
+}
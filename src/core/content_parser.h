@@ -0,0 +1,111 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <memory>
+#include <set>
+#include <string>
+#include <vector>
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/InputSource.hh>
+#include <qpdf/QPDFExc.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+#include <qpdf/QPDFTokenizer.hh>
+
+// Reads the objects of a decoded content stream one at a time, the way qpdf's
+// content stream parser does, but without callbacks, so that parsing can stop
+// after any object and resume later. Well-formed objects are read directly; an
+// object that needs repair is read again by qpdf's own parser, in a QPDF of its
+// own, so that it is repaired as parse_content_stream would repair it. Does not
+// use Python, or the Pdf the content came from.
+class ContentParser {
+public:
+    ContentParser(std::shared_ptr<Buffer> data, std::string const &description);
+
+    // Return the next object, or an uninitialized handle at the end of the data.
+    // Operands are returned before their operator. After the operator ID, the
+    // next object is the inline image data.
+    QPDFObjectHandle next();
+
+    // Problems found while parsing, which qpdf would report as warnings. The
+    // caller reports them to the owning Pdf, or raises them if it has none.
+    std::vector<QPDFExc> warnings;
+
+private:
+    QPDFObjectHandle read_inline_image();
+    QPDFObjectHandle read_object(bool &damaged);
+    QPDFObjectHandle repair(qpdf_offset_t start);
+
+    std::shared_ptr<Buffer> data;
+    std::shared_ptr<InputSource> input;
+    std::string description;
+    QPDFTokenizer tokenizer;
+    bool expect_inline_image = false;
+};
+
+// The operators selected by the operators argument of parse_content_stream: a
+// space-separated list, where an empty list selects every operator.
+class OperatorWhitelist {
+public:
+    explicit OperatorWhitelist(const std::string &operators);
+    bool allows(const std::string &op) const;
+
+private:
+    std::set<std::string> operators;
+};
+
+// Receives the instructions of a content stream from group_content.
+class InstructionHandler {
+public:
+    virtual ~InstructionHandler() = default;
+    virtual void instruction(
+        QPDFObjectHandle op, std::vector<QPDFObjectHandle> const &operands) = 0;
+    // A BI-ID-EI sequence
+    virtual void inline_image(std::vector<QPDFObjectHandle> const &metadata,
+        QPDFObjectHandle data) = 0;
+};
+
+// Group the objects that parser reads into instructions, as parse_content_stream
+// does, and pass the instructions that whitelist allows to handler. Returns false
+// if the content ended in the middle of an instruction.
+bool group_content(ContentParser &parser,
+    OperatorWhitelist const &whitelist,
+    InstructionHandler &handler);
+
+// The instructions of a content stream, kept as qpdf objects, so that they can
+// be collected without the GIL and converted to Python later.
+struct InstructionList : InstructionHandler {
+    struct Instruction {
+        // The operator, or the data of an inline image
+        QPDFObjectHandle op;
+        // The operands, or the metadata of an inline image
+        std::vector<QPDFObjectHandle> operands;
+        bool is_inline_image;
+    };
+
+    void instruction(QPDFObjectHandle op,
+        std::vector<QPDFObjectHandle> const &operands) override
+    {
+        this->instructions.push_back({op, operands, false});
+    }
+    void inline_image(std::vector<QPDFObjectHandle> const &metadata,
+        QPDFObjectHandle data) override
+    {
+        this->instructions.push_back({data, metadata, true});
+    }
+
+    std::vector<Instruction> instructions;
+    std::vector<QPDFExc> warnings;
+    std::string eof_warning;
+};
+
+// Parse decoded content stream data into a list of instructions. Does not use
+// Python, so the GIL need not be held.
+InstructionList parse_instructions(
+    std::shared_ptr<Buffer> data, OperatorWhitelist const &whitelist);
+
+// Decode the content of a page, or of a content stream or array of content
+// streams, as qpdf would before parsing it. The caller must hold the Pdf's mutex.
+std::shared_ptr<Buffer> get_content_data(QPDFObjectHandle h);
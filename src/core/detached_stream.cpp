@@ -0,0 +1,147 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <map>
+#include <string>
+#include <vector>
+
+#include "pikepdf.h"
+#include "detached_stream.h"
+#include "utils.h"
+
+#include <qpdf/Pl_Buffer.hh>
+#include <qpdf/QPDFExc.hh>
+
+namespace {
+
+// Filters that depend on nothing but the stream data and its decode parameters,
+// and the decode level at which qpdf applies them. Others, like JBIG2Decode, may
+// refer to other objects or call into Python.
+const std::map<std::string, qpdf_stream_decode_level_e> self_contained_filters = {
+    {"/FlateDecode", qpdf_dl_generalized},
+    {"/Fl", qpdf_dl_generalized},
+    {"/LZWDecode", qpdf_dl_generalized},
+    {"/LZW", qpdf_dl_generalized},
+    {"/ASCII85Decode", qpdf_dl_generalized},
+    {"/A85", qpdf_dl_generalized},
+    {"/ASCIIHexDecode", qpdf_dl_generalized},
+    {"/AHx", qpdf_dl_generalized},
+    {"/RunLengthDecode", qpdf_dl_specialized},
+    {"/RL", qpdf_dl_specialized},
+    {"/DCTDecode", qpdf_dl_all},
+    {"/DCT", qpdf_dl_all},
+};
+
+// Whether unparseResolved() describes an object completely: it contains no streams,
+// and no indirect objects other than itself, which unparseResolved() leaves as
+// references.
+bool is_self_contained(QPDFObjectHandle h, bool top = true)
+{
+    if (h.isStream() || (!top && h.isIndirect()))
+        return false;
+    if (h.isArray()) {
+        for (auto &item : h.getArrayAsVector())
+            if (!is_self_contained(item, false))
+                return false;
+    } else if (h.isDictionary()) {
+        for (auto &[key, value] : h.getDictAsMap())
+            if (!is_self_contained(value, false))
+                return false;
+    }
+    return true;
+}
+
+} // namespace
+
+bool DetachedStream::can_detach(
+    QPDFObjectHandle h, qpdf_stream_decode_level_e decode_level)
+{
+    auto dict = h.getDict();
+    if (!is_self_contained(dict.getKey("/Filter")) ||
+        !is_self_contained(dict.getKey("/DecodeParms")))
+        return false;
+
+    auto filter = dict.getKey("/Filter");
+    if (filter.isName())
+        filter = QPDFObjectHandle::newArray({filter});
+    if (!filter.isArray() || filter.getArrayNItems() == 0)
+        return false;
+    for (auto &item : filter.getArrayAsVector()) {
+        if (!item.isName())
+            return false;
+        auto found = self_contained_filters.find(item.getName());
+        if (found == self_contained_filters.end() || found->second > decode_level)
+            return false;
+    }
+    return true;
+}
+
+DetachedStream::DetachedStream(QPDFObjectHandle h)
+    : objgen(h.getObjGen()), filename(h.getOwningQPDF()->getFilename()),
+      raw(h.getRawStreamData()),
+      filter(h.getDict().getKey("/Filter").unparseResolved()),
+      decode_parms(h.getDict().getKey("/DecodeParms").unparseResolved())
+{
+}
+
+void DetachedStream::pipe(Pipeline *p,
+    qpdf_stream_decode_level_e decode_level,
+    std::vector<QPDFExc> &warnings) const
+{
+    QPDF scratch;
+    // The scratch QPDF's warnings name the wrong object, so they are collected
+    // and reported against the original instead of being logged here
+    scratch.setSuppressWarnings(true);
+    scratch.setLogger(get_pikepdf_logger());
+    auto collect_warnings = [&]() {
+        for (auto &warning : scratch.getWarnings())
+            warnings.emplace_back(warning.getErrorCode(),
+                this->filename,
+                std::string("object ") + this->objgen.unparse(),
+                0,
+                warning.getMessageDetail());
+    };
+
+    bool filtered = false;
+    try {
+        scratch.emptyPDF();
+        auto stream = QPDFObjectHandle::newStream(&scratch, this->raw);
+        auto dict   = stream.getDict();
+        dict.replaceKey("/Filter", QPDFObjectHandle::parse(&scratch, this->filter));
+        dict.replaceKey(
+            "/DecodeParms", QPDFObjectHandle::parse(&scratch, this->decode_parms));
+        filtered = stream.pipeStreamData(p, 0, decode_level, false);
+    } catch (const QPDFExc &e) {
+        collect_warnings();
+        // Report the error against the original object, as read_bytes would.
+        // Other errors, such as those from decoders, are left for pikepdf's
+        // exception translator, so that they become the same Python exceptions
+        // as when read_bytes fails.
+        std::string msg = e.getMessageDetail();
+        str_replace(msg, "getStreamData", "read_bytes");
+        throw QPDFExc(e.getErrorCode(),
+            this->filename,
+            std::string("object ") + this->objgen.unparse(),
+            0,
+            msg);
+    } catch (...) {
+        collect_warnings();
+        throw;
+    }
+    collect_warnings();
+    if (!filtered) {
+        throw QPDFExc(qpdf_e_damaged_pdf,
+            this->filename,
+            std::string("object ") + this->objgen.unparse(),
+            0,
+            "error decoding stream data");
+    }
+}
+
+std::shared_ptr<Buffer> DetachedStream::decode(
+    qpdf_stream_decode_level_e decode_level, std::vector<QPDFExc> &warnings) const
+{
+    Pl_Buffer output("detached stream");
+    this->pipe(&output, decode_level, warnings);
+    return output.getBufferSharedPointer();
+}
@@ -0,0 +1,48 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <memory>
+#include <string>
+#include <vector>
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/Pipeline.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFExc.hh>
+#include <qpdf/QPDFObjGen.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+// Streams smaller than this are best decoded as they are read; for them, handing
+// off to another thread costs more than decoding
+constexpr size_t detached_decode_min_bytes = 16 * 1024;
+
+// The raw data of a stream, with what is needed to decode it, but detached from
+// its Pdf. Any number of threads may decode detached streams at once, without the
+// GIL, since each is decoded in a scratch QPDF of its own.
+struct DetachedStream {
+    // Whether a stream has filters, all of which qpdf can apply at decode_level
+    // using nothing but the stream's own data and decode parameters, and whether
+    // its /Filter and /DecodeParms refer to no other objects.
+    static bool can_detach(QPDFObjectHandle h, qpdf_stream_decode_level_e decode_level);
+
+    // Read the raw data of h. The caller must hold the Pdf's mutex.
+    explicit DetachedStream(QPDFObjectHandle h);
+
+    // Decode the stream; errors are reported against the original object.
+    // Warnings are added to warnings, also against the original object, for the
+    // caller to report to the Pdf once it holds the Pdf's mutex.
+    std::shared_ptr<Buffer> decode(
+        qpdf_stream_decode_level_e decode_level, std::vector<QPDFExc> &warnings) const;
+    // Decode the stream into a pipeline, which is finished.
+    void pipe(Pipeline *p,
+        qpdf_stream_decode_level_e decode_level,
+        std::vector<QPDFExc> &warnings) const;
+
+    QPDFObjGen objgen;
+    std::string filename;
+    std::shared_ptr<Buffer> raw;
+    std::string filter;
+    std::string decode_parms;
+};
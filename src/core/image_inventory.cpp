@@ -0,0 +1,206 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <map>
+#include <optional>
+#include <set>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include <qpdf/QPDFPageObjectHelper.hh>
+
+#include "pikepdf.h"
+#include "content_cache.h"
+
+// An image XObject and the pages that use it
+struct ImageInfo {
+    QPDFObjectHandle image;
+    long long width  = 0;
+    long long height = 0;
+    long long bits_per_component;
+    bool image_mask;
+    QPDFObjectHandle colorspace;
+    std::vector<std::string> filters;
+    std::optional<long long> raw_length;
+    std::vector<size_t> pages;
+};
+
+namespace {
+
+ImageInfo describe_image(QPDFObjectHandle image)
+{
+    ImageInfo info;
+    info.image = image;
+
+    auto dict  = image.getDict();
+    auto width = dict.getKey("/Width");
+    if (width.isInteger())
+        info.width = width.getIntValue();
+
+    auto height = dict.getKey("/Height");
+    if (height.isInteger())
+        info.height = height.getIntValue();
+
+    auto image_mask = dict.getKey("/ImageMask");
+    info.image_mask = image_mask.isBool() && image_mask.getBoolValue();
+
+    // Same defaults as PdfImage.bits_per_component
+    auto bpc = dict.getKey("/BitsPerComponent");
+    if (bpc.isInteger() && bpc.getIntValue() != 0)
+        info.bits_per_component = bpc.getIntValue();
+    else
+        info.bits_per_component = info.image_mask ? 1 : 8;
+
+    info.colorspace = dict.getKey("/ColorSpace");
+
+    auto filter = dict.getKey("/Filter");
+    if (filter.isName()) {
+        info.filters.push_back(filter.getName());
+    } else if (filter.isArray()) {
+        for (auto item : filter.getArrayAsVector())
+            if (item.isName())
+                info.filters.push_back(item.getName());
+    }
+
+    auto length = dict.getKey("/Length");
+    if (length.isInteger())
+        info.raw_length = length.getIntValue();
+    return info;
+}
+
+// Finds the images used by each page in one pass over the document. Images are
+// found through resources, as Page.images does, and each Form XObject's images
+// are found once however many pages use it.
+class InventoryBuilder {
+public:
+    void add_page(QPDFPageObjectHelper page, size_t index)
+    {
+        for (auto og : this->images_of(page.getAttribute("/Resources", false)))
+            this->images.at(og).pages.push_back(index);
+    }
+
+    std::map<QPDFObjGen, ImageInfo> images;
+
+private:
+    std::set<QPDFObjGen> images_of(QPDFObjectHandle resources)
+    {
+        std::set<QPDFObjGen> found;
+        auto xobjects = resources.isDictionary() ? resources.getKey("/XObject")
+                                                 : QPDFObjectHandle::newNull();
+        if (!xobjects.isDictionary())
+            return found;
+
+        for (auto &[name, xobject] : xobjects.ditems()) {
+            if (!xobject.isStream() || !xobject.isIndirect())
+                continue;
+            auto og      = xobject.getObjGen();
+            auto subtype = xobject.getDict().getKey("/Subtype");
+            if (subtype.isNameAndEquals("/Image")) {
+                if (this->images.find(og) == this->images.end())
+                    this->images.emplace(og, describe_image(xobject));
+                found.insert(og);
+            } else if (subtype.isNameAndEquals("/Form")) {
+                auto form_images = this->images_of_form(xobject, resources);
+                found.insert(form_images.begin(), form_images.end());
+            }
+        }
+        return found;
+    }
+
+    std::set<QPDFObjGen> images_of_form(
+        QPDFObjectHandle form, QPDFObjectHandle parent_resources)
+    {
+        auto og    = form.getObjGen();
+        auto known = this->forms.find(og);
+        if (known != this->forms.end())
+            return known->second;
+        // A form that uses itself, directly or not, is only followed once
+        if (!this->active.insert(og).second) {
+            ++this->cycles;
+            return {};
+        }
+
+        auto cycles_before = this->cycles;
+        // Old forms without resources use those of whatever draws them
+        auto resources = form.getDict().getKey("/Resources");
+        bool own       = resources.isDictionary();
+        auto found     = this->images_of(own ? resources : parent_resources);
+        this->active.erase(og);
+        // What was found inside a cycle depends on where the cycle was entered
+        if (own && this->cycles == cycles_before)
+            this->forms[og] = found;
+        return found;
+    }
+
+    std::map<QPDFObjGen, std::set<QPDFObjGen>> forms;
+    std::set<QPDFObjGen> active;
+    size_t cycles = 0;
+};
+
+py::dict copy_dict(py::dict dict)
+{
+    return py::reinterpret_steal<py::dict>(PyDict_Copy(dict.ptr()));
+}
+
+} // namespace
+
+py::dict image_inventory(QPDF &q)
+{
+    // The inventory is kept on the Python Pdf, like the content cache, until
+    // anything is changed
+    auto pdf     = py::cast(&q, py::return_value_policy::reference);
+    auto changes = pdf_change_count();
+    if (py::hasattr(pdf, "_image_inventory") &&
+        pdf.attr("_image_inventory_changes").cast<unsigned long long>() == changes)
+        return copy_dict(pdf.attr("_image_inventory"));
+
+    InventoryBuilder builder;
+    {
+        PdfGilRelease release(&q);
+        auto &pages = q.getAllPages();
+        for (size_t i = 0; i < pages.size(); ++i)
+            builder.add_page(QPDFPageObjectHelper(pages[i]), i);
+    }
+
+    py::dict inventory;
+    for (auto &[og, info] : builder.images)
+        inventory[py::make_tuple(og.getObj(), og.getGen())] = py::cast(std::move(info));
+
+    pdf.attr("_image_inventory")         = inventory;
+    pdf.attr("_image_inventory_changes") = changes;
+    return copy_dict(inventory);
+}
+
+void init_image_inventory(py::module_ &m)
+{
+    py::class_<ImageInfo>(m, "ImageInfo")
+        .def_property_readonly("obj", [](ImageInfo &info) { return info.image; })
+        .def_property_readonly("objgen",
+            [](ImageInfo &info) {
+                auto og = info.image.getObjGen();
+                return std::pair<int, int>(og.getObj(), og.getGen());
+            })
+        .def_readonly("width", &ImageInfo::width)
+        .def_readonly("height", &ImageInfo::height)
+        .def_readonly("bits_per_component", &ImageInfo::bits_per_component)
+        .def_readonly("image_mask", &ImageInfo::image_mask)
+        .def_property_readonly("colorspace",
+            [](ImageInfo &info) -> py::object {
+                if (info.colorspace.isNull())
+                    return py::none();
+                return py::cast(info.colorspace);
+            })
+        .def_readonly("filters", &ImageInfo::filters)
+        .def_readonly("raw_length", &ImageInfo::raw_length)
+        .def_readonly("pages", &ImageInfo::pages)
+        .def("__repr__", [](ImageInfo &info) {
+            auto og = info.image.getObjGen();
+            return py::str("<pikepdf.ImageInfo {} {} {}x{} on {} pages>")
+                .format(og.getObj(),
+                    og.getGen(),
+                    info.width,
+                    info.height,
+                    info.pages.size());
+        });
+}
@@ -0,0 +1,237 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <cerrno>
+#include <cstdio>
+#include <cstring>
+
+#include <sys/types.h>
+#include <sys/stat.h>
+#ifdef _WIN32
+#    include <io.h>
+#    ifndef NOMINMAX
+#        define NOMINMAX
+#    endif
+#    include <windows.h>
+#else
+#    include <unistd.h>
+#endif
+
+#include <qpdf/Constants.h>
+#include <qpdf/Types.h>
+#include <qpdf/DLL.h>
+#include <qpdf/QPDFExc.hh>
+#include <qpdf/QPDFSystemError.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/InputSource.hh>
+#include <qpdf/QUtil.hh>
+
+#include <pybind11/pybind11.h>
+
+#include "pikepdf.h"
+#include "utils.h"
+
+// Read up to length bytes at offset without using or moving the file position, so
+// that concurrent readers of the same descriptor do not interfere with each other.
+// Returns the number of bytes read, 0 at EOF, or -1 with errno set.
+inline long long native_pread(int fd, char *buffer, size_t length, qpdf_offset_t offset)
+{
+#ifdef _WIN32
+    // ReadFile with an OVERLAPPED offset is the Windows equivalent of pread.
+    auto handle = reinterpret_cast<HANDLE>(_get_osfhandle(fd));
+    OVERLAPPED overlapped{};
+    overlapped.Offset     = static_cast<DWORD>(offset & 0xFFFFFFFF);
+    overlapped.OffsetHigh = static_cast<DWORD>(static_cast<uint64_t>(offset) >> 32);
+    DWORD bytes_read      = 0;
+    auto chunk            = static_cast<DWORD>(std::min<size_t>(length, 1u << 30));
+    if (!ReadFile(handle, buffer, chunk, &bytes_read, &overlapped)) {
+        if (GetLastError() == ERROR_HANDLE_EOF)
+            return 0;
+        errno = EIO;
+        return -1;
+    }
+    return bytes_read;
+#else
+    ssize_t result;
+    do {
+        result = ::pread(fd, buffer, length, static_cast<off_t>(offset));
+    } while (result < 0 && errno == EINTR);
+    return result;
+#endif
+}
+
+// GIL usage:
+// This input source never calls into Python after it is constructed. It reads the
+// file with pread (or its Windows equivalent) at an offset that it tracks itself,
+// so qpdf may use it with or without the GIL held, before and after opening. The
+// constructor's caller must hold the GIL when a Python stream is given, since we
+// ask the stream for its file descriptor.
+class NativeFileInputSource : public InputSource {
+public:
+    // Open the file at path, which is encoded as by os.fsencode().
+    NativeFileInputSource(const std::string &path, const std::string &description)
+        : name(description)
+    {
+        // safe_fopen throws QPDFSystemError on failure, and handles UTF-8 paths on
+        // Windows for us.
+        this->file = QUtil::safe_fopen(path.c_str(), "rb");
+#ifdef _WIN32
+        this->fd = _fileno(this->file);
+#else
+        this->fd = fileno(this->file);
+#endif
+        this->init_size();
+    }
+
+    // Read from the file descriptor of a Python file object. The descriptor is
+    // duplicated, so the Python stream may be closed independently of us.
+    // Offsets are relative to the stream's position at the time of the call.
+    NativeFileInputSource(const py::object &stream, const std::string &description)
+        : name(description)
+    {
+        int stream_fd = py::cast<int>(stream.attr("fileno")());
+        this->base    = py::cast<qpdf_offset_t>(stream.attr("tell")());
+#ifdef _WIN32
+        this->fd = _dup(stream_fd);
+#else
+        this->fd = ::dup(stream_fd);
+#endif
+        if (this->fd < 0)
+            throw QPDFSystemError(description, errno);
+        this->init_size();
+    }
+
+    virtual ~NativeFileInputSource() { this->close_file(); }
+    NativeFileInputSource(const NativeFileInputSource &)            = delete;
+    NativeFileInputSource &operator=(const NativeFileInputSource &) = delete;
+    NativeFileInputSource(NativeFileInputSource &&)                 = delete;
+    NativeFileInputSource &operator=(NativeFileInputSource &&)      = delete;
+
+    std::string const &getName() const override { return this->name; }
+
+    qpdf_offset_t tell() override { return this->offset; }
+
+    void seek(qpdf_offset_t offset, int whence) override
+    {
+        switch (whence) {
+        case SEEK_SET:
+            break;
+        case SEEK_CUR:
+            offset += this->offset;
+            break;
+        case SEEK_END:
+            offset += this->stream_size - this->base;
+            break;
+        default:
+            throw std::logic_error("invalid argument to seek"); // LCOV_EXCL_LINE
+        }
+        if (offset < 0)
+            throw std::runtime_error(this->name + ": seek before beginning of file");
+        this->offset = offset;
+    }
+
+    // LCOV_EXCL_START
+    void rewind() override { this->seek(0, SEEK_SET); }
+    // LCOV_EXCL_STOP
+
+    size_t read(char *buffer, size_t length) override
+    {
+        this->last_offset = this->offset;
+        size_t total      = 0;
+        while (total < length) {
+            auto result = native_pread(this->fd,
+                buffer + total,
+                length - total,
+                this->base + this->offset + total);
+            if (result < 0)
+                throw QPDFSystemError(this->name + ": read", errno);
+            if (result == 0)
+                break;
+            total += static_cast<size_t>(result);
+        }
+        if (length > 0 && total == 0) {
+            // EOF
+            this->offset      = this->stream_size - this->base;
+            this->last_offset = this->offset;
+        }
+        this->offset += total;
+        return total;
+    }
+
+    void unreadCh(char ch) override { this->seek(-1, SEEK_CUR); }
+
+    qpdf_offset_t findAndSkipNextEOL() override
+    {
+        qpdf_offset_t result   = 0;
+        bool eol_straddles_buf = false;
+        char rawbuf[4096];
+        std::string line_endings = "\r\n";
+
+        while (true) {
+            qpdf_offset_t cur_offset = this->tell();
+            size_t len               = this->read(rawbuf, sizeof(rawbuf));
+            if (len == 0) {
+                result = this->tell();
+                break;
+            }
+            std::string_view buf(rawbuf, len);
+            size_t found;
+            if (!eol_straddles_buf) {
+                found = buf.find_first_of(line_endings);
+                if (found == std::string::npos)
+                    continue;
+            } else {
+                found = 0;
+            }
+
+            size_t found_end = buf.find_first_not_of(line_endings, found);
+            if (found_end == std::string::npos) {
+                eol_straddles_buf = true;
+                continue;
+            }
+            result = cur_offset + found_end;
+            this->seek(result, SEEK_SET);
+            break;
+        }
+        return result;
+    }
+
+private:
+    void init_size()
+    {
+#ifdef _WIN32
+        struct _stat64 st;
+        if (_fstat64(this->fd, &st) != 0) {
+#else
+        struct stat st;
+        if (::fstat(this->fd, &st) != 0) {
+#endif
+            int saved_errno = errno;
+            this->close_file();
+            throw QPDFSystemError(this->name, saved_errno);
+        }
+        this->stream_size = static_cast<qpdf_offset_t>(st.st_size);
+    }
+
+    void close_file()
+    {
+        if (this->file) {
+            fclose(this->file);
+        } else if (this->fd >= 0) {
+#ifdef _WIN32
+            _close(this->fd);
+#else
+            ::close(this->fd);
+#endif
+        }
+        this->file = nullptr;
+        this->fd   = -1;
+    }
+
+    std::string name;
+    FILE *file                = nullptr;
+    int fd                    = -1;
+    qpdf_offset_t base        = 0;
+    qpdf_offset_t offset      = 0;
+    qpdf_offset_t stream_size = 0;
+};
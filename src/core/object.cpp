@@ -2,6 +2,7 @@
 // SPDX-License-Identifier: MPL-2.0
 
 #include <cstring>
+#include <optional>
 #include <cctype>
 
 #include <qpdf/Constants.h>
@@ -21,7 +22,9 @@
 #include "pikepdf.h"
 #include "utils.h"
 
+#include "content_cache.h"
 #include "parsers.h"
+#include "stream_provider-inl.h"
 
 /*
 Type table
@@ -222,6 +225,16 @@ QPDFObjectHandle object_get_key(QPDFObjectHandle h, std::string const &key)
     return dict.getKey(key);
 }
 
+// Changing how a stream is filtered changes its content, so forget what was
+// parsed from it
+void note_stream_key_change(QPDFObjectHandle h, std::string const &key)
+{
+    if (h.isStream() && (key == "/Filter" || key == "/DecodeParms"))
+        invalidate_content_cache(h);
+    else
+        note_pdf_change();
+}
+
 void object_set_key(QPDFObjectHandle h, std::string const &key, QPDFObjectHandle &value)
 {
     if (!h.isDictionary() && !h.isStream())
@@ -242,6 +255,7 @@ void object_set_key(QPDFObjectHandle h, std::string const &key, QPDFObjectHandle
 
     // A stream dictionary has no owner, so use the stream object in this comparison
     dict.replaceKey(key, value);
+    note_stream_key_change(h, key);
 }
 
 void object_del_key(QPDFObjectHandle h, std::string const &key)
@@ -259,6 +273,7 @@ void object_del_key(QPDFObjectHandle h, std::string const &key)
         throw py::key_error(key);
 
     dict.removeKey(key);
+    note_stream_key_change(h, key);
 }
 
 std::pair<int, int> object_get_objgen(QPDFObjectHandle h)
@@ -285,6 +300,21 @@ std::shared_ptr<Buffer> get_stream_data(
     }
 }
 
+// Decoding is often the most expensive thing we do, and needs nothing from
+// Python, so let other threads run meanwhile.
+std::shared_ptr<Buffer> get_stream_data_nogil(
+    QPDFObjectHandle &h, qpdf_stream_decode_level_e decode_level)
+{
+    PdfGilRelease release(h.getOwningQPDF());
+    return get_stream_data(h, decode_level);
+}
+
+std::shared_ptr<Buffer> get_raw_stream_data_nogil(QPDFObjectHandle &h)
+{
+    PdfGilRelease release(h.getOwningQPDF());
+    return h.getRawStreamData();
+}
+
 void init_object(py::module_ &m)
 {
     py::enum_<qpdf_object_type_e>(m, "ObjectType")
@@ -545,9 +575,14 @@ void init_object(py::module_ &m)
                 }
                 return value;
             })
-        .def_property("stream_dict",
+        .def_property(
+            "stream_dict",
             &QPDFObjectHandle::getDict,
-            &QPDFObjectHandle::replaceDict,
+            [](QPDFObjectHandle &h, QPDFObjectHandle &dict) {
+                // The new dictionary may filter the stream differently
+                invalidate_content_cache(h);
+                h.replaceDict(dict);
+            },
             py::return_value_policy::reference_internal)
         .def("__setattr__",
             [](QPDFObjectHandle &h, std::string const &name, py::object pyvalue) {
@@ -708,22 +743,26 @@ void init_object(py::module_ &m)
             [](QPDFObjectHandle &h, int index, QPDFObjectHandle &value) {
                 auto u_index = list_range_check(h, index);
                 h.setArrayItem(u_index, value);
+                note_pdf_change();
             })
         .def("__setitem__",
             [](QPDFObjectHandle &h, int index, py::object pyvalue) {
                 auto u_index = list_range_check(h, index);
                 auto value   = objecthandle_encode(pyvalue);
                 h.setArrayItem(u_index, value);
+                note_pdf_change();
             })
         .def("__delitem__",
             [](QPDFObjectHandle &h, int index) {
                 auto u_index = list_range_check(h, index);
                 h.eraseItem(u_index);
+                note_pdf_change();
             })
         .def("wrap_in_array", [](QPDFObjectHandle &h) { return h.wrapInArray(); })
         .def("append",
             [](QPDFObjectHandle &h, py::object pyitem) {
                 auto item = objecthandle_encode(pyitem);
+                note_pdf_change();
                 return h.appendItem(item);
             })
         .def("extend",
@@ -731,6 +770,7 @@ void init_object(py::module_ &m)
                 for (auto item : iter) {
                     h.appendItem(objecthandle_encode(item));
                 }
+                note_pdf_change();
             })
         .def_property_readonly("is_rectangle",
             &QPDFObjectHandle::isRectangle // LCOV_EXCL_LINE
@@ -738,21 +778,21 @@ void init_object(py::module_ &m)
         .def(
             "get_stream_buffer",
             [](QPDFObjectHandle &h, qpdf_stream_decode_level_e decode_level) {
-                return get_stream_data(h, decode_level);
+                return get_stream_data_nogil(h, decode_level);
             },
             py::arg("decode_level") = qpdf_dl_generalized)
         .def("get_raw_stream_buffer",
-            [](QPDFObjectHandle &h) { return h.getRawStreamData(); })
+            [](QPDFObjectHandle &h) { return get_raw_stream_data_nogil(h); })
         .def(
             "read_bytes",
             [](QPDFObjectHandle &h, qpdf_stream_decode_level_e decode_level) {
-                auto buf = get_stream_data(h, decode_level);
+                auto buf = get_stream_data_nogil(h, decode_level);
                 return py::bytes((const char *)buf->getBuffer(), buf->getSize());
             },
             py::arg("decode_level") = qpdf_dl_generalized)
         .def("read_raw_bytes",
             [](QPDFObjectHandle &h) {
-                auto buf = h.getRawStreamData();
+                auto buf = get_raw_stream_data_nogil(h);
                 // py::bytes will make a copy of the buffer, so releasing is fine
                 return py::bytes((const char *)buf->getBuffer(), buf->getSize());
             })
@@ -766,10 +806,40 @@ void init_object(py::module_ &m)
                 QPDFObjectHandle h_filter       = objecthandle_encode(filter);
                 QPDFObjectHandle h_decode_parms = objecthandle_encode(decode_parms);
                 h.replaceStreamData(sdata, h_filter, h_decode_parms);
+                invalidate_content_cache(h);
             },
             py::arg("data"),
             py::arg("filter"),
             py::arg("decode_parms"))
+        .def(
+            "_write_lazy",
+            [](QPDFObjectHandle &h,
+                py::object provider,
+                py::object filter,
+                py::object decode_parms,
+                std::optional<long long> length) {
+                // provider is a path encoded as bytes, or a function
+                std::shared_ptr<QPDFObjectHandle::StreamDataProvider> sdp;
+                if (py::isinstance<py::bytes>(provider))
+                    sdp = std::make_shared<FileStreamDataProvider>(
+                        provider.cast<std::string>());
+                else
+                    sdp = std::make_shared<PythonStreamDataProvider>(
+                        provider.cast<py::function>());
+                QPDFObjectHandle h_filter       = objecthandle_encode(filter);
+                QPDFObjectHandle h_decode_parms = objecthandle_encode(decode_parms);
+                h.replaceStreamData(sdp, h_filter, h_decode_parms);
+                invalidate_content_cache(h);
+                if (length) {
+                    // qpdf checks that the provider gives exactly this much data
+                    h.getDict().replaceKey(
+                        "/Length", QPDFObjectHandle::newInteger(*length));
+                }
+            },
+            py::arg("provider"),
+            py::arg("filter"),
+            py::arg("decode_parms"),
+            py::arg("length"))
         .def("_inline_image_raw_bytes",
             [](QPDFObjectHandle &h) { return py::bytes(h.getInlineImageValue()); })
         .def_property_readonly("_objgen", &object_get_objgen)
@@ -787,9 +857,11 @@ void init_object(py::module_ &m)
             "Helper for parsing page contents; use ``pikepdf.parse_content_stream``.")
         .def("_parse_page_contents_grouped",
             [](QPDFObjectHandle &h, std::string const &whitelist) {
-                OperandGrouper og(whitelist);
-                h.parsePageContents(&og);
-                return og.getInstructions();
+                return cached_content(h, whitelist, [&]() {
+                    OperandGrouper og(whitelist);
+                    h.parsePageContents(&og);
+                    return ParsedContent{og.getInstructions(), ""};
+                });
             })
         .def_static("_parse_stream",
             &QPDFObjectHandle::parseContentStream, // LCOV_EXCL_LINE
@@ -797,12 +869,11 @@ void init_object(py::module_ &m)
             "``pikepdf.parse_content_stream``.")
         .def_static("_parse_stream_grouped",
             [](QPDFObjectHandle &h, std::string const &whitelist) {
-                OperandGrouper og(whitelist);
-                QPDFObjectHandle::parseContentStream(h, &og);
-                if (!og.getWarning().empty()) {
-                    python_warning(og.getWarning().c_str());
-                }
-                return og.getInstructions();
+                return cached_content(h, whitelist, [&]() {
+                    OperandGrouper og(whitelist);
+                    QPDFObjectHandle::parseContentStream(h, &og);
+                    return ParsedContent{og.getInstructions(), og.getWarning()};
+                });
             })
         .def(
             "unparse",
@@ -8,6 +8,9 @@
 
 #include "pikepdf.h"
 #include "parsers.h"
+#include "builtin_filters.h"
+#include "content_cache.h"
+#include "placements.h"
 
 #include <qpdf/QPDFPageObjectHelper.hh>
 #include <qpdf/QPDFPageLabelDocumentHelper.hh>
@@ -65,6 +68,17 @@ void init_page(py::module_ &m)
         .def(
             "externalize_inline_images",
             [](QPDFPageObjectHelper &poh, size_t min_size = 0, bool shallow = false) {
+                invalidate_content_cache(poh.getObjectHandle());
+                auto q = poh.getObjectHandle().getOwningQPDF();
+                if (!shallow && q) {
+                    // Form XObjects drawn by the page are rewritten too
+                    poh.forEachFormXObject(true,
+                        [q](QPDFObjectHandle &obj,
+                            QPDFObjectHandle &,
+                            std::string const &) {
+                            invalidate_content_cache(*q, obj.getObjGen());
+                        });
+                }
                 return poh.externalizeInlineImages(min_size, shallow);
             },
             py::arg("min_size") = 0,
@@ -74,11 +88,14 @@ void init_page(py::module_ &m)
             py::arg("angle"),
             py::arg("relative"))
         .def("contents_coalesce",
-            &QPDFPageObjectHelper::coalesceContentStreams // LCOV_EXCL_LINE
-            )
+            [](QPDFPageObjectHelper &poh) {
+                invalidate_content_cache(poh.getObjectHandle());
+                poh.coalesceContentStreams();
+            })
         .def(
             "_contents_add",
             [](QPDFPageObjectHelper &poh, QPDFObjectHandle &contents, bool prepend) {
+                invalidate_content_cache(poh.getObjectHandle());
                 return poh.addPageContents(contents, prepend);
             },
             py::arg("contents"), // LCOV_EXCL_LINE
@@ -94,14 +111,17 @@ void init_page(py::module_ &m)
                     // LCOV_EXCL_STOP
                 }
                 auto stream = QPDFObjectHandle::newStream(q, contents);
+                invalidate_content_cache(poh.getObjectHandle());
                 return poh.addPageContents(stream, prepend);
             },
             py::arg("contents"),
             py::kw_only(),
             py::arg("prepend") = false)
         .def("remove_unreferenced_resources",
-            &QPDFPageObjectHelper::removeUnreferencedResources // LCOV_EXCL_LINE
-            )
+            [](QPDFPageObjectHelper &poh) {
+                poh.removeUnreferencedResources();
+                note_pdf_change();
+            })
         .def("as_form_xobject",
             &QPDFPageObjectHelper::getFormXObjectForPage, // LCOV_EXCL_LINE
             py::arg("handle_transformations") = true)
@@ -133,7 +153,13 @@ void init_page(py::module_ &m)
             [](QPDFPageObjectHelper &poh,
                 QPDFObjectHandle::TokenFilter &tf) -> py::bytes {
                 Pl_Buffer pl_buffer("filter_page");
-                poh.filterContents(&tf, &pl_buffer);
+                if (dynamic_cast<InstructionTokenFilter *>(&tf)) {
+                    // Built-in filters never call Python
+                    PdfGilRelease release(poh.getObjectHandle().getOwningQPDF());
+                    poh.filterContents(&tf, &pl_buffer);
+                } else {
+                    poh.filterContents(&tf, &pl_buffer);
+                }
 
                 // Hold .getBuffer in unique_ptr to ensure it is deleted.
                 // qpdf makes a copy and expects us to delete it.
@@ -157,9 +183,12 @@ void init_page(py::module_ &m)
                 auto pytf   = py::cast(tf);
                 py::detail::keep_alive_impl(pyqpdf, pytf);
 
+                // The filter changes what the content streams contain when read
+                invalidate_content_cache(poh.getObjectHandle());
                 poh.addContentTokenFilter(tf);
             },
             py::arg("tf"))
+        .def("placements", &page_placements)
         .def(
             "parse_contents",
             [](QPDFPageObjectHelper &poh, PyParserCallbacks &stream_parser) {
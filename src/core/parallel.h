@@ -0,0 +1,60 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+// Resolve a requested number of worker threads: 0 means one per CPU.
+inline unsigned int resolve_workers(unsigned int workers)
+{
+    if (workers == 0)
+        workers = std::max(1u, std::thread::hardware_concurrency());
+    return workers;
+}
+
+// Call fn(i) for every i in [0, n), using up to workers threads including the
+// calling thread. Each i is handled exactly once, in no particular order, so fn
+// should write its result to slot i of a preallocated container. If any call
+// throws, the remaining work is abandoned and the first exception is rethrown.
+// fn must not touch Python or qpdf objects shared with other threads.
+template <typename F>
+void parallel_for(size_t n, unsigned int workers, F fn)
+{
+    if (workers <= 1 || n <= 1) {
+        for (size_t i = 0; i < n; ++i)
+            fn(i);
+        return;
+    }
+
+    std::atomic<size_t> next{0};
+    std::exception_ptr error;
+    std::mutex error_mutex;
+    auto run = [&]() {
+        for (size_t i = next++; i < n; i = next++) {
+            try {
+                fn(i);
+            } catch (...) {
+                std::lock_guard<std::mutex> lock(error_mutex);
+                if (!error)
+                    error = std::current_exception();
+                next = n;
+            }
+        }
+    };
+
+    std::vector<std::thread> threads;
+    auto nthreads = std::min<size_t>(workers, n);
+    for (size_t t = 1; t < nthreads; ++t)
+        threads.emplace_back(run);
+    run();
+    for (auto &thread : threads)
+        thread.join();
+    if (error)
+        std::rethrow_exception(error);
+}
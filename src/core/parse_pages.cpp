@@ -0,0 +1,146 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <memory>
+#include <string>
+#include <vector>
+
+#include "pikepdf.h"
+#include "content_columnar.h"
+#include "content_parser.h"
+#include "detached_stream.h"
+#include "parallel.h"
+#include "parsers.h"
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFPageDocumentHelper.hh>
+
+namespace {
+
+// One content stream of a page, either decoded already or left for a worker
+// thread to decode.
+struct ContentPart {
+    std::shared_ptr<Buffer> data;
+    std::unique_ptr<DetachedStream> detached;
+};
+
+// Read the content streams of a page. The caller must hold the Pdf's mutex.
+std::vector<ContentPart> read_page_content(QPDFObjectHandle page, bool detach)
+{
+    auto contents = page.getKey("/Contents");
+    std::vector<QPDFObjectHandle> streams;
+    if (contents.isStream())
+        streams.push_back(contents);
+    else if (contents.isArray())
+        streams = contents.getArrayAsVector();
+
+    std::vector<ContentPart> parts;
+    for (auto &stream : streams) {
+        if (!stream.isStream()) {
+            // Let qpdf deal with unusual /Contents, as parse_content_stream would
+            parts.clear();
+            break;
+        }
+        auto length = stream.getDict().getKey("/Length");
+        if (detach && length.isInteger() &&
+            length.getUIntValue() >= detached_decode_min_bytes &&
+            DetachedStream::can_detach(stream, qpdf_dl_specialized)) {
+            parts.push_back({nullptr, std::make_unique<DetachedStream>(stream)});
+        } else {
+            parts.push_back({get_stream_data(stream, qpdf_dl_specialized), nullptr});
+        }
+    }
+    if (parts.size() != streams.size() || streams.empty()) {
+        parts.clear();
+        parts.push_back({get_content_data(page), nullptr});
+    }
+    return parts;
+}
+
+// Decode and join the content streams of a page, as qpdf does, ending each
+// stream with a newline if it does not already end with one.
+std::shared_ptr<Buffer> join_page_content(
+    std::vector<ContentPart> &parts, std::vector<QPDFExc> &warnings)
+{
+    if (parts.size() == 1 && !parts[0].detached)
+        return parts[0].data;
+
+    std::string joined;
+    bool need_newline = false;
+    for (auto &part : parts) {
+        auto data = part.detached
+                        ? part.detached->decode(qpdf_dl_specialized, warnings)
+                        : part.data;
+        if (need_newline)
+            joined += '\n';
+        if (data->getSize() > 0)
+            joined.append(
+                reinterpret_cast<const char *>(data->getBuffer()), data->getSize());
+        need_newline = data->getSize() == 0 || joined.back() != '\n';
+    }
+    return std::make_shared<Buffer>(std::move(joined));
+}
+
+void report_parse_problems(
+    QPDF &q, std::vector<QPDFExc> const &warnings, std::string const &eof_warning)
+{
+    report_content_warnings(&q, warnings);
+    if (!eof_warning.empty())
+        python_warning(eof_warning.c_str());
+}
+
+} // namespace
+
+py::list parse_pages(
+    QPDF &q, std::string const &operators, bool columnar, unsigned int workers)
+{
+    OperatorWhitelist whitelist(operators);
+    workers = resolve_workers(workers);
+
+    std::vector<InstructionList> instructions;
+    std::vector<ColumnarContent> columns;
+    std::vector<std::vector<ContentPart>> contents;
+    {
+        PdfGilRelease release(&q);
+
+        // Only one thread may read from the Pdf
+        for (auto &page : QPDFPageDocumentHelper(q).getAllPages())
+            contents.push_back(read_page_content(page.getObjectHandle(), workers > 1));
+    }
+
+    // Decoding detached streams, tokenizing and grouping can be done in parallel,
+    // since none of them use the Pdf or Python
+    if (columnar)
+        columns.resize(contents.size());
+    else
+        instructions.resize(contents.size());
+    std::vector<std::vector<QPDFExc>> decode_warnings(contents.size());
+    {
+        py::gil_scoped_release release;
+        parallel_for(contents.size(), workers, [&](size_t i) {
+            auto data = join_page_content(contents[i], decode_warnings[i]);
+            contents[i].clear();
+            if (columnar)
+                columns[i] = parse_columnar(data, whitelist);
+            else
+                instructions[i] = parse_instructions(data, whitelist);
+        });
+    }
+    for (auto &page_warnings : decode_warnings)
+        report_content_warnings(&q, page_warnings);
+
+    py::list result;
+    if (columnar) {
+        for (auto &content : columns) {
+            report_parse_problems(q, content.warnings, content.eof_warning);
+            result.append(columnar_to_python(content));
+        }
+    } else {
+        for (auto &list : instructions) {
+            report_parse_problems(q, list.warnings, list.eof_warning);
+            result.append(instructions_to_python(list));
+        }
+    }
+    return result;
+}
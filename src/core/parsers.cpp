@@ -1,11 +1,19 @@
 // SPDX-FileCopyrightText: 2022 James R. Barlow
 // SPDX-License-Identifier: MPL-2.0
 
+#include <cstring>
+#include <memory>
 #include <sstream>
 #include <locale>
+#include <unordered_map>
 
 #include "pikepdf.h"
 #include "parsers.h"
+#include "content_cache.h"
+#include "content_columnar.h"
+#include "content_parser.h"
+
+extern uint DECIMAL_PRECISION;
 
 void PyParserCallbacks::handleObject(QPDFObjectHandle obj, size_t offset, size_t length)
 {
@@ -121,14 +129,8 @@ std::ostream &operator<<(std::ostream &os, ContentStreamInlineImage &csii)
 }
 
 OperandGrouper::OperandGrouper(const std::string &operators)
-    : parsing_inline_image(false), count(0)
+    : whitelist(operators), parsing_inline_image(false), count(0)
 {
-    std::istringstream f(operators);
-    f.imbue(std::locale::classic());
-    std::string s;
-    while (std::getline(f, s, ' ')) {
-        this->whitelist.insert(s);
-    }
 }
 
 void OperandGrouper::handleObject(QPDFObjectHandle obj)
@@ -139,18 +141,9 @@ void OperandGrouper::handleObject(QPDFObjectHandle obj)
 
         // If we have a whitelist and this operator is not on the whitelist,
         // discard it and all the tokens we collected
-        if (!this->whitelist.empty()) {
-            if (op[0] == 'q' || op[0] == 'Q') {
-                // We have token with multiple stack push/pops
-                if (this->whitelist.count("q") == 0 &&
-                    this->whitelist.count("Q") == 0) {
-                    this->tokens.clear();
-                    return;
-                }
-            } else if (this->whitelist.count(op) == 0) {
-                this->tokens.clear();
-                return;
-            }
+        if (!this->whitelist.allows(op)) {
+            this->tokens.clear();
+            return;
         }
         if (op == "BI") {
             this->parsing_inline_image = true;
@@ -180,44 +173,322 @@ void OperandGrouper::handleEOF()
 }
 
 py::list OperandGrouper::getInstructions() const { return this->instructions; }
+py::list OperandGrouper::takeInstructions()
+{
+    py::list taken     = this->instructions;
+    this->instructions = py::list();
+    return taken;
+}
 std::string OperandGrouper::getWarning() const { return this->warning; }
 
-py::bytes unparse_content_stream(py::iterable contentstream)
+void report_content_warnings(QPDF *owner, std::vector<QPDFExc> const &warnings)
 {
-    uint n = 0;
-    std::ostringstream ss, errmsg;
+    if (warnings.empty())
+        return;
+    // Warnings change the Pdf, so take turns with threads working on it
+    PdfGilRelease release(owner);
+    for (auto &warning : warnings) {
+        if (!owner)
+            throw warning;
+        owner->warn(warning);
+    }
+}
+
+// Parses a content stream as it is iterated, grouping objects into instructions
+// as parse_content_stream does, so that only a few instructions exist at a time.
+// The decoded content stream is read in full when the iterator is created.
+class ContentStreamIterator {
+public:
+    ContentStreamIterator(QPDFObjectHandle h, std::string const &operators)
+        : owner(h.getOwningQPDF()), grouper(operators)
+    {
+        std::shared_ptr<Buffer> data;
+        {
+            PdfGilRelease release(this->owner);
+            data = get_content_data(h);
+        }
+        this->parser = std::make_unique<ContentParser>(data, "content stream");
+        if (this->owner)
+            this->pdf = py::cast(this->owner, py::return_value_policy::reference);
+    }
+
+    py::object next()
+    {
+        while (true) {
+            if (this->index < this->pending.size())
+                return this->pending[this->index++];
+            if (!this->parser)
+                throw py::stop_iteration();
+            this->pending = this->grouper.takeInstructions();
+            this->index   = 0;
+            if (this->pending.size() == 0)
+                this->parse_next();
+        }
+    }
+
+private:
+    void parse_next()
+    {
+        auto obj = this->parser->next();
+        this->report_warnings();
+        if (!obj.isInitialized()) {
+            this->parser.reset();
+            this->grouper.handleEOF();
+            if (!this->grouper.getWarning().empty())
+                python_warning(this->grouper.getWarning().c_str());
+            return;
+        }
+        this->grouper.handleObject(obj);
+    }
+
+    void report_warnings()
+    {
+        auto warnings = std::move(this->parser->warnings);
+        this->parser->warnings.clear();
+        report_content_warnings(this->owner, warnings);
+    }
+
+    QPDF *owner;
+    py::object pdf; // Keeps the owner alive
+    std::unique_ptr<ContentParser> parser;
+    OperandGrouper grouper;
+    py::list pending;
+    size_t index = 0;
+};
+
+template <typename T>
+py::bytearray column_to_bytearray(std::vector<T> const &column)
+{
+    return py::bytearray(reinterpret_cast<const char *>(column.data()),
+        column.size() * sizeof(T));
+}
+
+py::list instructions_to_python(InstructionList const &list)
+{
+    py::list instructions;
+    for (auto &instruction : list.instructions) {
+        if (instruction.is_inline_image)
+            instructions.append(
+                ContentStreamInlineImage(instruction.operands, instruction.op));
+        else
+            instructions.append(
+                ContentStreamInstruction(instruction.operands, instruction.op));
+    }
+    return instructions;
+}
+
+py::tuple columnar_to_python(ColumnarContent const &content)
+{
+    py::dict objects;
+    for (auto &[index, obj] : content.objects)
+        objects[py::int_(index)] = obj;
+    for (auto &image : content.inline_images) {
+        ContentStreamInlineImage csii(image.metadata, image.data);
+        objects[py::int_(image.index)] = csii.get_inline_image();
+    }
+    return py::make_tuple(py::cast(content.operator_names),
+        column_to_bytearray(content.operators),
+        column_to_bytearray(content.operand_offsets),
+        column_to_bytearray(content.numbers),
+        objects);
+}
+
+// Parse a content stream into columns; pikepdf.ColumnarContentStream wraps the
+// result in NumPy arrays.
+py::tuple parse_content_stream_columnar(
+    QPDFObjectHandle h, std::string const &operators)
+{
+    auto owner = h.getOwningQPDF();
+    OperatorWhitelist whitelist(operators);
+    std::shared_ptr<Buffer> data;
+    {
+        PdfGilRelease release(owner);
+        data = get_content_data(h);
+    }
+    ColumnarContent content;
+    {
+        // Parsing does not touch the Pdf, so the GIL can always be released
+        py::gil_scoped_release release;
+        content = parse_columnar(data, whitelist);
+    }
+    report_content_warnings(owner, content.warnings);
+    if (!content.eof_warning.empty())
+        python_warning(content.eof_warning.c_str());
+    return columnar_to_python(content);
+}
+
+template <typename T>
+std::pair<const T *, size_t> column_from_buffer(py::buffer column, const char *name)
+{
+    auto info = column.request();
+    if (info.itemsize != sizeof(T) || info.ndim != 1 ||
+        (info.size > 1 && info.strides[0] != sizeof(T)))
+        throw py::value_error(std::string("columnar content stream: ") + name +
+                              " must be a contiguous one-dimensional array of " +
+                              std::to_string(sizeof(T)) + "-byte items");
+    return {static_cast<const T *>(info.ptr), static_cast<size_t>(info.size)};
+}
+
+py::bytes unparse_content_stream_columnar(std::vector<std::string> operator_names,
+    py::buffer operators,
+    py::buffer operand_offsets,
+    py::buffer numbers,
+    py::dict objects)
+{
+    auto [codes, n_instructions] = column_from_buffer<uint8_t>(operators, "operators");
+    auto [offsets, n_offsets] =
+        column_from_buffer<int64_t>(operand_offsets, "operand_offsets");
+    auto [values, n_values] = column_from_buffer<double>(numbers, "numbers");
+    if (n_offsets != n_instructions + 1)
+        throw py::value_error("columnar content stream: operand_offsets must have "
+                              "one more item than operators");
+
+    std::unordered_map<int64_t, py::object> operand_objects;
+    for (auto item : objects)
+        operand_objects[item.first.cast<int64_t>()] =
+            py::reinterpret_borrow<py::object>(item.second);
+
+    std::ostringstream ss;
     ss.imbue(std::locale::classic());
-    errmsg.imbue(std::locale::classic());
-    const char *delim = "";
-
-    for (const auto &item : contentstream) {
-        // First iteration: print nothing
-        // All others: print "\n" to delimit previous
-        // Result is no leading or trailing delimiter
-        ss << delim;
-        delim = "\n";
-
-        try {
-            auto csi = py::cast<ContentStreamInstruction>(item);
-            ss << csi;
+    for (size_t i = 0; i < n_instructions; ++i) {
+        if (i > 0)
+            ss << "\n";
+        if (codes[i] >= operator_names.size())
+            throw py::value_error("columnar content stream: unknown operator code " +
+                                  std::to_string(codes[i]) + " at instruction " +
+                                  std::to_string(i));
+        auto const &op = operator_names[codes[i]];
+        auto begin     = offsets[i];
+        auto end       = offsets[i + 1];
+        if (begin < 0 || end < begin || static_cast<size_t>(end) > n_values)
+            throw py::value_error(
+                "columnar content stream: invalid operand_offsets at instruction " +
+                std::to_string(i));
+
+        if (op == "INLINE IMAGE") {
+            auto found = operand_objects.find(begin);
+            if (end - begin != 1 || found == operand_objects.end())
+                throw py::value_error("columnar content stream: expected an inline "
+                                      "image at instruction " +
+                                      std::to_string(i));
+            py::bytes unparsed = found->second.attr("unparse")();
+            ss << std::string(unparsed);
             continue;
-        } catch (py::cast_error &) {
         }
+        for (auto j = begin; j < end; ++j) {
+            auto found = operand_objects.find(j);
+            if (found != operand_objects.end())
+                ss << objecthandle_encode(found->second).unparseBinary();
+            else
+                ss << unparse_content_number(values[j], DECIMAL_PRECISION);
+            ss << " ";
+        }
+        ss << QPDFObjectHandle::newOperator(op).unparseBinary();
+    }
+    return py::bytes(ss.str());
+}
 
-        try {
-            auto csii = py::cast<ContentStreamInlineImage>(item);
-            ss << csii;
-            continue;
-        } catch (py::cast_error &) {
+// Bytes reserved per instruction, when the number of instructions is known
+constexpr size_t unparse_reserve_per_instruction = 24;
+
+// Whether a name unparses to itself, without any # escapes
+bool is_plain_name(std::string const &name)
+{
+    for (size_t i = 1; i < name.size(); ++i) {
+        unsigned char ch = name[i];
+        if (ch < 33 || ch > 126 || std::strchr("#()<>[]{}/%", ch) != nullptr)
+            return false;
+    }
+    return true;
+}
+
+// Unparses content stream instructions into a single string, reserved up front.
+// Numbers and names are written directly; other objects are unparsed by qpdf.
+class ContentStreamWriter {
+public:
+    explicit ContentStreamWriter(py::handle contentstream)
+    {
+        auto hint = PyObject_LengthHint(contentstream.ptr(), 0);
+        if (hint < 0)
+            throw py::error_already_set();
+        this->out.reserve(static_cast<size_t>(hint) * unparse_reserve_per_instruction);
+    }
+
+    void write(py::handle item)
+    {
+        // Delimit instructions with "\n", with no leading or trailing delimiter
+        if (this->n > 0)
+            this->out += '\n';
+
+        if (py::isinstance<ContentStreamInstruction>(item)) {
+            auto &csi = item.cast<ContentStreamInstruction &>();
+            for (auto &operand : csi.operands)
+                this->write_operand(operand);
+            this->out += csi.operator_.getOperatorValue();
+        } else if (py::isinstance<ContentStreamInlineImage>(item)) {
+            auto &csii = item.cast<ContentStreamInlineImage &>();
+            this->write_bytes(csii.get_inline_image().attr("unparse")());
+        } else if (py::isinstance<py::bytes>(item)) {
+            // An instruction that was unparsed already
+            this->write_bytes(item);
+        } else {
+            this->write_legacy(item);
+        }
+        this->n++;
+    }
+
+    std::string take() { return std::move(this->out); }
+
+private:
+    void write_bytes(py::handle bytes)
+    {
+        char *buffer;
+        Py_ssize_t length;
+        if (PyBytes_AsStringAndSize(bytes.ptr(), &buffer, &length) < 0)
+            throw py::error_already_set();
+        this->out.append(buffer, static_cast<size_t>(length));
+    }
+
+    void write_operand(QPDFObjectHandle obj)
+    {
+        if (!obj.isIndirect()) {
+            switch (obj.getTypeCode()) {
+            case qpdf_object_type_e::ot_integer:
+                this->out += std::to_string(obj.getIntValue());
+                this->out += ' ';
+                return;
+            case qpdf_object_type_e::ot_real:
+                this->out += obj.getRealValue();
+                this->out += ' ';
+                return;
+            case qpdf_object_type_e::ot_name: {
+                auto name = obj.getName();
+                if (is_plain_name(name)) {
+                    this->out += name;
+                    this->out += ' ';
+                    return;
+                }
+                break;
+            }
+            default:
+                break;
+            }
         }
+        this->out += obj.unparseBinary();
+        this->out += ' ';
+    }
 
-        // Fallback: instruction is some combination of Python iterables.
-        // Destructure and convert to C++ types...
+    // An instruction that is some combination of Python iterables, such as the
+    // (operands, operator) tuples of pikepdf 2.x
+    void write_legacy(py::handle item)
+    {
+        std::ostringstream errmsg;
+        errmsg.imbue(std::locale::classic());
         auto operands_op = py::reinterpret_borrow<py::sequence>(item);
 
         if (operands_op.size() != 2) {
-            errmsg << "Wrong number of operands at content stream instruction " << n
-                   << "; expected 2";
+            errmsg << "Wrong number of operands at content stream instruction "
+                   << this->n << "; expected 2";
             throw py::value_error(errmsg.str());
         }
 
@@ -233,40 +504,95 @@ py::bytes unparse_content_stream(py::iterable contentstream)
         } else {
             op = operator_.cast<QPDFObjectHandle>();
             if (!op.isOperator()) {
-                errmsg << "At content stream instruction " << n
+                errmsg << "At content stream instruction " << this->n
                        << ", the operator is not of type pikepdf.Operator, bytes "
                           "or str";
                 throw py::type_error(errmsg.str());
             }
         }
 
+        auto operands = py::reinterpret_borrow<py::sequence>(operands_op[0]);
         if (op.getOperatorValue() == std::string("INLINE IMAGE")) {
-            auto operands     = py::reinterpret_borrow<py::sequence>(operands_op[0]);
             py::object iimage = operands[0];
             py::handle PdfInlineImage =
                 py::module::import("pikepdf").attr("PdfInlineImage");
             if (!py::isinstance(iimage, PdfInlineImage)) {
-                errmsg << "Expected PdfInlineImage as operand for instruction " << n;
+                errmsg << "Expected PdfInlineImage as operand for instruction "
+                       << this->n;
                 throw py::value_error(errmsg.str());
             }
-            py::bytes iimage_unparsed_bytes = iimage.attr("unparse")();
-            ss << std::string(iimage_unparsed_bytes);
-        } else {
-            auto operands = py::reinterpret_borrow<py::sequence>(operands_op[0]);
-            for (const auto &operand : operands) {
-                QPDFObjectHandle obj = objecthandle_encode(operand);
-                ss << obj.unparseBinary() << " ";
+            this->write_bytes(iimage.attr("unparse")());
+            return;
+        }
+        for (const auto &operand : operands) {
+            if (PyLong_CheckExact(operand.ptr())) {
+                // Plain int, but not bool
+                this->out += std::to_string(operand.cast<long long>());
+                this->out += ' ';
+            } else if (py::isinstance<QPDFObjectHandle>(operand)) {
+                this->write_operand(operand.cast<QPDFObjectHandle &>());
+            } else {
+                this->write_operand(objecthandle_encode(operand));
             }
-            ss << op.unparseBinary();
         }
-
-        n++;
+        this->out += op.getOperatorValue();
     }
-    return py::bytes(ss.str());
+
+    std::string out;
+    uint n = 0;
+};
+
+std::string unparse_instructions(py::iterable contentstream)
+{
+    ContentStreamWriter writer(contentstream);
+    for (const auto &item : contentstream)
+        writer.write(item);
+    return writer.take();
+}
+
+py::bytes unparse_content_stream(py::iterable contentstream)
+{
+    return py::bytes(unparse_instructions(contentstream));
+}
+
+// Replace the data of a stream with unparsed instructions, without creating a
+// bytes object for them
+void write_content_stream(QPDFObjectHandle &h, py::iterable contentstream)
+{
+    if (!h.isStream())
+        throw py::type_error("write_instructions: object is not a stream");
+    auto data = std::make_shared<Buffer>(unparse_instructions(contentstream));
+    h.replaceStreamData(
+        data, QPDFObjectHandle::newNull(), QPDFObjectHandle::newNull());
+    invalidate_content_cache(h);
 }
 
 void init_parsers(py::module_ &m)
 {
+    m.attr("_CONTENT_OPERATORS") = py::cast(standard_content_operators);
+    m.def("_write_content_stream",
+        &write_content_stream,
+        py::arg("stream"),
+        py::arg("instructions"));
+    m.def("_parse_content_stream_columnar",
+        &parse_content_stream_columnar,
+        py::arg("page_or_stream"),
+        py::arg("operators"));
+    m.def("_unparse_content_stream_columnar",
+        &unparse_content_stream_columnar,
+        py::arg("operator_names"),
+        py::arg("operators"),
+        py::arg("operand_offsets"),
+        py::arg("numbers"),
+        py::arg("objects"));
+
+    py::class_<ContentStreamIterator>(m, "_ContentStreamIterator")
+        .def(py::init<QPDFObjectHandle, std::string const &>(),
+            py::arg("page_or_stream"),
+            py::arg("operators"))
+        .def("__iter__", [](py::object self) { return self; })
+        .def("__next__", &ContentStreamIterator::next);
+
     py::class_<ContentStreamInstruction>(m, "ContentStreamInstruction")
         .def(py::init<const ContentStreamInstruction &>())
         .def(py::init<ObjectList, QPDFObjectHandle>())
@@ -6,6 +6,8 @@
 #include <iostream>
 
 #include "pikepdf.h"
+#include "content_parser.h"
+#include "content_columnar.h"
 
 #include <qpdf/QPDFTokenizer.hh>
 
@@ -59,10 +61,12 @@ public:
     void handleEOF() override;
 
     py::list getInstructions() const;
+    // Return the instructions grouped so far, and forget them
+    py::list takeInstructions();
     std::string getWarning() const;
 
 private:
-    std::set<std::string> whitelist;
+    OperatorWhitelist whitelist;
     std::vector<QPDFObjectHandle> tokens;
     bool parsing_inline_image;
     std::vector<QPDFObjectHandle> inline_metadata;
@@ -73,3 +77,17 @@ private:
 
 // unparse the list of instructions generated by an OperandGrouper
 py::bytes unparse_content_stream(py::iterable contentstream);
+
+// Report problems found while parsing content as warnings of the Pdf that owns the
+// content, or raise the first one if there is no such Pdf. Call with the GIL held.
+void report_content_warnings(QPDF *owner, std::vector<QPDFExc> const &warnings);
+
+// Convert instructions parsed without the GIL to the list that
+// parse_content_stream returns
+py::list instructions_to_python(InstructionList const &list);
+
+// Convert a content stream parsed into columns to the tuple that
+// pikepdf.ColumnarContentStream is built from: (operator_names, operators,
+// operand_offsets, numbers, objects), with the three columns as bytearrays of
+// native uint8, int64 and float64 values.
+py::tuple columnar_to_python(ColumnarContent const &content);
@@ -139,13 +139,17 @@ PYBIND11_MODULE(_core, m)
     // -- Support objects (alphabetize order) --
     init_annotation(m);
     init_embeddedfiles(m);
+    init_image_inventory(m);
     init_matrix(m);
     init_nametree(m);
     init_numbertree(m);
     init_page(m);
     init_parsers(m);
+    init_placements(m);
     init_rectangle(m);
+    init_stream_reader(m);
     init_tokenfilter(m);
+    init_builtin_filters(m);
 
     auto m_test = m.def_submodule("_test", "pikepdf._core test functions");
     m_test
@@ -6,7 +6,10 @@
 #include <exception>
 #include <vector>
 #include <map>
+#include <memory>
+#include <mutex>
 
+#include <qpdf/Buffer.hh>
 #include <qpdf/QPDF.hh>
 #include <qpdf/Constants.h>
 #include <qpdf/QPDFObjectHandle.hh>
@@ -115,11 +118,15 @@ PYBIND11_MAKE_OPAQUE(ObjectMap);
 
 // From qpdf.cpp
 void init_qpdf(py::module_ &m);
+std::shared_ptr<std::recursive_mutex> get_pdf_mutex(QPDF &q);
+bool pdf_releases_gil(QPDF &q);
 
 // From object.cpp
 size_t list_range_check(QPDFObjectHandle h, int index);
 void init_object(py::module_ &m);
 bool objecthandle_equal(QPDFObjectHandle self, QPDFObjectHandle other);
+std::shared_ptr<Buffer> get_stream_data(
+    QPDFObjectHandle &h, qpdf_stream_decode_level_e decode_level);
 
 // From object_repr.cpp
 std::string objecthandle_scalar_value(QPDFObjectHandle h);
@@ -135,8 +142,13 @@ std::map<std::string, QPDFObjectHandle> dict_builder(const py::dict dict);
 
 // From annotation.cpp
 void init_annotation(py::module_ &m);
+// From builtin_filters.cpp
+void init_builtin_filters(py::module_ &m);
 // From embeddedfiles.cpp
 void init_embeddedfiles(py::module_ &m);
+// From image_inventory.cpp
+void init_image_inventory(py::module_ &m);
+py::dict image_inventory(QPDF &q);
 // From job.cpp
 void init_job(py::module_ &m);
 // From logger.cpp
@@ -153,8 +165,20 @@ void init_page(py::module_ &m);
 size_t page_index(QPDF &owner, QPDFObjectHandle page);
 // From parsers.cpp
 void init_parsers(py::module_ &m);
+// From parse_pages.cpp
+py::list parse_pages(
+    QPDF &q, std::string const &operators, bool columnar, unsigned int workers);
+// From placements.cpp
+void init_placements(py::module_ &m);
+// From read_streams.cpp
+std::vector<std::shared_ptr<Buffer>> read_streams(QPDF &q,
+    py::iterable streams,
+    qpdf_stream_decode_level_e decode_level,
+    unsigned int workers);
 // From rectangle.cpp
 void init_rectangle(py::module_ &m);
+// From stream_reader.cpp
+void init_stream_reader(py::module_ &m);
 // From tokenfilter.cpp
 void init_tokenfilter(py::module_ &m);
 
@@ -168,6 +192,51 @@ inline void deprecation_warning(const char *msg)
     python_warning(msg, PyExc_DeprecationWarning); // LCOV_EXCL_LINE
 }
 
+// If the Pdf q allows it (Pdf.release_gil), release the GIL and hold the mutex of
+// the Pdf for the lifetime of this object, so that qpdf can work on the Pdf while
+// other Python threads run. Otherwise, do nothing: qpdf's objects are not
+// thread-safe, and only the GIL keeps other threads from using the Pdf while it
+// works. Threads that release the GIL to work on the same Pdf take turns; threads
+// that hold the GIL are not excluded, which is why a Pdf must opt in, and why its
+// user must then not use it from other threads meanwhile. q may be null, for
+// objects whose owner was destroyed; the GIL is then kept.
+//
+// Work that does not touch the Pdf, such as waiting for threads that decode
+// detached streams, should use py::gil_scoped_release instead.
+//
+// Construct with the GIL held. The mutex is locked only after the GIL is released,
+// so a thread waiting for it never blocks Python callbacks (such as reads from a
+// Python stream, or logging) made by the thread that holds it. The mutex is
+// recursive, since those callbacks may in turn use the same Pdf.
+class PdfGilRelease {
+public:
+    explicit PdfGilRelease(QPDF *q)
+    {
+        if (!q || !pdf_releases_gil(*q))
+            return;
+        this->pdf     = py::cast(q, py::return_value_policy::reference);
+        this->mutex   = get_pdf_mutex(*q);
+        this->release = std::make_unique<py::gil_scoped_release>();
+        this->lock    = std::unique_lock<std::recursive_mutex>(*this->mutex);
+    }
+    PdfGilRelease(const PdfGilRelease &)            = delete;
+    PdfGilRelease &operator=(const PdfGilRelease &) = delete;
+    PdfGilRelease(PdfGilRelease &&)                 = delete;
+    PdfGilRelease &operator=(PdfGilRelease &&)      = delete;
+    ~PdfGilRelease()
+    {
+        if (this->lock.owns_lock())
+            this->lock.unlock();
+        this->release.reset();
+    }
+
+private:
+    py::object pdf; // Keeps the Pdf alive while we work without the GIL
+    std::shared_ptr<std::recursive_mutex> mutex;
+    std::unique_ptr<py::gil_scoped_release> release;
+    std::unique_lock<std::recursive_mutex> lock;
+};
+
 // Support for recursion checks
 class StackGuard {
 public:
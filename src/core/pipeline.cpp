@@ -1,6 +1,15 @@
 // SPDX-FileCopyrightText: 2022 James R. Barlow
 // SPDX-License-Identifier: MPL-2.0
 
+#include <algorithm>
+#include <cerrno>
+
+#ifdef _WIN32
+#    include <io.h>
+#else
+#    include <unistd.h>
+#endif
+
 #include <qpdf/Constants.h>
 #include <qpdf/Types.h>
 #include <qpdf/DLL.h>
@@ -17,6 +26,25 @@
 #include "utils.h"
 
 void Pl_PythonOutput::write(const unsigned char *buf, size_t len)
+{
+    if (this->buffer.size() + len > this->buffer_size)
+        this->flush_buffer();
+    if (len >= this->buffer_size) {
+        this->write_stream(buf, len);
+        return;
+    }
+    this->buffer.insert(this->buffer.end(), buf, buf + len);
+}
+
+void Pl_PythonOutput::flush_buffer()
+{
+    if (this->buffer.empty())
+        return;
+    this->write_stream(this->buffer.data(), this->buffer.size());
+    this->buffer.clear();
+}
+
+void Pl_PythonOutput::write_stream(const unsigned char *buf, size_t len)
 {
     py::gil_scoped_acquire gil;
     py::ssize_t so_far = 0;
@@ -42,6 +70,31 @@ void Pl_PythonOutput::write(const unsigned char *buf, size_t len)
 
 void Pl_PythonOutput::finish()
 {
+    this->flush_buffer();
     py::gil_scoped_acquire gil;
     this->stream.attr("flush")();
 }
+
+void Pl_FdOutput::write(const unsigned char *buf, size_t len)
+{
+    while (len > 0) {
+#ifdef _WIN32
+        auto chunk   = static_cast<unsigned int>(std::min<size_t>(len, 1u << 30));
+        auto written = _write(this->fd, buf, chunk);
+#else
+        auto written = ::write(this->fd, buf, len);
+#endif
+        if (written < 0) {
+            if (errno == EINTR)
+                continue;
+            QUtil::throw_system_error(this->identifier);
+        }
+        buf += written;
+        len -= written;
+    }
+}
+
+void Pl_FdOutput::finish()
+{
+    // Nothing is buffered; the owner of the file descriptor flushes and closes it
+}
@@ -5,6 +5,7 @@
 
 #include <cstdio>
 #include <cstring>
+#include <vector>
 
 #include <qpdf/Constants.h>
 #include <qpdf/Types.h>
@@ -20,10 +21,14 @@
 
 #include "pikepdf.h"
 
+// Writes to a Python stream. To avoid acquiring the GIL and calling Python for
+// every small write, writes are coalesced into a buffer of buffer_size bytes that
+// is written to the stream only when full, and on finish(). Writes at least as
+// large as the buffer bypass it. buffer_size=0 writes every chunk immediately.
 class Pl_PythonOutput : public Pipeline {
 public:
-    Pl_PythonOutput(const char *identifier, py::object stream)
-        : Pipeline(identifier, nullptr), stream(stream)
+    Pl_PythonOutput(const char *identifier, py::object stream, size_t buffer_size = 0)
+        : Pipeline(identifier, nullptr), stream(stream), buffer_size(buffer_size)
     {
     }
 
@@ -37,5 +42,31 @@ public:
     void finish() override;
 
 private:
+    void write_stream(const unsigned char *buf, size_t len);
+    void flush_buffer();
+
     py::object stream;
+    size_t buffer_size;
+    std::vector<unsigned char> buffer;
+};
+
+// Writes to a file descriptor, without calling Python, so that it may be used with
+// the GIL released. The file descriptor is not closed.
+class Pl_FdOutput : public Pipeline {
+public:
+    Pl_FdOutput(const char *identifier, int fd) : Pipeline(identifier, nullptr), fd(fd)
+    {
+    }
+
+    virtual ~Pl_FdOutput()                      = default;
+    Pl_FdOutput(const Pl_FdOutput &)            = delete;
+    Pl_FdOutput &operator=(const Pl_FdOutput &) = delete;
+    Pl_FdOutput(Pl_FdOutput &&)                 = delete;
+    Pl_FdOutput &operator=(Pl_FdOutput &&)      = delete;
+
+    void write(const unsigned char *buf, size_t len) override;
+    void finish() override;
+
+private:
+    int fd;
 };
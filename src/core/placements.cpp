@@ -0,0 +1,265 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <map>
+#include <memory>
+#include <mutex>
+#include <set>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "pikepdf.h"
+#include "content_parser.h"
+#include "parsers.h"
+#include "placements.h"
+
+namespace {
+
+// A Do instruction, with the CTM relative to the start of its content stream
+struct XObjectDraw {
+    std::string name;
+    QPDFMatrix ctm;
+};
+using Draws = std::vector<XObjectDraw>;
+
+// Follows q, Q and cm to find the CTM at each Do
+class DrawFinder : public InstructionHandler {
+public:
+    void instruction(QPDFObjectHandle op,
+        std::vector<QPDFObjectHandle> const &operands) override
+    {
+        auto value = op.getOperatorValue();
+        if (value == "q") {
+            this->stack.push_back(this->ctm);
+        } else if (value == "Q") {
+            // Unbalanced Q is ignored, as viewers do
+            if (!this->stack.empty()) {
+                this->ctm = this->stack.back();
+                this->stack.pop_back();
+            }
+        } else if (value == "cm") {
+            if (operands.size() != 6)
+                return;
+            double m[6];
+            for (size_t i = 0; i < 6; ++i) {
+                auto operand = operands[i];
+                if (!operand.getValueAsNumber(m[i]))
+                    return;
+            }
+            this->ctm.concat(QPDFMatrix(m[0], m[1], m[2], m[3], m[4], m[5]));
+        } else if (value == "Do") {
+            if (operands.size() != 1)
+                return;
+            auto name = operands[0];
+            if (name.isName())
+                this->draws.push_back({name.getName(), this->ctm});
+        }
+    }
+    void inline_image(
+        std::vector<QPDFObjectHandle> const &, QPDFObjectHandle) override
+    {
+    }
+
+    Draws draws;
+
+private:
+    QPDFMatrix ctm;
+    std::vector<QPDFMatrix> stack;
+};
+
+const OperatorWhitelist draw_operators("q Q cm Do");
+
+std::shared_ptr<Draws const> find_draws(
+    QPDFObjectHandle h, std::vector<QPDFExc> &warnings)
+{
+    DrawFinder finder;
+    ContentParser parser(get_content_data(h), "content stream");
+    group_content(parser, draw_operators, finder);
+    warnings.insert(warnings.end(), parser.warnings.begin(), parser.warnings.end());
+    return std::make_shared<Draws const>(std::move(finder.draws));
+}
+
+// The XObjects that each form draws, so that a form shared by many pages is
+// only parsed once. Kept on the Pdf, and used without the GIL.
+class FormDrawCache {
+public:
+    std::shared_ptr<Draws const> get(QPDFObjGen og)
+    {
+        std::lock_guard<std::mutex> lock(this->mutex);
+        auto found = this->forms.find(og);
+        return found != this->forms.end() ? found->second : nullptr;
+    }
+    void put(QPDFObjGen og, std::shared_ptr<Draws const> draws)
+    {
+        std::lock_guard<std::mutex> lock(this->mutex);
+        this->forms[og] = std::move(draws);
+    }
+    void forget(QPDFObjGen og)
+    {
+        std::lock_guard<std::mutex> lock(this->mutex);
+        this->forms.erase(og);
+    }
+
+private:
+    std::mutex mutex;
+    std::map<QPDFObjGen, std::shared_ptr<Draws const>> forms;
+};
+
+using cache_ptr = std::shared_ptr<FormDrawCache>;
+
+cache_ptr get_form_draw_cache(QPDF &q, bool create)
+{
+    auto pdf = py::cast(&q, py::return_value_policy::reference);
+    if (py::hasattr(pdf, "_form_draws")) {
+        auto capsule = pdf.attr("_form_draws").cast<py::capsule>();
+        return *capsule.get_pointer<cache_ptr>();
+    }
+    if (!create)
+        return nullptr;
+    auto cache = std::make_shared<FormDrawCache>();
+
+    pdf.attr("_form_draws") = py::capsule(
+        new cache_ptr(cache), [](void *p) { delete static_cast<cache_ptr *>(p); });
+    return cache;
+}
+
+class Placer {
+public:
+    Placer(FormDrawCache &cache, std::vector<QPDFExc> &warnings)
+        : cache(cache), warnings(warnings)
+    {
+    }
+
+    void place(QPDFObjectHandle resources,
+        Draws const &draws,
+        QPDFMatrix const &base,
+        int depth)
+    {
+        auto xobjects = resources.isDictionary() ? resources.getKey("/XObject")
+                                                 : QPDFObjectHandle::newNull();
+        if (!xobjects.isDictionary())
+            return;
+
+        for (auto &draw : draws) {
+            auto xobject = xobjects.getKey(draw.name);
+            if (!xobject.isStream())
+                continue;
+            auto dict    = xobject.getDict();
+            auto subtype = dict.getKey("/Subtype");
+            // The draw's CTM applies first, then the CTM of the drawing stream
+            QPDFMatrix matrix(base);
+            matrix.concat(draw.ctm);
+
+            if (subtype.isNameAndEquals("/Image")) {
+                this->placements.push_back({draw.name,
+                    xobject,
+                    "/Image",
+                    matrix,
+                    matrix.transformRectangle({0, 0, 1, 1}),
+                    depth});
+            } else if (subtype.isNameAndEquals("/Form")) {
+                this->place_form(xobject, draw.name, resources, matrix, depth);
+            }
+        }
+    }
+
+    std::vector<XObjectPlacement> placements;
+
+private:
+    void place_form(QPDFObjectHandle form,
+        std::string const &name,
+        QPDFObjectHandle parent_resources,
+        QPDFMatrix matrix,
+        int depth)
+    {
+        auto dict = form.getDict();
+        if (dict.getKey("/Matrix").isMatrix())
+            matrix.concat(QPDFMatrix(dict.getKey("/Matrix").getArrayAsMatrix()));
+        auto bbox = dict.getKey("/BBox").isRectangle()
+                        ? dict.getKey("/BBox").getArrayAsRectangle()
+                        : QPDFObjectHandle::Rectangle();
+        this->placements.push_back(
+            {name, form, "/Form", matrix, matrix.transformRectangle(bbox), depth});
+
+        // A form that draws itself, directly or not, is drawn once
+        auto og = form.getObjGen();
+        if (!this->active.insert(og).second)
+            return;
+        auto draws = this->cache.get(og);
+        if (!draws) {
+            draws = find_draws(form, this->warnings);
+            this->cache.put(og, draws);
+        }
+        // Old forms without resources use those of whatever draws them
+        auto resources = dict.getKey("/Resources");
+        this->place(resources.isDictionary() ? resources : parent_resources,
+            *draws,
+            matrix,
+            depth + 1);
+        this->active.erase(og);
+    }
+
+    FormDrawCache &cache;
+    std::vector<QPDFExc> &warnings;
+    std::set<QPDFObjGen> active;
+};
+
+} // namespace
+
+py::list page_placements(QPDFPageObjectHelper &page)
+{
+    auto h = page.getObjectHandle();
+    auto q = h.getOwningQPDF();
+    auto cache =
+        q ? get_form_draw_cache(*q, true) : std::make_shared<FormDrawCache>();
+
+    std::vector<QPDFExc> warnings;
+    Placer placer(*cache, warnings);
+    {
+        PdfGilRelease release(q);
+        auto draws = find_draws(h, warnings);
+        placer.place(page.getAttribute("/Resources", false), *draws, QPDFMatrix(), 0);
+    }
+    report_content_warnings(q, warnings);
+
+    py::list result;
+    for (auto &placement : placer.placements)
+        result.append(py::cast(placement));
+    return result;
+}
+
+void forget_form_draws(QPDF &q, QPDFObjGen og)
+{
+    auto cache = get_form_draw_cache(q, false);
+    if (cache)
+        cache->forget(og);
+}
+
+void init_placements(py::module_ &m)
+{
+    py::class_<XObjectPlacement>(m, "XObjectPlacement")
+        .def_property_readonly("name",
+            [](XObjectPlacement &p) { return QPDFObjectHandle::newName(p.name); })
+        .def_property_readonly(
+            "xobject", [](XObjectPlacement &p) { return p.xobject; })
+        .def_property_readonly("objgen",
+            [](XObjectPlacement &p) {
+                auto og = p.xobject.getObjGen();
+                return std::pair<int, int>(og.getObj(), og.getGen());
+            })
+        .def_property_readonly("subtype",
+            [](XObjectPlacement &p) { return QPDFObjectHandle::newName(p.subtype); })
+        .def_readonly("matrix", &XObjectPlacement::matrix)
+        .def_readonly("bbox", &XObjectPlacement::bbox)
+        .def_readonly("depth", &XObjectPlacement::depth)
+        .def("__repr__", [](XObjectPlacement &p) {
+            auto og = p.xobject.getObjGen();
+            return py::str("<pikepdf.XObjectPlacement {} {} {} {} at {}>")
+                .format(p.subtype.substr(1),
+                    p.name,
+                    og.getObj(),
+                    og.getGen(),
+                    py::make_tuple(p.bbox.llx, p.bbox.lly, p.bbox.urx, p.bbox.ury));
+        });
+}
@@ -0,0 +1,33 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <string>
+
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFMatrix.hh>
+#include <qpdf/QPDFObjGen.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+#include <qpdf/QPDFPageObjectHelper.hh>
+
+#include <pybind11/pybind11.h>
+
+namespace py = pybind11;
+
+// Where an image or form XObject is drawn by a page
+struct XObjectPlacement {
+    std::string name;
+    QPDFObjectHandle xobject;
+    std::string subtype;
+    // Maps the XObject's space (the unit square for images) to the page
+    QPDFMatrix matrix;
+    QPDFObjectHandle::Rectangle bbox;
+    // 0 if drawn by the page, 1 if drawn by a form drawn by the page, and so on
+    int depth;
+};
+
+// Find every image and form XObject that a page draws, following forms
+py::list page_placements(QPDFPageObjectHelper &page);
+// Forget what is known about the XObjects that a form draws. Call with the GIL.
+void forget_form_draws(QPDF &q, QPDFObjGen og);
@@ -0,0 +1,152 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <exception>
+#include <iostream>
+#include <string>
+#include <vector>
+
+#include "pikepdf.h"
+#include "parallel.h"
+#include "precompress.h"
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/Pl_Buffer.hh>
+#include <qpdf/Pl_Flate.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+// Read at most this much stream data into memory at once
+constexpr size_t precompress_batch_bytes = 64 * 1024 * 1024;
+
+namespace {
+
+// Streams that QPDFWriter would compress with compress_streams=True: those with no
+// filters, other than XMP metadata, which is left readable.
+bool is_uncompressed(QPDFObjectHandle dict)
+{
+    auto filter = dict.getKey("/Filter");
+    if (filter.isArray() && filter.getArrayNItems() == 0)
+        filter = QPDFObjectHandle::newNull();
+    if (!filter.isNull())
+        return false;
+    return !dict.getKey("/Type").isNameAndEquals("/Metadata");
+}
+
+// Streams that QPDFWriter would recompress with recompress_flate=True: those with
+// a single Flate filter, whatever their parameters, under its full or abbreviated
+// name. They are decoded fully, so predictors are removed, as QPDFWriter does.
+bool is_flate(QPDFObjectHandle dict)
+{
+    auto filter = dict.getKey("/Filter");
+    if (filter.isArray() && filter.getArrayNItems() == 1)
+        filter = filter.getArrayItem(0);
+    return filter.isNameAndEquals("/FlateDecode") || filter.isNameAndEquals("/Fl");
+}
+
+std::string deflate(const Buffer &data)
+{
+    Pl_Buffer output("precompress");
+    Pl_Flate flate("precompress", &output, Pl_Flate::a_deflate);
+    flate.write(data.getBuffer(), data.getSize());
+    flate.finish();
+    return output.getString();
+}
+
+} // namespace
+
+PrecompressedStreams::PrecompressedStreams(
+    QPDF &q, unsigned int workers, bool recompress_flate)
+{
+    workers = resolve_workers(workers);
+
+    std::vector<Original> batch;
+    std::vector<std::shared_ptr<Buffer>> inputs;
+    size_t batch_bytes = 0;
+
+    auto compress_batch = [&]() {
+        if (batch.empty())
+            return;
+        std::vector<std::string> outputs(batch.size());
+        {
+            // Compression is pure C++, so other Python threads may run
+            py::gil_scoped_release release;
+            parallel_for(batch.size(), workers, [&](size_t i) {
+                outputs[i] = deflate(*inputs[i]);
+            });
+        }
+        for (size_t i = 0; i < batch.size(); ++i) {
+            batch[i].stream.replaceStreamData(outputs[i],
+                QPDFObjectHandle::newName("/FlateDecode"),
+                QPDFObjectHandle::newNull());
+            this->replaced.push_back(std::move(batch[i]));
+            outputs[i].clear();
+        }
+        batch.clear();
+        inputs.clear();
+        batch_bytes = 0;
+    };
+
+    try {
+        for (auto &h : q.getAllObjects()) {
+            if (!h.isStream())
+                continue;
+            auto dict = h.getDict();
+            Original original{h, nullptr, {}};
+            std::shared_ptr<Buffer> data;
+            if (is_uncompressed(dict)) {
+                original.raw = h.getRawStreamData();
+                data         = original.raw;
+            } else if (recompress_flate && is_flate(dict)) {
+                try {
+                    data = h.getStreamData(qpdf_dl_generalized);
+                } catch (const std::exception &) {
+                    // Written as it is, as QPDFWriter would
+                    continue;
+                }
+                original.raw = h.getRawStreamData();
+            } else {
+                continue;
+            }
+            for (auto key : {"/Filter", "/DecodeParms", "/Length"})
+                original.keys.emplace_back(key,
+                    dict.hasKey(key) ? dict.getKey(key) : QPDFObjectHandle::newNull());
+
+            batch_bytes += data->getSize();
+            batch.push_back(std::move(original));
+            inputs.push_back(data);
+            if (batch_bytes >= precompress_batch_bytes)
+                compress_batch();
+        }
+        compress_batch();
+    } catch (...) {
+        this->restore();
+        throw;
+    }
+}
+
+PrecompressedStreams::~PrecompressedStreams() { this->restore(); }
+
+void PrecompressedStreams::restore()
+{
+    // Put back the raw data, and the dictionary entries exactly as they were, since
+    // replacing the data also sets /Length and may change indirect entries
+    for (auto &original : this->replaced) {
+        try {
+            original.stream.replaceStreamData(
+                original.raw, QPDFObjectHandle::newNull(), QPDFObjectHandle::newNull());
+            auto dict = original.stream.getDict();
+            for (auto &[key, value] : original.keys) {
+                if (value.isNull())
+                    dict.removeKey(key);
+                else
+                    dict.replaceKey(key, value);
+            }
+        } catch (const std::exception &e) {
+            // LCOV_EXCL_START
+            std::cerr << "Exception in " << __func__ << ": " << e.what();
+            // LCOV_EXCL_STOP
+        }
+    }
+    this->replaced.clear();
+}
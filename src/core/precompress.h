@@ -0,0 +1,39 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#pragma once
+
+#include <memory>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+// Compresses, in parallel, the streams of a Pdf that QPDFWriter would otherwise
+// compress one at a time, and installs the compressed data on those streams until
+// destroyed. The streams' raw data and dictionary entries are then restored, so the
+// Pdf is as it was, without any new objects; it must not be used except to write it
+// meanwhile. The raw data of the streams is held in memory until then, and the
+// streams count as modified afterwards, as if their data had been written again.
+class PrecompressedStreams {
+public:
+    PrecompressedStreams(QPDF &q, unsigned int workers, bool recompress_flate);
+    ~PrecompressedStreams();
+    PrecompressedStreams(const PrecompressedStreams &)            = delete;
+    PrecompressedStreams &operator=(const PrecompressedStreams &) = delete;
+
+private:
+    void restore();
+
+    // A stream whose data was replaced, and what to put back
+    struct Original {
+        QPDFObjectHandle stream;
+        std::shared_ptr<Buffer> raw;
+        // The dictionary entries that replacing the data changes, or null if absent
+        std::vector<std::pair<std::string, QPDFObjectHandle>> keys;
+    };
+    std::vector<Original> replaced;
+};
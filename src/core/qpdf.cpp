@@ -3,10 +3,16 @@
 
 #include <sstream>
 #include <type_traits>
+#include <algorithm>
+#include <map>
+#include <optional>
 #include <cerrno>
+#include <cstdio>
 #include <cstring>
+#include <locale>
 
 #include "pikepdf.h"
+#include "content_cache.h"
 
 #include <qpdf/QPDFExc.hh>
 #include <qpdf/QPDFSystemError.hh>
@@ -25,16 +31,25 @@
 #include <pybind11/iostream.h>
 #include <pybind11/buffer_info.h>
 
+#include "precompress.h"
 #include "qpdf_pagelist.h"
 #include "qpdf_inputsource-inl.h"
 #include "mmap_inputsource-inl.h"
+#include "native_inputsource-inl.h"
+#include "buffer_inputsource-inl.h"
 #include "jbig2-inl.h"
 #include "pipeline.h"
 #include "utils.h"
 
 extern bool MMAP_DEFAULT;
 
-enum access_mode_e { access_default, access_stream, access_mmap, access_mmap_only };
+enum access_mode_e {
+    access_default,
+    access_stream,
+    access_mmap,
+    access_mmap_only,
+    access_native
+};
 
 void qpdf_basic_settings(QPDF &q) // LCOV_EXCL_LINE
 {
@@ -43,7 +58,10 @@ void qpdf_basic_settings(QPDF &q) // LCOV_EXCL_LINE
     q.setLogger(get_pikepdf_logger());
 }
 
-std::shared_ptr<QPDF> open_pdf(py::object stream,
+// Returns the counters of the stream block cache along with the QPDF, if the cache
+// was used, for Pdf.open to keep on the Python Pdf
+std::pair<std::shared_ptr<QPDF>, std::shared_ptr<StreamCacheInfo>> open_pdf(
+    py::object stream,
     std::string password,
     bool hex_password            = false,
     bool ignore_xref_streams     = false,
@@ -52,7 +70,9 @@ std::shared_ptr<QPDF> open_pdf(py::object stream,
     bool inherit_page_attributes = true,
     access_mode_e access_mode    = access_mode_e::access_default,
     std::string description      = "",
-    bool closing_stream          = false)
+    bool closing_stream          = false,
+    size_t stream_block_size     = 64 * 1024,
+    size_t stream_cache_size     = 1024 * 1024)
 {
     auto q = std::make_shared<QPDF>();
 
@@ -62,11 +82,42 @@ std::shared_ptr<QPDF> open_pdf(py::object stream,
     q->setIgnoreXRefStreams(ignore_xref_streams);
     q->setAttemptRecovery(attempt_recovery);
 
+    if (stream_cache_size > 0 && stream_block_size == 0)
+        throw py::value_error("stream_block_size must be positive");
+
+    std::shared_ptr<StreamCacheInfo> cache_info;
     bool success = false;
     if (access_mode == access_default)
         access_mode = MMAP_DEFAULT ? access_mmap : access_stream;
 
-    if (access_mode == access_mmap || access_mode == access_mmap_only) {
+    if (py::isinstance<py::memoryview>(stream)) {
+        // In-memory PDF: read the buffer in place, whatever the access mode
+        auto buffer_input_source =
+            std::make_unique<PythonBufferInputSource>(stream, description);
+        auto input_source =
+            std::shared_ptr<InputSource>(buffer_input_source.release());
+        py::gil_scoped_release release;
+        q->processInputSource(input_source, password.c_str());
+        success = true;
+    } else if (access_mode == access_native) {
+        // stream is either a path encoded as bytes, or a file object with a
+        // file descriptor.
+        std::unique_ptr<NativeFileInputSource> native_input_source;
+        if (py::isinstance<py::bytes>(stream))
+            native_input_source = std::make_unique<NativeFileInputSource>(
+                stream.cast<std::string>(), description);
+        else
+            native_input_source =
+                std::make_unique<NativeFileInputSource>(stream, description);
+        auto input_source =
+            std::shared_ptr<InputSource>(native_input_source.release());
+        py::gil_scoped_release release;
+        q->processInputSource(input_source, password.c_str());
+        success = true;
+    }
+
+    if (!success &&
+        (access_mode == access_mmap || access_mode == access_mmap_only)) {
         try {
             auto mmap_input_source =
                 std::make_unique<MmapInputSource>(stream, description, closing_stream);
@@ -87,8 +138,12 @@ std::shared_ptr<QPDF> open_pdf(py::object stream,
     }
 
     if (!success && access_mode == access_stream) {
-        auto stream_input_source = std::make_unique<PythonStreamInputSource>(
-            stream, description, closing_stream);
+        auto stream_input_source = std::make_unique<PythonStreamInputSource>(stream,
+            description,
+            closing_stream,
+            stream_block_size,
+            stream_cache_size);
+        cache_info        = stream_input_source->getCacheInfo();
         auto input_source = std::shared_ptr<InputSource>(stream_input_source.release());
         py::gil_scoped_release release;
         q->processInputSource(input_source, password.c_str());
@@ -114,7 +169,28 @@ std::shared_ptr<QPDF> open_pdf(py::object stream,
             "A password was provided, but no password was needed to open this PDF.");
     }
 
-    return q;
+    return {q, cache_info};
+}
+
+std::shared_ptr<std::recursive_mutex> get_pdf_mutex(QPDF &q)
+{
+    // Store the mutex on the Python Pdf, so that it lives exactly as long.
+    using mutex_ptr = std::shared_ptr<std::recursive_mutex>;
+    auto pdf        = py::cast(&q, py::return_value_policy::reference);
+    if (py::hasattr(pdf, "_mutex")) {
+        auto capsule = pdf.attr("_mutex").cast<py::capsule>();
+        return *capsule.get_pointer<mutex_ptr>();
+    }
+    auto mutex          = std::make_shared<std::recursive_mutex>();
+    pdf.attr("_mutex") = py::capsule(new mutex_ptr(mutex),
+        [](void *p) { delete static_cast<mutex_ptr *>(p); });
+    return mutex;
+}
+
+bool pdf_releases_gil(QPDF &q)
+{
+    auto pdf = py::cast(&q, py::return_value_policy::reference);
+    return py::getattr(pdf, "_release_gil", py::bool_(false)).cast<bool>();
 }
 
 class PikeProgressReporter : public QPDFWriter::ProgressReporter {
@@ -337,7 +413,10 @@ void save_pdf(QPDF &q,
     py::object encryption                   = py::none(),
     bool samefile_check                     = true,
     bool recompress_flate                   = false,
-    bool deterministic_id                   = false)
+    bool deterministic_id                   = false,
+    size_t output_buffer_size               = 1024 * 1024,
+    bool native_output                      = false,
+    unsigned int workers                    = 1)
 {
     QPDFWriter w(q);
 
@@ -365,8 +444,16 @@ void save_pdf(QPDF &q,
     std::string description = py::repr(stream);
 
     // We must set up the output pipeline before we configure encryption
-    Pl_PythonOutput output_pipe(description.c_str(), stream);
-    w.setOutputPipeline(&output_pipe);
+    std::unique_ptr<Pipeline> output_pipe;
+    if (native_output) {
+        // Write to the stream's file descriptor directly, bypassing Python
+        int fd      = py::cast<int>(stream.attr("fileno")());
+        output_pipe = std::make_unique<Pl_FdOutput>(description.c_str(), fd);
+    } else {
+        output_pipe = std::make_unique<Pl_PythonOutput>(
+            description.c_str(), stream, output_buffer_size);
+    }
+    w.setOutputPipeline(output_pipe.get());
 
     // Possibilities:
     // encryption=True -> preserve existing
@@ -418,7 +505,194 @@ void save_pdf(QPDF &q,
         w.registerProgressReporter(reporter);
     }
 
-    w.write();
+    std::optional<PrecompressedStreams> precompressed;
+    if (workers != 1 && compress_streams && !qdf && stream_decode_level.is_none()) {
+        // Compress streams that QPDFWriter would otherwise compress serially,
+        // for the duration of the write. The Flate streams among them are
+        // compressed already, so QPDFWriter need not recompress them again.
+        precompressed.emplace(q, workers, recompress_flate);
+        w.setRecompressFlate(false);
+    }
+
+    if (native_output) {
+        // Nothing in the output path needs Python, so let other threads run.
+        // Anything that calls back into Python while writing acquires the GIL.
+        PdfGilRelease release(&q);
+        w.write();
+    } else {
+        w.write();
+    }
+}
+
+// Whether an object that existed in the original file has been modified.
+bool object_modified(QPDFObjectHandle current, QPDFObjectHandle original)
+{
+    if (current.isStream() != original.isStream())
+        return true;
+    if (current.isStream()) {
+        if (current.getDict().unparseResolved() != original.getDict().unparseResolved())
+            return true;
+        if (!current.isDataModified())
+            return false;
+        // Data that was replaced, as saving with workers does, may be unchanged
+        auto data     = current.getRawStreamData();
+        auto previous = original.getRawStreamData();
+        return data->getSize() != previous->getSize() ||
+               std::memcmp(data->getBuffer(), previous->getBuffer(), data->getSize()) !=
+                   0;
+    }
+    return current.unparseResolved() != original.unparseResolved();
+}
+
+// Generate an incremental update section for q, to be appended to the file that
+// original was opened from. Objects that are new, or differ from their counterparts
+// in original, are written followed by a cross-reference table and trailer, or by a
+// cross-reference stream if xref_stream is set, since a file whose last section is
+// a stream may be read by software that does not understand tables. offset is the
+// position at which the update will be appended, and prev is the offset of the last
+// cross-reference section of the file, both relative to the file's header as usual.
+// Every object is compared with original, so this takes time in proportion to the
+// number of objects, although it reads and writes only the changes.
+py::bytes incremental_update(QPDF &q,
+    QPDF &original,
+    qpdf_offset_t offset,
+    qpdf_offset_t prev,
+    bool xref_stream)
+{
+    if (q.isEncrypted())
+        throw py::value_error("cannot save an encrypted PDF incrementally");
+
+    auto xref = q.getXRefTable();
+    std::vector<QPDFObjGen> dirty;
+    for (auto const &[og, entry] : xref) {
+        if (entry.getType() == 0)
+            continue; // free
+        if (object_modified(q.getObject(og), original.getObject(og)))
+            dirty.push_back(og);
+    }
+    for (auto &h : q.getAllObjects()) {
+        auto og = h.getObjGen();
+        if (xref.find(og) == xref.end())
+            dirty.push_back(og);
+    }
+    if (dirty.empty()) {
+        if (q.getTrailer().unparseResolved() == original.getTrailer().unparseResolved())
+            return py::bytes(); // Nothing to update
+        // Every xref section needs at least one object; rewrite the catalog.
+        dirty.push_back(q.getRoot().getObjGen());
+    }
+    std::sort(dirty.begin(), dirty.end());
+
+    std::string out;
+    std::map<int, std::pair<qpdf_offset_t, int>> offsets;
+    int max_objid = 0;
+    for (auto const &og : dirty) {
+        auto h               = q.getObject(og);
+        auto position        = offset + static_cast<qpdf_offset_t>(out.size());
+        offsets[og.getObj()] = std::make_pair(position, og.getGen());
+        max_objid            = std::max(max_objid, og.getObj());
+
+        out += std::to_string(og.getObj()) + " " + std::to_string(og.getGen()) +
+               " obj\n";
+        if (h.isStream()) {
+            auto data = h.getRawStreamData();
+            auto dict = h.getDict().shallowCopy();
+            dict.replaceKey("/Length",
+                QPDFObjectHandle::newInteger(static_cast<long long>(data->getSize())));
+            out += dict.unparseResolved();
+            out += "\nstream\n";
+            out.append(
+                reinterpret_cast<const char *>(data->getBuffer()), data->getSize());
+            out += "\nendstream";
+        } else {
+            out += h.unparseResolved();
+        }
+        out += "\nendobj\n";
+    }
+    for (auto const &[og, entry] : xref)
+        max_objid = std::max(max_objid, og.getObj());
+
+    auto trailer = q.getTrailer().shallowCopy();
+    for (auto const &key : {"/Prev",
+             "/XRefStm",
+             "/Type",
+             "/W",
+             "/Index",
+             "/Filter",
+             "/DecodeParms",
+             "/Length"})
+        trailer.removeKey(key);
+
+    int size = 0;
+    if (trailer.getKey("/Size").isInteger())
+        size = trailer.getKey("/Size").getIntValueAsInt();
+    auto xref_offset = offset + static_cast<qpdf_offset_t>(out.size());
+    int xref_objid   = std::max(max_objid + 1, size);
+    if (xref_stream) {
+        // The cross-reference stream lists itself
+        offsets[xref_objid] = std::make_pair(xref_offset, 0);
+        max_objid           = xref_objid;
+    }
+    size = std::max(size, max_objid + 1);
+    trailer.replaceKey("/Size", QPDFObjectHandle::newInteger(size));
+    trailer.replaceKey("/Prev", QPDFObjectHandle::newInteger(prev));
+
+    // One subsection for each run of consecutive object numbers
+    std::vector<std::pair<int, int>> runs;
+    for (auto const &[objid, entry] : offsets) {
+        if (!runs.empty() && runs.back().first + runs.back().second == objid)
+            ++runs.back().second;
+        else
+            runs.emplace_back(objid, 1);
+    }
+
+    if (xref_stream) {
+        // Type 1 entries: the type, the offset, and the generation number
+        int offset_bytes = 1;
+        while (offset_bytes < 8 && (xref_offset >> (8 * offset_bytes)) > 0)
+            ++offset_bytes;
+        std::string entries;
+        for (auto const &[objid, entry] : offsets) {
+            entries += '\x01';
+            for (int i = offset_bytes - 1; i >= 0; --i)
+                entries += static_cast<char>((entry.first >> (8 * i)) & 0xff);
+            entries += static_cast<char>((entry.second >> 8) & 0xff);
+            entries += static_cast<char>(entry.second & 0xff);
+        }
+        auto index = QPDFObjectHandle::newArray();
+        for (auto const &[first, count] : runs) {
+            index.appendItem(QPDFObjectHandle::newInteger(first));
+            index.appendItem(QPDFObjectHandle::newInteger(count));
+        }
+        trailer.replaceKey("/Type", QPDFObjectHandle::newName("/XRef"));
+        trailer.replaceKey("/W",
+            QPDFObjectHandle::newArray({QPDFObjectHandle::newInteger(1),
+                QPDFObjectHandle::newInteger(offset_bytes),
+                QPDFObjectHandle::newInteger(2)}));
+        trailer.replaceKey("/Index", index);
+        trailer.replaceKey("/Length",
+            QPDFObjectHandle::newInteger(static_cast<long long>(entries.size())));
+        out += std::to_string(xref_objid) + " 0 obj\n" + trailer.unparseResolved() +
+               "\nstream\n" + entries + "\nendstream\nendobj\n";
+    } else {
+        out += "xref\n";
+        for (auto const &[first, count] : runs) {
+            out += std::to_string(first) + " " + std::to_string(count) + "\n";
+            for (int objid = first; objid < first + count; ++objid) {
+                auto const &entry = offsets[objid];
+                char line[21];
+                std::snprintf(line,
+                    sizeof(line),
+                    "%010lld %05d n \n",
+                    static_cast<long long>(entry.first),
+                    entry.second);
+                out += line;
+            }
+        }
+        out += "trailer\n" + trailer.unparseResolved() + "\n";
+    }
+    out += "startxref\n" + std::to_string(xref_offset) + "\n%%EOF\n";
+    return py::bytes(out);
 }
 
 void init_qpdf(py::module_ &m)
@@ -447,7 +721,44 @@ void init_qpdf(py::module_ &m)
         .value("default", access_mode_e::access_default)
         .value("stream", access_mode_e::access_stream)
         .value("mmap", access_mode_e::access_mmap)
-        .value("mmap_only", access_mode_e::access_mmap_only);
+        .value("mmap_only", access_mode_e::access_mmap_only)
+        .value("native", access_mode_e::access_native);
+
+    py::class_<StreamCacheInfo, std::shared_ptr<StreamCacheInfo>>(m, "StreamCacheInfo")
+        .def_readonly("block_size", &StreamCacheInfo::block_size)
+        .def_readonly("cache_size", &StreamCacheInfo::cache_size)
+        .def_readonly("hits", &StreamCacheInfo::hits)
+        .def_readonly("misses", &StreamCacheInfo::misses)
+        .def_readonly("evictions", &StreamCacheInfo::evictions)
+        .def("__repr__", [](StreamCacheInfo &info) {
+            std::ostringstream ss;
+            ss.imbue(std::locale::classic());
+            ss << "pikepdf.StreamCacheInfo(block_size=" << info.block_size
+               << ", cache_size=" << info.cache_size << ", hits=" << info.hits
+               << ", misses=" << info.misses << ", evictions=" << info.evictions
+               << ")";
+            return ss.str();
+        });
+
+    py::class_<ContentCacheInfo, std::shared_ptr<ContentCacheInfo>>(
+        m, "ContentCacheInfo")
+        .def_readonly("max_instructions", &ContentCacheInfo::max_instructions)
+        .def_readonly("instructions", &ContentCacheInfo::instructions)
+        .def_readonly("entries", &ContentCacheInfo::entries)
+        .def_readonly("hits", &ContentCacheInfo::hits)
+        .def_readonly("misses", &ContentCacheInfo::misses)
+        .def_readonly("evictions", &ContentCacheInfo::evictions)
+        .def_readonly("invalidations", &ContentCacheInfo::invalidations)
+        .def("__repr__", [](ContentCacheInfo &info) {
+            std::ostringstream ss;
+            ss.imbue(std::locale::classic());
+            ss << "pikepdf.ContentCacheInfo(max_instructions="
+               << info.max_instructions << ", instructions=" << info.instructions
+               << ", entries=" << info.entries << ", hits=" << info.hits
+               << ", misses=" << info.misses << ", evictions=" << info.evictions
+               << ", invalidations=" << info.invalidations << ")";
+            return ss.str();
+        });
 
     py::class_<QPDF, std::shared_ptr<QPDF>>(
         m, "Pdf", "In-memory representation of a PDF", py::dynamic_attr())
@@ -470,7 +781,9 @@ void init_qpdf(py::module_ &m)
             py::arg("inherit_page_attributes") = true,
             py::arg("access_mode")             = access_mode_e::access_default,
             py::arg("description")             = "",
-            py::arg("closing_stream")          = false)
+            py::arg("closing_stream")          = false,
+            py::arg("stream_block_size")       = 64 * 1024,
+            py::arg("stream_cache_size")       = 1024 * 1024)
         .def("__repr__",
             [](QPDF &q) {
                 return std::string("<pikepdf.Pdf description='") + q.getFilename() +
@@ -490,6 +803,13 @@ void init_qpdf(py::module_ &m)
         .def_property_readonly("_pages", &QPDF::getAllPages)
         .def_property_readonly("is_encrypted", &QPDF::isEncrypted)
         .def_property_readonly("is_linearized", &QPDF::isLinearized)
+        .def_property(
+            "release_gil",
+            [](QPDF &q) { return pdf_releases_gil(q); },
+            [](QPDF &q, bool value) {
+                auto pdf = py::cast(&q, py::return_value_policy::reference);
+                py::setattr(pdf, "_release_gil", py::bool_(value));
+            })
         .def(
             "check_linearization",
             [](QPDF &q, py::object stream) {
@@ -510,18 +830,30 @@ void init_qpdf(py::module_ &m)
         .def("show_xref_table",
             &QPDF::showXRefTable,
             py::call_guard<py::scoped_ostream_redirect>())
+        .def("_incremental_update",
+            incremental_update,
+            py::arg("original"),
+            py::arg("offset"),
+            py::arg("prev"),
+            py::arg("xref_stream") = false)
         .def(
             "_add_page",
             [](QPDF &q, QPDFObjectHandle &page, bool first = false) {
                 q.addPage(page, first);
+                note_pdf_change();
             },
             py::arg("page"),
             py::arg("first") = false)
-        .def("_remove_page", &QPDF::removePage)
+        .def("_remove_page",
+            [](QPDF &q, QPDFObjectHandle page) {
+                q.removePage(page);
+                note_pdf_change();
+            })
         .def("remove_unreferenced_resources",
             [](QPDF &q) {
                 QPDFPageDocumentHelper helper(q);
                 helper.removeUnreferencedResources();
+                note_pdf_change();
             })
         .def("_save",
             save_pdf,
@@ -542,7 +874,16 @@ void init_qpdf(py::module_ &m)
             py::arg("encryption")           = py::none(),
             py::arg("samefile_check")       = true,
             py::arg("recompress_flate")     = false,
-            py::arg("deterministic_id")     = false)
+            py::arg("deterministic_id")     = false,
+            py::arg("output_buffer_size")   = 1024 * 1024,
+            py::arg("native_output")        = false,
+            py::arg("workers")              = 1)
+        .def("read_streams",
+            &read_streams,
+            py::arg("streams"),
+            py::kw_only(),
+            py::arg("decode_level") = qpdf_dl_generalized,
+            py::arg("workers")      = 0)
         .def("_get_object_id", &QPDF::getObjectByID)
         .def(
             "get_object",
@@ -579,17 +920,34 @@ void init_qpdf(py::module_ &m)
             })
         .def("_replace_object",
             [](QPDF &q, std::pair<int, int> objgen, QPDFObjectHandle &h) {
+                invalidate_content_cache(q, QPDFObjGen(objgen.first, objgen.second));
                 q.replaceObject(objgen.first, objgen.second, h);
             })
         .def("_swap_objects",
             [](QPDF &q, std::pair<int, int> objgen1, std::pair<int, int> objgen2) {
                 QPDFObjGen o1(objgen1.first, objgen1.second);
                 QPDFObjGen o2(objgen2.first, objgen2.second);
+                invalidate_content_cache(q, o1);
+                invalidate_content_cache(q, o2);
                 q.swapObjects(o1, o2);
             })
+        .def(
+            "enable_content_cache",
+            [](QPDF &q, size_t max_instructions) {
+                if (max_instructions == 0)
+                    throw py::value_error("max_instructions must be positive");
+                set_content_cache(q, max_instructions);
+            },
+            py::arg("max_instructions") = 1000000)
+        .def("disable_content_cache", [](QPDF &q) { set_content_cache(q, 0); })
+        .def("image_inventory", &image_inventory)
         .def(
             "_close",
-            [](QPDF &q) { q.closeInputSource(); },
+            [](QPDF &q) {
+                // Wait for any thread still reading from the input source
+                PdfGilRelease release(&q);
+                q.closeInputSource();
+            },
             "Used to implement Pdf.close().")
         .def("_decode_all_streams_and_discard",
             [](QPDF &q) {
@@ -682,6 +1040,7 @@ void init_qpdf(py::module_ &m)
                 }
 
                 dh.flattenAnnotations(required, forbidden);
+                note_pdf_change();
             },
             py::arg("mode") = "all") // class Pdf
         .def_property_readonly(
@@ -3,6 +3,8 @@
 
 #include <cstdio>
 #include <cstring>
+#include <list>
+#include <unordered_map>
 
 #include <qpdf/Constants.h>
 #include <qpdf/Types.h>
@@ -18,20 +20,38 @@
 #include "pikepdf.h"
 #include "utils.h"
 
+// Counters for the block cache of PythonStreamInputSource. Shared with Python so
+// that Pdf.stream_cache_info can report them for as long as the Pdf is open.
+struct StreamCacheInfo {
+    size_t block_size = 0;
+    size_t cache_size = 0;
+    size_t hits       = 0;
+    size_t misses     = 0;
+    size_t evictions  = 0;
+};
+
 // GIL usage:
 // The GIL must be held while this class is constructed, by the constructor's caller,
 // since Python objects may be created/destroyed in the process of calling the
 // constructor.
 // When opening the PDF, we release the GIL before calling processInputSource
-// and similar, so we have to acquire it before calling back into Python, which we do
-// (oof) on every read or seek. The benefit is it allows us to use native Python
-// streams. Previous versions had a special code path for C based I/O.
-// When Python is manipulating the PDF, generally the GIL is held, but we
-// can release before doing a read, provided the other thread does not mess with
-// our file.
+// and similar, so we have to acquire it before calling back into Python. To keep
+// that rare, we track the current offset ourselves and serve reads from a cache of
+// fixed size blocks, so we only call back into Python on a cache miss. On a miss,
+// we read the missing block plus a read-ahead window that grows while access is
+// sequential, and evict the least recently used blocks to stay within the cache
+// budget. Cached blocks are never revalidated, so this assumes the underlying file
+// does not change while it is open. The benefit is it allows us to use native Python
+// streams. Previous versions had a special code path for C based I/O. When Python is
+// manipulating the PDF, generally the GIL is held, but we can release before doing a
+// read, provided the other thread does not mess with our file.
 class PythonStreamInputSource : public InputSource {
 public:
-    PythonStreamInputSource(const py::object &stream, std::string name, bool close)
+    PythonStreamInputSource(const py::object &stream,
+        std::string name,
+        bool close,
+        size_t block_size = 0,
+        size_t cache_size = 0)
         : name(name), close(close)
     {
         py::gil_scoped_acquire gil; // GIL must be held anyway, issue #295
@@ -40,6 +60,12 @@ public:
             throw py::value_error("not readable");
         if (!this->stream.attr("seekable")().cast<bool>())
             throw py::value_error("not seekable");
+        this->offset = py::cast<qpdf_offset_t>(this->stream.attr("tell")());
+
+        this->info             = std::make_shared<StreamCacheInfo>();
+        this->info->block_size = block_size;
+        this->info->cache_size = cache_size;
+        this->max_blocks       = block_size > 0 ? cache_size / block_size : 0;
     }
     virtual ~PythonStreamInputSource()
     {
@@ -61,16 +87,27 @@ public:
 
     std::string const &getName() const override { return this->name; }
 
-    qpdf_offset_t tell() override
-    {
-        py::gil_scoped_acquire gil;
-        return py::cast<qpdf_offset_t>(this->stream.attr("tell")());
-    }
+    std::shared_ptr<StreamCacheInfo> getCacheInfo() const { return this->info; }
+
+    qpdf_offset_t tell() override { return this->offset; }
 
     void seek(qpdf_offset_t offset, int whence) override
     {
-        py::gil_scoped_acquire gil;
-        this->stream.attr("seek")(offset, whence);
+        switch (whence) {
+        case SEEK_SET:
+            break;
+        case SEEK_CUR:
+            offset += this->offset;
+            break;
+        case SEEK_END:
+            offset += this->size();
+            break;
+        default:
+            throw std::logic_error("invalid argument to seek"); // LCOV_EXCL_LINE
+        }
+        if (offset < 0)
+            throw std::runtime_error(this->name + ": seek before beginning of stream");
+        this->offset = offset;
     }
 
     // LCOV_EXCL_START
@@ -83,34 +120,22 @@ public:
 
     size_t read(char *buffer, size_t length) override
     {
-        py::gil_scoped_acquire gil;
-
-#if defined(PYPY_VERSION)
-        // PyPy does not permit readinto(memoryview), so read to a buffer and
-        // memcpy that buffer. Error message is:
-        // "TypeError: a read-write bytes-like object is required, not memoryview"
-        this->last_offset = this->tell();
-        py::bytes result  = this->stream.attr("read")(length);
-        py::buffer pybuf(result);
-        py::buffer_info info = pybuf.request();
-        size_t bytes_read    = info.size * info.itemsize;
-
-        memcpy(buffer, info.ptr, std::min(length, bytes_read));
-#else
-        auto view_buffer_info = py::memoryview::from_memory(buffer, length);
-        this->last_offset     = this->tell();
-        py::object result     = this->stream.attr("readinto")(view_buffer_info);
-        if (result.is_none())
+        this->last_offset = this->offset;
+        if (length == 0)
             return 0;
-        size_t bytes_read = py::cast<size_t>(result);
-#endif
+
+        size_t bytes_read;
+        if (this->max_blocks == 0 || length >= this->info->cache_size)
+            bytes_read = this->read_stream(this->offset, buffer, length);
+        else
+            bytes_read = this->read_cached(buffer, length);
+
         if (bytes_read == 0) {
-            if (length > 0) {
-                // EOF
-                this->seek(0, SEEK_END);
-                this->last_offset = this->tell();
-            }
+            // EOF
+            this->offset      = this->size();
+            this->last_offset = this->offset;
         }
+        this->offset += bytes_read;
         return bytes_read;
     }
 
@@ -118,8 +143,6 @@ public:
 
     qpdf_offset_t findAndSkipNextEOL() override
     {
-        py::gil_scoped_acquire gil; // Must acquire so another thread cannot seek
-
         qpdf_offset_t result   = 0;
         bool eol_straddles_buf = false;
         char rawbuf[4096];
@@ -155,7 +178,140 @@ public:
     }
 
 private:
+    using Block = std::pair<size_t, std::string>;
+
+    qpdf_offset_t size()
+    {
+        if (this->stream_size < 0) {
+            py::gil_scoped_acquire gil;
+            this->stream.attr("seek")(0, SEEK_END);
+            this->stream_size = py::cast<qpdf_offset_t>(this->stream.attr("tell")());
+        }
+        return this->stream_size;
+    }
+
+    // Read up to length bytes at offset from the Python stream, retrying short
+    // reads, and return the number of bytes read. Only returns less than length
+    // at EOF.
+    size_t read_stream(qpdf_offset_t offset, char *buffer, size_t length)
+    {
+        py::gil_scoped_acquire gil;
+
+        this->stream.attr("seek")(offset, SEEK_SET);
+        size_t total = 0;
+        while (total < length) {
+#if defined(PYPY_VERSION)
+            // PyPy does not permit readinto(memoryview), so read to a buffer and
+            // memcpy that buffer. Error message is:
+            // "TypeError: a read-write bytes-like object is required, not memoryview"
+            py::bytes result = this->stream.attr("read")(length - total);
+            py::buffer pybuf(result);
+            py::buffer_info info = pybuf.request();
+            size_t bytes_read =
+                std::min(length - total, size_t(info.size * info.itemsize));
+
+            memcpy(buffer + total, info.ptr, bytes_read);
+#else
+            auto view_buffer_info =
+                py::memoryview::from_memory(buffer + total, length - total);
+            py::object result = this->stream.attr("readinto")(view_buffer_info);
+            if (result.is_none())
+                break;
+            size_t bytes_read = py::cast<size_t>(result);
+#endif
+            if (bytes_read == 0)
+                break;
+            total += bytes_read;
+        }
+        return total;
+    }
+
+    size_t read_cached(char *buffer, size_t length)
+    {
+        auto block_size = this->info->block_size;
+        size_t total    = 0;
+        while (total < length) {
+            auto pos                 = static_cast<size_t>(this->offset) + total;
+            const std::string &block = this->get_block(pos / block_size);
+            size_t block_offset      = pos % block_size;
+            if (block_offset >= block.size())
+                break; // EOF
+            size_t n = std::min(length - total, block.size() - block_offset);
+            memcpy(buffer + total, block.data() + block_offset, n);
+            total += n;
+            if (block.size() < block_size)
+                break; // Short block is the last block of the stream
+        }
+        return total;
+    }
+
+    // Return the block at block_index, reading it from the Python stream if it is
+    // not cached. The returned reference is valid until the next call.
+    const std::string &get_block(size_t block_index)
+    {
+        auto found = this->index.find(block_index);
+        if (found != this->index.end()) {
+            this->info->hits++;
+            this->lru.splice(this->lru.begin(), this->lru, found->second);
+            return found->second->second;
+        }
+        this->info->misses++;
+
+        // Grow the read-ahead window while misses are sequential, up to half the
+        // cache so that reading ahead never evicts the block we are about to use.
+        size_t max_window = std::max<size_t>(1, this->max_blocks / 2);
+        if (this->last_miss >= 0 &&
+            block_index == static_cast<size_t>(this->last_miss) + 1)
+            this->window = std::min(this->window * 2, max_window);
+        else
+            this->window = 1;
+
+        size_t nblocks = 1;
+        while (nblocks < this->window && !this->index.count(block_index + nblocks))
+            nblocks++;
+        this->last_miss = block_index + nblocks - 1;
+
+        auto block_size = this->info->block_size;
+        std::string data(nblocks * block_size, '\0');
+        size_t bytes_read =
+            this->read_stream(static_cast<qpdf_offset_t>(block_index * block_size),
+                data.data(),
+                data.size());
+        data.resize(bytes_read);
+
+        // Insert the read-ahead blocks in reverse so the requested block ends up
+        // most recently used.
+        for (size_t i = nblocks; i-- > 0;) {
+            size_t start = std::min(i * block_size, data.size());
+            size_t end   = std::min(start + block_size, data.size());
+            if (start == end && i > 0)
+                continue; // Read-ahead past EOF
+            this->insert_block(block_index + i, data.substr(start, end - start));
+        }
+        return this->lru.front().second;
+    }
+
+    void insert_block(size_t block_index, std::string data)
+    {
+        while (this->lru.size() >= this->max_blocks) {
+            this->index.erase(this->lru.back().first);
+            this->lru.pop_back();
+            this->info->evictions++;
+        }
+        this->lru.emplace_front(block_index, std::move(data));
+        this->index[block_index] = this->lru.begin();
+    }
+
     py::object stream;
     std::string name;
     bool close;
+    qpdf_offset_t offset      = 0;
+    qpdf_offset_t stream_size = -1;
+
+    std::shared_ptr<StreamCacheInfo> info;
+    size_t max_blocks = 0;
+    std::list<Block> lru;
+    std::unordered_map<size_t, std::list<Block>::iterator> index;
+    long long last_miss = -1;
+    size_t window       = 1;
 };
@@ -3,6 +3,7 @@
 
 #include "pikepdf.h"
 #include "qpdf_pagelist.h"
+#include "content_cache.h"
 
 #include <qpdf/QPDFPageObjectHelper.hh>
 #include <qpdf/QPDFPageDocumentHelper.hh>
@@ -123,6 +124,7 @@ void PageList::delete_page(py::size_t index)
 {
     auto page = this->get_page(index);
     this->doc.removePage(page);
+    note_pdf_change();
 }
 
 void PageList::delete_pages_from_iterable(py::slice slice)
@@ -134,6 +136,7 @@ void PageList::delete_pages_from_iterable(py::slice slice)
     for (auto page : kill_list) {
         this->doc.removePage(page);
     }
+    note_pdf_change();
 }
 
 py::size_t PageList::count() { return this->doc.getAllPages().size(); }
@@ -196,11 +199,13 @@ void PageList::insert_page(py::size_t index, QPDFPageObjectHelper page)
     } else {
         this->doc.addPage(page, false);
     }
+    note_pdf_change();
 }
 
 void PageList::append_page(QPDFPageObjectHelper page)
 {
     this->doc.addPage(page, false);
+    note_pdf_change();
 }
 
 QPDFPageObjectHelper from_objgen(QPDF &q, QPDFObjGen og)
@@ -317,6 +322,7 @@ void init_pagelist(py::module_ &m)
             [](PageList &pl, QPDFPageObjectHelper &page) {
                 try {
                     pl.doc.removePage(page);
+                    note_pdf_change();
                 } catch (const QPDFExc &) {
                     throw py::value_error("pikepdf.Page is not referenced in the PDF");
                 }
@@ -348,7 +354,19 @@ void init_pagelist(py::module_ &m)
             [](PageList &pl, int obj, int gen) {
                 return from_objgen(*pl.qpdf, QPDFObjGen(obj, gen));
             })
-        .def("from_objgen", [](PageList &pl, std::pair<int, int> objgen) {
-            return from_objgen(*pl.qpdf, QPDFObjGen(objgen.first, objgen.second));
-        });
+        .def("from_objgen",
+            [](PageList &pl, std::pair<int, int> objgen) {
+                return from_objgen(*pl.qpdf, QPDFObjGen(objgen.first, objgen.second));
+            })
+        .def(
+            "_parse_all",
+            [](PageList &pl,
+                std::string const &operators,
+                bool columnar,
+                unsigned int workers) {
+                return parse_pages(*pl.qpdf, operators, columnar, workers);
+            },
+            py::arg("operators"),
+            py::arg("columnar"),
+            py::arg("workers"));
 }
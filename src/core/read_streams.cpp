@@ -0,0 +1,71 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <utility>
+#include <vector>
+
+#include "pikepdf.h"
+#include "detached_stream.h"
+#include "parallel.h"
+#include "parsers.h"
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/QPDF.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+std::vector<std::shared_ptr<Buffer>> read_streams(QPDF &q,
+    py::iterable streams,
+    qpdf_stream_decode_level_e decode_level,
+    unsigned int workers)
+{
+    std::vector<QPDFObjectHandle> handles;
+    for (auto item : streams) {
+        if (!py::isinstance<QPDFObjectHandle>(item))
+            throw py::type_error("read_streams: expected only pikepdf.Stream");
+        auto h = item.cast<QPDFObjectHandle>();
+        if (!h.isStream())
+            throw py::type_error("read_streams: expected only pikepdf.Stream");
+        if (h.getOwningQPDF() != &q)
+            throw py::value_error("read_streams: stream does not belong to this Pdf");
+        handles.push_back(h);
+    }
+    workers = resolve_workers(workers);
+
+    std::vector<std::shared_ptr<Buffer>> results(handles.size());
+    std::vector<std::pair<size_t, DetachedStream>> detached;
+    {
+        PdfGilRelease release(&q);
+
+        // Only one thread may read from the Pdf. Streams that are cheap to decode,
+        // or cannot be decoded apart from the Pdf, are decoded as they are read.
+        for (size_t i = 0; i < handles.size(); ++i) {
+            auto &h     = handles[i];
+            auto length = h.getDict().getKey("/Length");
+            if (workers > 1 && length.isInteger() &&
+                length.getUIntValue() >= detached_decode_min_bytes &&
+                DetachedStream::can_detach(h, decode_level)) {
+                detached.emplace_back(i, DetachedStream(h));
+                continue;
+            }
+            if (decode_level == qpdf_dl_none)
+                results[i] = h.getRawStreamData();
+            else
+                results[i] = get_stream_data(h, decode_level);
+        }
+    }
+
+    // Decoding can be done in parallel, and does not touch the Pdf, so the GIL can
+    // be released whether or not the Pdf allows it
+    std::vector<std::vector<QPDFExc>> warnings(detached.size());
+    {
+        py::gil_scoped_release release;
+        parallel_for(detached.size(), workers, [&](size_t n) {
+            auto &[index, ds] = detached[n];
+            results[index]    = ds.decode(decode_level, warnings[n]);
+            ds.raw.reset();
+        });
+    }
+    for (auto &stream_warnings : warnings)
+        report_content_warnings(&q, stream_warnings);
+    return results;
+}
@@ -0,0 +1,110 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <cerrno>
+#include <cstdio>
+#include <memory>
+#include <string>
+
+#include <qpdf/Pipeline.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+#include <qpdf/QPDFSystemError.hh>
+#include <qpdf/QUtil.hh>
+
+#include <pybind11/pybind11.h>
+
+#include "pikepdf.h"
+
+// Stream data is copied to the pipeline in chunks of this size
+constexpr size_t provider_chunk_size = 1024 * 1024;
+
+// Provides stream data by reading a file whenever the data is needed, usually
+// while saving. Never needs the GIL.
+class FileStreamDataProvider : public QPDFObjectHandle::StreamDataProvider {
+public:
+    // path is encoded as by os.fsencode()
+    explicit FileStreamDataProvider(const std::string &path) : path(path) {}
+    virtual ~FileStreamDataProvider() = default;
+
+    void provideStreamData(QPDFObjGen const &og, Pipeline *pipeline) override
+    {
+        // safe_fopen throws QPDFSystemError on failure
+        std::unique_ptr<FILE, decltype(&fclose)> file(
+            QUtil::safe_fopen(this->path.c_str(), "rb"), &fclose);
+        std::unique_ptr<unsigned char[]> buffer(
+            new unsigned char[provider_chunk_size]);
+        while (true) {
+            auto len = fread(buffer.get(), 1, provider_chunk_size, file.get());
+            if (len > 0)
+                pipeline->write(buffer.get(), len);
+            if (len < provider_chunk_size) {
+                if (ferror(file.get()))
+                    throw QPDFSystemError(this->path, errno);
+                break;
+            }
+        }
+        pipeline->finish();
+    }
+
+private:
+    std::string path;
+};
+
+// Provides stream data by calling a Python function whenever the data is needed,
+// usually while saving. The function returns an iterable of objects that support
+// the buffer protocol, whose contents are the data.
+//
+// GIL usage:
+// qpdf may ask for the data with or without the GIL held, so we acquire it to call
+// Python. If the GIL was not held when we were called, the caller holds the Pdf's
+// mutex instead, so it is safe to release the GIL again while each chunk is written
+// to the pipeline, which may compress it or write it to a file. Otherwise we must
+// keep the GIL, since other threads could then use the Pdf.
+class PythonStreamDataProvider : public QPDFObjectHandle::StreamDataProvider {
+public:
+    explicit PythonStreamDataProvider(py::function factory) : factory(factory) {}
+    virtual ~PythonStreamDataProvider()
+    {
+        // qpdf may drop the last reference to us without the GIL
+        py::gil_scoped_acquire gil;
+        this->factory = py::function();
+    }
+    PythonStreamDataProvider(const PythonStreamDataProvider &)            = delete;
+    PythonStreamDataProvider &operator=(const PythonStreamDataProvider &) = delete;
+    PythonStreamDataProvider(PythonStreamDataProvider &&)                 = delete;
+    PythonStreamDataProvider &operator=(PythonStreamDataProvider &&)      = delete;
+
+    void provideStreamData(QPDFObjGen const &og, Pipeline *pipeline) override
+    {
+        bool had_gil = PyGILState_Check();
+        py::gil_scoped_acquire gil;
+        py::object chunks = this->factory();
+        if (py::isinstance<py::buffer>(chunks))
+            throw py::type_error(
+                "write_lazy: the provider function must return an iterable of "
+                "bytes-like objects, not a single bytes-like object");
+        for (auto chunk : chunks) {
+            if (!py::isinstance<py::buffer>(chunk))
+                throw py::type_error(
+                    "write_lazy: the provider function yielded an object that is "
+                    "not bytes-like");
+            auto info = py::reinterpret_borrow<py::buffer>(chunk).request();
+            if (!PyBuffer_IsContiguous(info.view(), 'C'))
+                throw py::value_error(
+                    "write_lazy: the provider function yielded a non-contiguous "
+                    "buffer");
+            auto data = static_cast<unsigned char *>(info.ptr);
+            auto len  = static_cast<size_t>(info.size * info.itemsize);
+            if (had_gil) {
+                pipeline->write(data, len);
+            } else {
+                py::gil_scoped_release release;
+                pipeline->write(data, len);
+            }
+        }
+        pipeline->finish();
+    }
+
+private:
+    py::function factory;
+};
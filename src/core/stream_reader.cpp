@@ -0,0 +1,202 @@
+// SPDX-FileCopyrightText: 2022 James R. Barlow
+// SPDX-License-Identifier: MPL-2.0
+
+#include <algorithm>
+#include <condition_variable>
+#include <cstring>
+#include <deque>
+#include <exception>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "pikepdf.h"
+#include "detached_stream.h"
+#include "parsers.h"
+
+#include <qpdf/Buffer.hh>
+#include <qpdf/Pipeline.hh>
+#include <qpdf/QPDFObjectHandle.hh>
+
+// At most this much decoded data is held, waiting to be read
+constexpr size_t reader_queue_bytes = 1024 * 1024;
+
+namespace {
+
+// Thrown into the decoder when the reader is closed early, to stop it.
+struct ReaderClosed : std::exception {};
+
+// Chunks of decoded data passed from the decoding thread to the reader.
+struct ReaderQueue {
+    std::mutex mutex;
+    std::condition_variable changed;
+    std::deque<std::shared_ptr<Buffer>> chunks;
+    size_t front_offset = 0; // Bytes of chunks.front() already read
+    size_t bytes        = 0; // Bytes in chunks, not yet read
+    bool done           = false;
+    bool closed         = false;
+    std::exception_ptr error;
+    std::vector<QPDFExc> warnings; // Set when done
+};
+
+// Hands written data to the reader, waiting while too much is queued.
+class Pl_ReaderQueue : public Pipeline {
+public:
+    Pl_ReaderQueue(const char *identifier, ReaderQueue &queue)
+        : Pipeline(identifier, nullptr), queue(queue)
+    {
+    }
+
+    void write(const unsigned char *buf, size_t len) override
+    {
+        if (len == 0)
+            return;
+        std::unique_lock<std::mutex> lock(this->queue.mutex);
+        this->queue.changed.wait(lock, [this] {
+            return this->queue.closed || this->queue.bytes < reader_queue_bytes;
+        });
+        if (this->queue.closed)
+            throw ReaderClosed();
+        auto chunk = std::make_shared<Buffer>(len);
+        std::memcpy(chunk->getBuffer(), buf, len);
+        this->queue.chunks.push_back(chunk);
+        this->queue.bytes += len;
+        this->queue.changed.notify_all();
+    }
+    void finish() override {}
+
+private:
+    ReaderQueue &queue;
+};
+
+} // namespace
+
+// Reads the decoded data of a stream incrementally, so that large streams can be
+// processed without holding all of their decoded data in memory. The raw data is
+// read in full when the reader is created. If the stream can be decoded apart from
+// its Pdf, a thread decodes it as the data is read; otherwise it is decoded in full
+// up front, and read from qpdf's buffer in place.
+class StreamReader {
+public:
+    StreamReader(QPDFObjectHandle h, qpdf_stream_decode_level_e decode_level)
+        : owner(h.getOwningQPDF())
+    {
+        if (!h.isStream())
+            throw py::type_error("open() called on object that is not a stream");
+        PdfGilRelease release(this->owner);
+
+        if (DetachedStream::can_detach(h, decode_level)) {
+            auto detached  = std::make_shared<DetachedStream>(h);
+            this->decoder  = std::thread([this, detached, decode_level]() {
+                Pl_ReaderQueue sink("stream reader", this->queue);
+                std::exception_ptr error;
+                std::vector<QPDFExc> warnings;
+                try {
+                    detached->pipe(&sink, decode_level, warnings);
+                } catch (const ReaderClosed &) {
+                } catch (...) {
+                    error = std::current_exception();
+                }
+                std::lock_guard<std::mutex> lock(this->queue.mutex);
+                this->queue.error    = error;
+                this->queue.warnings = std::move(warnings);
+                this->queue.done     = true;
+                this->queue.changed.notify_all();
+            });
+            return;
+        }
+
+        std::shared_ptr<Buffer> data;
+        if (decode_level == qpdf_dl_none)
+            data = h.getRawStreamData();
+        else
+            data = get_stream_data(h, decode_level);
+        this->queue.bytes = data->getSize();
+        if (this->queue.bytes > 0)
+            this->queue.chunks.push_back(data);
+        this->queue.done = true;
+    }
+    ~StreamReader() { this->close(); }
+    StreamReader(const StreamReader &)            = delete;
+    StreamReader &operator=(const StreamReader &) = delete;
+    StreamReader(StreamReader &&)                 = delete;
+    StreamReader &operator=(StreamReader &&)      = delete;
+
+    // Read up to the size of b into b, returning the number of bytes read, or 0
+    // at the end of the stream.
+    size_t readinto(py::buffer b)
+    {
+        auto info = b.request(true);
+        auto size = static_cast<size_t>(info.size * info.itemsize);
+        auto dest = static_cast<char *>(info.ptr);
+        if (size == 0)
+            return 0;
+
+        size_t copied = 0;
+        std::exception_ptr error;
+        std::vector<QPDFExc> warnings;
+        {
+            py::gil_scoped_release release;
+            std::unique_lock<std::mutex> lock(this->queue.mutex);
+            if (this->queue.closed)
+                throw py::value_error("I/O operation on closed stream reader");
+            this->queue.changed.wait(
+                lock, [this] { return this->queue.bytes > 0 || this->queue.done; });
+            // Decoding warnings are reported once, as soon as decoding is done
+            warnings.swap(this->queue.warnings);
+            if (this->queue.bytes == 0)
+                error = this->queue.error;
+
+            while (copied < size && !this->queue.chunks.empty()) {
+                auto &front = this->queue.chunks.front();
+                auto offset = this->queue.front_offset;
+                auto n      = std::min(size - copied, front->getSize() - offset);
+                std::memcpy(dest + copied, front->getBuffer() + offset, n);
+                copied += n;
+                this->queue.front_offset += n;
+                if (this->queue.front_offset == front->getSize()) {
+                    this->queue.chunks.pop_front();
+                    this->queue.front_offset = 0;
+                }
+            }
+            this->queue.bytes -= copied;
+            this->queue.changed.notify_all();
+        }
+        report_content_warnings(this->owner, warnings);
+        if (error)
+            std::rethrow_exception(error);
+        return copied;
+    }
+
+    // Stop decoding and discard any data not read yet.
+    void close()
+    {
+        py::gil_scoped_release release;
+        {
+            std::lock_guard<std::mutex> lock(this->queue.mutex);
+            this->queue.closed = true;
+            this->queue.chunks.clear();
+            this->queue.bytes = 0;
+            this->queue.changed.notify_all();
+        }
+        if (this->decoder.joinable())
+            this->decoder.join();
+    }
+
+private:
+    QPDF *owner;
+    ReaderQueue queue;
+    std::thread decoder;
+};
+
+void init_stream_reader(py::module_ &m)
+{
+    py::class_<StreamReader>(m, "_StreamReader")
+        .def(py::init<QPDFObjectHandle, qpdf_stream_decode_level_e>(),
+            py::arg("stream"),
+            py::arg("decode_level") = qpdf_dl_generalized)
+        .def("readinto", &StreamReader::readinto, py::arg("b"))
+        .def("close", &StreamReader::close);
+}
@@ -5,6 +5,7 @@
 #include <iostream>
 #include <iomanip>
 #include <cctype>
+#include <vector>
 
 #include "pikepdf.h"
 
@@ -19,6 +20,8 @@ public:
 
     void handleToken(Token const &token) override
     {
+        // May be called with the GIL released, such as while saving
+        py::gil_scoped_acquire gil;
         py::object result = this->handle_token(token);
         if (result.is_none())
             return;
@@ -51,6 +54,75 @@ public:
     }
 };
 
+// Like TokenFilter, but passes tokens to Python in batches, to call Python less
+// often. A batch always ends with an operator, or the end of the content, so an
+// instruction is never split between batches. An inline image (BI ... ID ... EI)
+// counts as one instruction.
+class BatchTokenFilter : public QPDFObjectHandle::TokenFilter {
+public:
+    using Token = QPDFTokenizer::Token;
+
+    explicit BatchTokenFilter(size_t batch_size) : batch_size(batch_size)
+    {
+        if (batch_size == 0)
+            throw py::value_error("batch_size must be at least 1");
+    }
+    virtual ~BatchTokenFilter() = default;
+
+    void handleToken(Token const &token) override
+    {
+        this->pending.push_back(token);
+        auto type = token.getType();
+        if (type == QPDFTokenizer::tt_eof) {
+            this->flush();
+        } else if (type == QPDFTokenizer::tt_word &&
+                   this->pending.size() >= this->batch_size) {
+            auto const &op = token.getValue();
+            if (op != "BI" && op != "ID")
+                this->flush();
+        }
+    }
+
+    virtual py::object handle_tokens(py::list tokens) = 0;
+
+    size_t batch_size;
+
+private:
+    void flush()
+    {
+        // May be called with the GIL released, such as while saving
+        py::gil_scoped_acquire gil;
+        py::list tokens;
+        for (auto &token : this->pending)
+            tokens.append(py::cast(token));
+        this->pending.clear();
+
+        py::object result = this->handle_tokens(tokens);
+        if (result.is_none())
+            return;
+        try {
+            for (auto item : result) {
+                const auto returned_token = item.cast<Token>();
+                this->writeToken(returned_token);
+            }
+        } catch (const py::cast_error &) {
+            throw py::type_error("returned object that is not a token");
+        }
+    }
+
+    std::vector<Token> pending;
+};
+
+class BatchTokenFilterTrampoline : public BatchTokenFilter {
+public:
+    using BatchTokenFilter::BatchTokenFilter;
+
+    py::object handle_tokens(py::list tokens) override
+    {
+        PYBIND11_OVERRIDE_PURE(py::object, BatchTokenFilter, handle_tokens, tokens);
+    }
+};
+
 void init_tokenfilter(py::module_ &m)
 {
     py::enum_<QPDFTokenizer::token_type_e>(m, "TokenType")
@@ -92,4 +164,11 @@ void init_tokenfilter(py::module_ &m)
         .def("handle_token",
             &TokenFilter::handle_token,
             py::arg_v("token", QPDFTokenizer::Token(), "pikepdf.Token()"));
+
+    py::class_<BatchTokenFilter,
+        BatchTokenFilterTrampoline,
+        std::shared_ptr<BatchTokenFilter>>(m, "BatchTokenFilter", qpdftokenfilter)
+        .def(py::init<size_t>(), py::kw_only(), py::arg("batch_size") = 1)
+        .def("handle_tokens", &BatchTokenFilter::handle_tokens, py::arg("tokens"))
+        .def_readonly("batch_size", &BatchTokenFilter::batch_size);
 }
@@ -19,6 +19,7 @@ from pikepdf._core import (
     AccessMode,
     Annotation,
     AttachedFileSpec,
+    BatchTokenFilter,
     ContentStreamInlineImage,
     ContentStreamInstruction,
     DataDecodingError,
@@ -53,6 +54,7 @@ from pikepdf.objects import (
     String,
 )
 from pikepdf.models import (
+    ColumnarContentStream,
     Encryption,
     Outline,
     OutlineItem,
@@ -63,6 +65,7 @@ from pikepdf.models import (
     Permissions,
     UnsupportedImageTypeError,
     make_page_destination,
+    iter_content_stream,
     parse_content_stream,
     unparse_content_stream,
 )
@@ -73,7 +76,7 @@ from pikepdf.models import (
 # importing helps introspection tools like PyInstaller figure out that the module
 # is necessary.
 from pikepdf import _cpphelpers, _methods, codec  # noqa: F401, F841
-from pikepdf import settings
+from pikepdf import filters, settings  # noqa: F401
 
 __libqpdf_version__: str = _core.qpdf_version()
 
@@ -91,6 +94,7 @@ __all__ = [
     'AccessMode',
     'Annotation',
     'AttachedFileSpec',
+    'BatchTokenFilter',
     'ContentStreamInlineImage',
     'ContentStreamInstruction',
     'DataDecodingError',
@@ -122,6 +126,7 @@ __all__ = [
     'Stream',
     'String',
     'models',
+    'ColumnarContentStream',
     'Encryption',
     'Outline',
     'OutlineItem',
@@ -132,6 +137,7 @@ __all__ = [
     'Permissions',
     'UnsupportedImageTypeError',
     'make_page_destination',
+    'iter_content_stream',
     'parse_content_stream',
     'unparse_content_stream',
     'settings',
@@ -8,6 +8,7 @@ from __future__ import annotations
 # pikepdf/_methods.py. Thus, we need to manually spell out the resulting types
 # after augmenting.
 import datetime
+import os
 from abc import abstractmethod
 from collections.abc import (
     Collection,
@@ -35,6 +36,12 @@ from typing import (
 if TYPE_CHECKING:
     import numpy as np
 
+    from pikepdf._io import StreamReader
+    from pikepdf.models._content_stream import (
+        ColumnarContentStream,
+        ContentStreamInstructions,
+        UnparseableContentStreamInstructions,
+    )
     from pikepdf.models.encryption import Encryption, EncryptionInfo, Permissions
     from pikepdf.models.image import PdfInlineImage
     from pikepdf.models.metadata import PdfMetadata
@@ -56,6 +63,13 @@ Numeric = TypeVar('Numeric', int, float, Decimal)
 class Buffer:
     """A Buffer for reading data from a PDF."""
 
+class _StreamReader:
+    def __init__(
+        self, stream: Object, decode_level: StreamDecodeLevel = ...
+    ) -> None: ...
+    def readinto(self, b: Any) -> int: ...
+    def close(self) -> None: ...
+
 # Exceptions
 
 class DataDecodingError(Exception):
@@ -91,6 +105,7 @@ class AccessMode(Enum):
     default: int = ...
     mmap: int = ...
     mmap_only: int = ...
+    native: int = ...
     stream: int = ...
 
 class EncryptionMethod(Enum):
@@ -347,9 +362,54 @@ class Object:
     def parse(stream: bytes, description: str = ...) -> Object:
         """Parse PDF binary representation into PDF objects."""
     def read_bytes(self, decode_level: StreamDecodeLevel = ...) -> bytes:
-        """Decode and read the content stream associated with this object."""
+        """Decode and read the content stream associated with this object.
+
+        .. versionchanged:: 9.5
+            If the PDF allows it (:attr:`Pdf.release_gil`), the GIL is released
+            while decoding, so threads that read streams of different PDFs can run
+            in parallel. Reads of the same PDF are serialized.
+        """
     def read_raw_bytes(self) -> bytes:
-        """Read the content stream associated with a Stream, without decoding."""
+        """Read the content stream associated with a Stream, without decoding.
+
+        .. versionchanged:: 9.5
+            If the PDF allows it (:attr:`Pdf.release_gil`), the GIL is released
+            while reading.
+        """
+    def open(self, decode_level: StreamDecodeLevel = ...) -> StreamReader:
+        """Open the stream's data for reading as a binary file object.
+
+        Unlike :meth:`read_bytes`, the decoded data is usually not held in memory
+        all at once, so this is suited to passing large streams to other code
+        that reads files, such as :func:`shutil.copyfileobj` or a hash function.
+        The raw (encoded) data is always read from the PDF in full when the
+        stream is opened, and held until the file is closed. If the stream's
+        filters allow, its data is then decoded in a background thread as it is
+        read; otherwise it is decoded in full when opened.
+
+        The file should be closed when no longer needed, or used as a context
+        manager.
+
+        Examples:
+            >>> with stream.open() as f, open('out.bin', 'wb') as out:  # doctest: +SKIP
+            ...     shutil.copyfileobj(f, out)
+
+        Args:
+            decode_level: How far to decode the stream, as for
+                :meth:`read_bytes`.
+
+        .. versionadded:: 9.5
+        """
+    async def read_bytes_async(self, decode_level: StreamDecodeLevel = ...) -> bytes:
+        """Decode and read the stream without blocking the asyncio event loop.
+
+        .. versionadded:: 9.5
+        """
+    async def read_raw_bytes_async(self) -> bytes:
+        """Read the stream without decoding or blocking the asyncio event loop.
+
+        .. versionadded:: 9.5
+        """
     def same_owner_as(self, other: Object) -> bool:
         """Test if two objects are owned by the same :class:`pikepdf.Pdf`."""
     def to_json(self, dereference: bool = ..., schema_version: int = ...) -> bytes:
@@ -458,6 +518,77 @@ class Object:
         `decode_parms` is an Array of Dictionary, where each array index
         is corresponds to the filter.
         """
+    def write_lazy(
+        self,
+        provider: str | os.PathLike | bytes | Callable[[], Iterable[bytes]],
+        *,
+        filter: Name | Array | list[Name] | None = ...,  # pylint: disable=redefined-builtin
+        decode_parms: Dictionary | Array | None = ...,
+        length_hint: int | None = ...,
+        type_check: bool = ...,
+    ) -> None:
+        """Replace stream object's data with data that is provided on demand.
+
+        Like :meth:`write`, but the data is not copied into memory. Instead,
+        it is requested from `provider` whenever it is needed, usually while
+        :meth:`pikepdf.Pdf.save` writes this object, and then copied to the output
+        piece by piece. This makes it possible to add very large streams without
+        holding their data in memory.
+
+        `provider` may be:
+
+        * a path to a file (``str`` or :class:`os.PathLike`), which is read
+          when the data is needed, so it must still exist then;
+        * a bytes-like object, such as ``bytes``, :class:`mmap.mmap` or
+          :class:`memoryview`, whose contents are not copied;
+        * a function, called with no arguments, that returns an iterable of
+          bytes-like objects, such as a generator function.
+
+        The data may be needed more than once, for example when saving with
+        linearization or when the stream is also read with :meth:`read_bytes`.
+        For that reason, a generator or other iterator object is not accepted;
+        pass the function that creates it instead.
+
+        Args:
+            provider: the source of the new data
+            filter: The filter(s) with which the
+                data is (already) encoded
+            decode_parms: Parameters for the
+                filters with which the object is encode
+            length_hint: The length of the data, if known. It is stored as
+                the stream's ``/Length``, and qpdf reports an error if the
+                provider does not produce exactly that many bytes.
+            type_check: Check arguments; use False only if you want to
+                intentionally create malformed PDFs.
+
+        Functions are called with the GIL held. Errors they raise, or errors
+        reading the file, are raised by the operation that needed the data.
+
+        .. versionadded:: 9.5
+        """
+    def write_instructions(
+        self,
+        instructions: Iterable[UnparseableContentStreamInstructions | bytes]
+        | ColumnarContentStream,
+    ) -> None:
+        """Replace stream object's data with unparsed content stream instructions.
+
+        Equivalent to ``stream.write(pikepdf.unparse_content_stream(instructions))``,
+        but the instructions are unparsed directly into the stream's new data,
+        without creating an intermediate ``bytes`` object. Any filters are
+        removed, as for :meth:`write` without a filter.
+
+        Args:
+            instructions: Instructions as accepted by
+                :func:`pikepdf.unparse_content_stream`, including a generator.
+
+        Raises:
+            TypeError: If this object is not a stream.
+            pikepdf.PdfParsingError: If an instruction cannot be unparsed. The
+                stream is not changed.
+
+        .. versionadded:: 9.5
+        """
     def __bool__(self) -> bool: ...
     def __bytes__(self) -> bytes: ...
     def __contains__(self, obj: Object | str) -> bool: ...
@@ -682,6 +813,38 @@ class AttachedFile:
     @property
     def obj(self) -> Object: ...
     def read_bytes(self) -> bytes: ...
+    def open(self) -> StreamReader:
+        """Open the attached file for reading, without decoding it all into memory.
+
+        The file's compressed data is read in full when it is opened, as for
+        :meth:`pikepdf.Stream.open`.
+
+        .. versionadded:: 9.5
+        """
+    def extract_to(
+        self, target: Path | str | BinaryIO, *, verify: bool = True
+    ) -> bytes:
+        """Copy the attached file to a file path or writable binary file object.
+
+        The file is copied in pieces, so it need not fit in memory. Its MD5
+        checksum is computed while copying.
+
+        Args:
+            target: A file path, which is created or overwritten, or a file
+                object opened for writing in binary mode.
+            verify: If True and the PDF records a checksum for the attached
+                file, check that the copied data matches it.
+
+        Returns:
+            The MD5 digest of the copied data.
+
+        Raises:
+            pikepdf.PdfError: If ``verify`` is True and the data does not match
+                the recorded checksum. If ``target`` is a path, the file is
+                deleted.
+
+        .. versionadded:: 9.5
+        """
     @property
     def size(self) -> int:
         """Get length of the attached file in bytes according to the PDF creator."""
@@ -777,7 +940,12 @@ class AttachedFileSpec(ObjectHelper):
         """
     @staticmethod
     def from_filepath(
-        pdf: Pdf, path: Path | str, *, description: str = ''
+        pdf: Pdf,
+        path: Path | str,
+        *,
+        description: str = '',
+        relationship: Name | None = ...,
+        lazy: bool = False,
     ) -> AttachedFileSpec:
         """Construct a file specification from a file path.
 
@@ -787,6 +955,12 @@ class AttachedFileSpec(ObjectHelper):
         If the data required for the attach is in memory, use
         :meth:`pikepdf.AttachedFileSpec` instead.
 
+        Normally the file is read into memory. With ``lazy=True``, it is only
+        read in pieces: once now, to compute its size and MD5 checksum, and
+        again when the Pdf is saved, to copy it to the output. This allows
+        attaching files larger than the available memory. The file must not be
+        moved, deleted or modified until the Pdf is saved.
+
         Args:
             pdf: The Pdf to attach this file specification to.
             path: A file path for the file to attach to this Pdf.
@@ -797,6 +971,11 @@ class AttachedFileSpec(ObjectHelper):
                 Canonically, this should be a name from the PDF specification:
                 Source, Data, Alternative, Supplement, EncryptedPayload, FormData,
                 Schema, Unspecified. If omitted, Unspecified is used.
+            lazy: If True, copy the file into the PDF when it is saved,
+                instead of reading it into memory now.
+
+        .. versionchanged:: 9.5
+            Added the ``lazy`` parameter.
         """
     @property
     def description(self) -> str:
@@ -906,6 +1085,147 @@ class TokenFilter(_QPDFTokenFilter):
         original.
         """
 
+class BatchTokenFilter(_QPDFTokenFilter):
+    """A token filter that handles tokens in batches.
+
+    Like :class:`pikepdf.TokenFilter`, but :meth:`handle_tokens` is called
+    with a list of tokens instead of once for each token, which greatly reduces
+    the overhead of calling Python. Subclass it and implement
+    :meth:`handle_tokens`.
+
+    Each batch ends with an operator, or with the final token of type
+    ``TokenType.eof``, so an instruction and its operands are always in the
+    same batch. An inline image, from ``BI`` to ``EI``, counts as one
+    instruction.
+
+    Args:
+        batch_size: The least number of tokens in a batch, except for the last
+            one. ``1`` passes one instruction at a time.
+
+    .. versionadded:: 9.5
+    """
+
+    def __init__(self, *, batch_size: int = 1) -> None: ...
+    @property
+    def batch_size(self) -> int: ...
+    def handle_tokens(self, tokens: list[Token]) -> None | Iterable[Token]:
+        """Handle a batch of :class:`pikepdf.Token`.
+
+        This is an abstract method that must be defined in a subclass of
+        ``BatchTokenFilter``. The implementation returns an iterable of the
+        tokens to write in place of the batch, or ``None`` to discard it.
+        """
+
+class RemoveText(_QPDFTokenFilter):
+    """A token filter that removes all text from a content stream.
+
+    Instructions that show text (``Tj``, ``TJ``, ``'`` and ``"``) are removed,
+    with their operands. Text objects and text state operators are kept, so the
+    graphics state is unchanged.
+
+    Available as ``pikepdf.filters.RemoveText``. Like the other filters in
+    :mod:`pikepdf.filters`, it is implemented in C++, so no Python code runs
+    for each token.
+
+    .. versionadded:: 9.5
+    """
+
+    def __init__(self) -> None: ...
+
+class ReplaceOperator(_QPDFTokenFilter):
+    """A token filter that replaces every instruction with a given operator.
+
+    Available as ``pikepdf.filters.ReplaceOperator``.
+
+    Args:
+        operator: The operator to replace, such as ``'rg'``.
+        replacement: The content written in place of each instruction with
+            that operator and its operands. ``b''`` removes the instructions.
+        keep_operands: If True, only the operator is replaced, and the
+            replacement is written after the original operands. For example,
+            ``ReplaceOperator('rg', b'RG', keep_operands=True)`` turns fill
+            colors into stroke colors.
+
+    .. versionadded:: 9.5
+    """
+
+    def __init__(
+        self, operator: str, replacement: bytes, *, keep_operands: bool = False
+    ) -> None: ...
+    @property
+    def operator(self) -> str: ...
+    @property
+    def replacement(self) -> bytes: ...
+    @property
+    def keep_operands(self) -> bool: ...
+
+class StripMarkedContent(_QPDFTokenFilter):
+    """A token filter that removes marked content sequences.
+
+    A marked content sequence begins with ``BMC`` or ``BDC`` and ends with
+    the matching ``EMC``. Sequences are often used to tag artifacts such as
+    watermarks, headers and footers with ``/Artifact``.
+
+    Available as ``pikepdf.filters.StripMarkedContent``.
+
+    Args:
+        tags: The tags of the sequences to remove, such as
+            ``[Name.Artifact]`` or ``['Artifact']``. If None, all sequences
+            are removed.
+        keep_content: If False, sequences are removed with all of their
+            content, including nested sequences. If True, only the operators
+            that begin and end the sequences are removed, and their content
+            stays in place.
+
+    Removing content can leave a content stream unbalanced, if a sequence
+    contains ``q`` without the matching ``Q``, or ``BT`` without ``ET``.
+
+    .. versionadded:: 9.5
+    """
+
+    def __init__(
+        self,
+        tags: Iterable[Name | str] | None = None,
+        *,
+        keep_content: bool = False,
+    ) -> None: ...
+    @property
+    def tags(self) -> set[str] | None:
+        """The tags of the sequences to remove, as ``'/Tag'``, or None for all."""
+    @property
+    def keep_content(self) -> bool: ...
+
+class ColorMap(_QPDFTokenFilter):
+    """A token filter that replaces colors.
+
+    Colors set with the device color operators ``g``, ``rg`` and ``k`` for
+    filling, or ``G``, ``RG`` and ``K`` for stroking, are looked up in
+    *mapping*. If a color is found, the instruction is replaced with one that
+    sets the new color, for filling or stroking as before. A color has 1
+    (gray), 3 (RGB) or 4 (CMYK) components, each from 0 to 1; the new color
+    may be in another of these color spaces. Colors set in other ways, such as
+    with ``scn``, are not changed.
+
+    Available as ``pikepdf.filters.ColorMap``.
+
+    Args:
+        mapping: Maps each color to replace to its new color. For example,
+            ``{(1, 0, 0): (0,)}`` replaces red with black.
+        tolerance: Colors match if each component differs by at most this
+            much.
+
+    .. versionadded:: 9.5
+    """
+
+    def __init__(
+        self,
+        mapping: Mapping[Sequence[float], Sequence[float]],
+        *,
+        tolerance: float = 1e-4,
+    ) -> None: ...
+    @property
+    def tolerance(self) -> float: ...
+
 class StreamParser:
     """A simple content stream parser, which must be subclassed to be used.
 
@@ -957,7 +1277,7 @@ class Page:
     def _get_cropbox(self, arg0: bool, arg1: bool) -> Object: ...
     def _get_mediabox(self, arg0: bool) -> Object: ...
     def _get_trimbox(self, arg0: bool, arg1: bool) -> Object: ...
-    def add_content_token_filter(self, tf: TokenFilter) -> None:
+    def add_content_token_filter(self, tf: _QPDFTokenFilter) -> None:
         """Attach a :class:`pikepdf.TokenFilter` to a page's content stream.
 
         This function applies token filters lazily, if/when the page's
@@ -1138,7 +1458,7 @@ class Page:
         .. versionadded:: 7.0.0
         """
     def get(self, key: str | Name, default: T | None = ...) -> T | None | Object: ...
-    def get_filtered_contents(self, tf: TokenFilter) -> bytes:
+    def get_filtered_contents(self, tf: _QPDFTokenFilter) -> bytes:
         """Apply a :class:`pikepdf.TokenFilter` to a content stream.
 
         This may be used when the results of a token filter do not need
@@ -1151,6 +1471,9 @@ class Page:
 
         To modify the content stream, use :meth:`pikepdf.Page.add_content_token_filter`.
 
+        If the PDF allows it (:attr:`Pdf.release_gil`), the built-in filters of
+        :mod:`pikepdf.filters` are applied without holding the GIL.
+
         Returns:
             The result of modifying the content stream with ``tf``.
             The existing content stream is not modified.
@@ -1193,6 +1516,27 @@ class Page:
         Args:
             stream_parser: A :class:`pikepdf.StreamParser` instance.
         """
+    def placements(self) -> list[XObjectPlacement]:
+        """Find where the page draws each image and form XObject.
+
+        Interprets the ``q``, ``Q``, ``cm`` and ``Do`` operators of the page's
+        content stream to track the current transformation matrix, and follows
+        every Form XObject that is drawn into its own content stream, so that
+        images and forms drawn by forms are also found. Returns one
+        :class:`pikepdf.XObjectPlacement` per XObject drawn, in drawing order,
+        with forms before the XObjects they draw.
+
+        If the PDF allows it (:attr:`Pdf.release_gil`), the content stream is
+        interpreted without holding the GIL. What each Form XObject draws is
+        remembered by the ``Pdf``, so that a form shared by many pages is only
+        parsed once, until its content stream is replaced.
+
+        Inline images, and XObjects whose names are missing from the resources,
+        are not reported. A form that draws itself, directly or not, is
+        followed only once.
+
+        .. versionadded:: 9.5
+        """
     def remove_unreferenced_resources(self) -> None:
         """Removes resources not referenced by content stream.
 
@@ -1359,6 +1703,44 @@ class Page:
             of returning None.
         """
 
+class XObjectPlacement:
+    """Where a page draws an image or form XObject.
+
+    Returned by :meth:`pikepdf.Page.placements`.
+
+    .. versionadded:: 9.5
+    """
+
+    @property
+    def name(self) -> Name:
+        """The name of the XObject in the resources of the content stream."""
+    @property
+    def xobject(self) -> Stream:
+        """The XObject."""
+    @property
+    def objgen(self) -> tuple[int, int]:
+        """The object and generation number of the XObject."""
+    @property
+    def subtype(self) -> Name:
+        """``/Image`` or ``/Form``."""
+    @property
+    def matrix(self) -> Matrix:
+        """Maps the XObject's space to the default user space of the page.
+
+        For images, the XObject's space is the unit square. For forms, it is the
+        space of the form's ``/BBox``, and includes the form's ``/Matrix``.
+        """
+    @property
+    def bbox(self) -> Rectangle:
+        """The area of the page that the XObject may cover.
+
+        The bounding box of the image's unit square or the form's ``/BBox``,
+        transformed by :attr:`matrix`. Clipping is not taken into account.
+        """
+    @property
+    def depth(self) -> int:
+        """0 if drawn by the page, 1 if drawn by a form drawn by the page, etc."""
+
 class PageList:
     """For accessing pages in a PDF.
 
@@ -1409,6 +1791,51 @@ class PageList:
             index: location at which to insert page, 0-based indexing
             obj: page object to insert
         """
+    @overload
+    def parse_all(
+        self,
+        operators: str = '',
+        *,
+        workers: int = 0,
+        format: Literal['instructions'] = 'instructions',
+    ) -> list[list[ContentStreamInstructions]]: ...
+    @overload
+    def parse_all(
+        self,
+        operators: str = '',
+        *,
+        workers: int = 0,
+        format: Literal['columnar'],
+    ) -> list[ColumnarContentStream]: ...
+    def parse_all(
+        self,
+        operators: str = '',
+        *,
+        workers: int = 0,
+        format: Literal['instructions', 'columnar'] = 'instructions',
+    ) -> list[list[ContentStreamInstructions]] | list[ColumnarContentStream]:
+        """Parse the content streams of every page at once.
+
+        The result is the same as calling :func:`pikepdf.parse_content_stream`
+        on each page, but the pages are tokenized and grouped into instructions
+        in parallel, without holding the GIL. Python objects are created only
+        once every page has been parsed. Content streams are read from the file
+        by one thread, which holds the GIL unless :attr:`Pdf.release_gil` is set.
+
+        Args:
+            operators: A space-separated string of operators to whitelist, as
+                for :func:`pikepdf.parse_content_stream`.
+            workers: The number of threads to parse with. ``0`` uses one per
+                CPU.
+            format: ``'instructions'`` to return a list of instructions for
+                each page, or ``'columnar'`` to return a
+                :class:`pikepdf.ColumnarContentStream` for each page.
+
+        Returns:
+            The parsed content of each page, in page order.
+
+        .. versionadded:: 9.5
+        """
     def p(self, pnum: int) -> Page:
         """Look up page number in ordinal numbering, where 1 is the first page.
 
@@ -1445,6 +1872,101 @@ class PageList:
     @overload
     def __setitem__(self, sl: slice, pages: Iterable[Page]) -> None: ...
 
+class StreamCacheInfo:
+    """Counters for the block cache used when a PDF is accessed as a stream.
+
+    Returned by :attr:`Pdf.stream_cache_info`. The counters keep updating while
+    the PDF is open, since qpdf loads objects lazily.
+
+    .. versionadded:: 9.5
+    """
+
+    @property
+    def block_size(self) -> int:
+        """Size of each cached block in bytes."""
+    @property
+    def cache_size(self) -> int:
+        """Maximum number of bytes held in the cache."""
+    @property
+    def hits(self) -> int:
+        """Number of block lookups that were served from the cache."""
+    @property
+    def misses(self) -> int:
+        """Number of block lookups that had to read from the stream."""
+    @property
+    def evictions(self) -> int:
+        """Number of blocks discarded to stay within the cache size."""
+
+class ContentCacheInfo:
+    """Counters for the cache of parsed content streams.
+
+    Returned by :attr:`Pdf.content_cache_info`.
+
+    .. versionadded:: 9.5
+    """
+
+    @property
+    def max_instructions(self) -> int:
+        """Number of instructions the cache may hold."""
+    @property
+    def instructions(self) -> int:
+        """Number of instructions held in the cache."""
+    @property
+    def entries(self) -> int:
+        """Number of parsed content streams held in the cache."""
+    @property
+    def hits(self) -> int:
+        """Number of parses that were served from the cache."""
+    @property
+    def misses(self) -> int:
+        """Number of parses that had to read the content stream."""
+    @property
+    def evictions(self) -> int:
+        """Number of entries discarded to stay within the cache size."""
+    @property
+    def invalidations(self) -> int:
+        """Number of entries discarded because their content stream changed."""
+
+class ImageInfo:
+    """An image XObject of a Pdf and the pages that use it.
+
+    Returned by :meth:`Pdf.image_inventory`. The values are read from the image's
+    stream dictionary; the image data is not read.
+
+    .. versionadded:: 9.5
+    """
+
+    @property
+    def obj(self) -> Stream:
+        """The image XObject."""
+    @property
+    def objgen(self) -> tuple[int, int]:
+        """The object and generation number of the image."""
+    @property
+    def width(self) -> int:
+        """Width of the image in pixels, or 0 if not given."""
+    @property
+    def height(self) -> int:
+        """Height of the image in pixels, or 0 if not given."""
+    @property
+    def bits_per_component(self) -> int:
+        """Bits per component, defaulting as PdfImage.bits_per_component does."""
+    @property
+    def image_mask(self) -> bool:
+        """``True`` if the image is a stencil mask."""
+    @property
+    def colorspace(self) -> Object | None:
+        """The ``/ColorSpace`` of the image, as it appears in the PDF."""
+    @property
+    def filters(self) -> list[str]:
+        """The names of the filters the image data is encoded with."""
+    @property
+    def raw_length(self) -> int | None:
+        """The ``/Length`` of the encoded image data, if known."""
+    @property
+    def pages(self) -> list[int]:
+        """The indexes of the pages that use the image, in ascending order."""
+
 class _PageListIterator:
     def __iter__(self) -> _PageListIterator: ...
     def __next__(self) -> Page: ...
@@ -1599,6 +2121,38 @@ class Pdf:
         .. versionchanged:: 2.1
             Error messages improved.
         """
+    def disable_content_cache(self) -> None:
+        """Disable the cache of parsed content streams and discard its contents.
+
+        .. versionadded:: 9.5
+        """
+    def enable_content_cache(self, max_instructions: int = 1000000) -> None:
+        """Cache the content streams parsed by :func:`pikepdf.parse_content_stream`.
+
+        While the cache is enabled, parsing a page or stream again with the same
+        ``operators`` returns the instructions from the last time instead of
+        parsing the content stream again. This helps applications that make
+        several passes over the same pages. The least recently used content
+        streams are discarded when the cache holds more than ``max_instructions``
+        instructions; a content stream with more instructions than that is not
+        cached.
+
+        Parsed content is found by the object numbers of the content streams, so
+        it is discarded when their data is replaced through pikepdf, such as by
+        :meth:`pikepdf.Stream.write`, :meth:`pikepdf.Page.contents_add`,
+        :meth:`pikepdf.Page.contents_coalesce` or
+        :meth:`pikepdf.Page.add_content_token_filter`. Each call returns a new
+        list, but the instructions in it are shared with other calls and should
+        not be modified. Warnings about the content stream are only issued when it
+        is actually parsed.
+
+        Enabling the cache again replaces it with an empty one.
+
+        Args:
+            max_instructions: The number of instructions the cache may hold.
+
+        .. versionadded:: 9.5
+        """
     @overload
     def get_object(self, objgen: tuple[int, int]) -> Object: ...
     @overload
@@ -1612,6 +2166,22 @@ class Pdf:
         two integers objid and gen.
         """
     def get_warnings(self) -> list: ...
+    def image_inventory(self) -> dict[tuple[int, int], ImageInfo]:
+        """Find every image XObject used by the pages of this PDF.
+
+        Returns a dictionary from the object and generation number of each image
+        to an :class:`ImageInfo` describing it. An image that is used by several
+        pages, or several times by one page, appears once, with all the pages
+        that use it. Like :attr:`pikepdf.Page.images`, this finds images through
+        the resources of each page, including the resources of Form XObjects
+        that pages use, rather than by interpreting content streams. Inline
+        images are not included.
+
+        The whole document is examined in one pass, and the result is kept until
+        any PDF is modified, so calling this repeatedly is cheap.
+
+        .. versionadded:: 9.5
+        """
     @overload
     def make_indirect(self, obj: T) -> T: ...
     def make_indirect(self, obj: Any) -> Object:
@@ -1672,6 +2242,8 @@ class Pdf:
         inherit_page_attributes: bool = True,
         access_mode: AccessMode = AccessMode.default,
         allow_overwriting_input: bool = False,
+        stream_block_size: int = 65536,
+        stream_cache_size: int = 1048576,
     ) -> Pdf:
         """Open an existing file at *filename_or_stream*.
 
@@ -1687,6 +2259,12 @@ class Pdf:
         ``stream.close()``, in that order, when the Pdf and stream are no longer needed.
         Use with-blocks will call ``.close()`` automatically.
 
+        If *filename_or_stream* is an object that supports the buffer protocol, such
+        as ``bytearray``, ``memoryview`` or ``bytes`` beginning with ``%PDF-``, the
+        PDF is read directly from that memory without copying it. The object is kept
+        alive until the Pdf is closed; for resizable objects such as ``bytearray``,
+        resizing is refused while the Pdf is open. *access_mode* is ignored.
+
         Whether a file or stream is opened, you must ensure that the data is not
         modified by another thread or process, or undefined behavior will occur. You
         also may not overwrite the input file using ``.save()``, unless
@@ -1705,8 +2283,8 @@ class Pdf:
             >>> pdf = Pdf.open("test.pdf", password="rosebud")  # doctest: +SKIP
 
         Args:
-            filename_or_stream: Filename or Python readable and seekable file
-                stream of PDF to open.
+            filename_or_stream: Filename, Python readable and seekable file
+                stream, or in-memory buffer of PDF to open.
             password: User or owner password to open an
                 encrypted PDF. If the type of this parameter is ``str`` it will be
                 encoded as UTF-8. If the type is ``bytes`` it will be saved verbatim.
@@ -1731,10 +2309,25 @@ class Pdf:
                 mapping or fail (this is expected to only be useful for testing).
                 Applications should be prepared to handle the SIGBUS signal on POSIX in
                 the event that the file is successfully mapped but later goes away.
+                Use ``.native`` to have pikepdf open the file itself and read it with
+                ``pread()``, never calling Python to read, so that reads need not
+                wait for the GIL. With ``.native``, *filename_or_stream* must be a
+                path or a stream that has a file descriptor (``.fileno()``).
             allow_overwriting_input: If True, allows calling ``.save()``
-                to overwrite the input file. This is performed by loading the entire
-                input file into memory at open time; this will use more memory and may
-                recent performance especially when the opened file will not be modified.
+                to overwrite the input file. This is performed by taking a snapshot
+                of the input file at open time, in a hidden temporary file next to
+                it. Where the filesystem supports it, the snapshot shares storage
+                with the input file copy-on-write and is almost free; otherwise the
+                file is copied, which takes time and disk space but not memory.
+            stream_block_size: When the file is accessed as a stream, pikepdf
+                reads it in blocks of this many bytes and serves qpdf's reads from
+                those blocks, so that Python is only called when a block is missing.
+                Sequential access reads several blocks ahead at once.
+            stream_cache_size: The maximum number of bytes of blocks to keep when
+                the file is accessed as a stream. The least recently used blocks
+                are discarded first. Set to ``0`` to disable the cache and call
+                Python for every read. Cached blocks are never reread, so the
+                file or stream must not be modified while the PDF is open.
 
         Raises:
             pikepdf.PasswordError: If the password failed to open the
@@ -1756,6 +2349,13 @@ class Pdf:
         .. versionchanged:: 3.0
             Keyword arguments now mandatory for everything except the first
             argument.
+
+        .. versionchanged:: 9.5
+            Added *stream_block_size* and *stream_cache_size*. Stream access is
+            now served from a block cache. Added ``AccessMode.native``. Buffers
+            such as ``bytearray`` and ``memoryview`` are opened in place.
+            ``allow_overwriting_input=True`` snapshots the file to a temporary file
+            instead of reading it into memory.
         """
     def open_metadata(
         self,
@@ -1869,6 +2469,9 @@ class Pdf:
         encryption: Encryption | bool | None = None,
         recompress_flate: bool = False,
         deterministic_id: bool = False,
+        output_buffer_size: int = 1048576,
+        incremental: bool = False,
+        workers: int = 1,
     ) -> None:
         """Save all modifications to this :class:`pikepdf.Pdf`.
 
@@ -1988,6 +2591,36 @@ class Pdf:
                 the same inputs are converted in the same way multiple times.
                 Does not work for encrypted files.
 
+            output_buffer_size: The number of bytes of output to collect before
+                writing them to *filename_or_stream*. Output is written in as few
+                calls to the stream's ``write()`` as possible, since each call
+                requires the GIL. Set to ``0`` to write each chunk of output
+                immediately.
+
+            incremental: If True, write an incremental update: the original file
+                is kept byte for byte, and only new and modified objects are
+                appended to it, followed by a new cross-reference section and
+                trailer. The section is a cross-reference stream if the file's
+                last section is one, and a table otherwise. If the destination is
+                the file or stream this Pdf was opened from, the update is
+                appended to it in place. For small changes to large files this
+                writes much less than a full save, and it preserves existing
+                digital signatures. Finding the changes compares every object
+                with the original file, so it still takes time in proportion to
+                the number of objects in the PDF. The other options do not
+                apply, and ``ValueError`` is raised if any of them is given a
+                value other than its default. Encrypted PDFs and PDFs created
+                with :meth:`Pdf.new` cannot be saved incrementally.
+
+            workers: The number of threads to use to compress streams, or ``0``
+                to use one per CPU. When greater than 1 and *compress_streams* is
+                set, uncompressed streams, and with *recompress_flate* also Flate
+                streams, are compressed in parallel before writing. The output
+                is the same for any number of workers. The compressed data, and
+                the original data of the streams compressed, are held in memory
+                while the file is written. Afterwards, the streams of this ``Pdf``
+                are as they were.
+
         Raises:
             PdfError
             ForeignObjectError
@@ -2008,9 +2641,9 @@ class Pdf:
 
         .. note::
 
-            pikepdf can read PDFs with incremental updates, but always
-            coalesces any incremental updates into a single non-incremental
-            PDF file when saving.
+            pikepdf can read PDFs with incremental updates, but unless
+            ``incremental=True`` is given, coalesces any incremental updates into
+            a single non-incremental PDF file when saving.
 
         .. note::
             If filename_or_stream is a stream and the process is interrupted during
@@ -2041,6 +2674,62 @@ class Pdf:
             The modified time is always set to the time of saving. An unusual
             umask or other settings changes still cause a failure to restore
             permissions.
+
+        .. versionchanged:: 9.5
+            Added *output_buffer_size*. Output is now buffered by default. When
+            *filename_or_stream* is a filename, the file is written directly,
+            without holding the GIL if :attr:`Pdf.release_gil` is set, so other
+            Python threads may run while saving.
+            Added *incremental* and *workers*.
+        """
+    async def save_async(self, *args, **kwargs) -> None:
+        """Save the PDF without blocking the asyncio event loop.
+
+        Accepts the same arguments as :meth:`save`. See :mod:`pikepdf.aio`.
+
+        .. versionadded:: 9.5
+        """
+    @staticmethod
+    async def open_async(*args, **kwargs) -> Pdf:
+        """Open a PDF without blocking the asyncio event loop.
+
+        Accepts the same arguments as :meth:`open`. The PDF is returned with
+        :attr:`release_gil` set. See :mod:`pikepdf.aio`.
+
+        .. versionadded:: 9.5
+        """
+    def read_streams(
+        self,
+        streams: Iterable[Stream],
+        *,
+        decode_level: StreamDecodeLevel = StreamDecodeLevel.generalized,
+        workers: int = 0,
+    ) -> list[Buffer]:
+        """Read and decode many streams of this PDF at once.
+
+        This is equivalent to calling :meth:`Object.get_stream_buffer` for each
+        stream, but the work is done in a single call, and larger streams are
+        decoded in parallel, without holding the GIL. Streams are read from the
+        file by one thread, in the order given, which holds the GIL unless
+        :attr:`Pdf.release_gil` is set.
+
+        Args:
+            streams: Streams that belong to this PDF.
+            decode_level: How far to decode each stream, as for
+                :meth:`Object.read_bytes`. ``StreamDecodeLevel.none`` returns
+                the raw data.
+            workers: The number of threads to decode with. ``0`` uses one per CPU.
+
+        Returns:
+            A buffer of data for each stream, in the same order. Use
+            ``bytes()`` or ``memoryview()`` to access them.
+
+        Raises:
+            TypeError: If an object is not a stream.
+            ValueError: If a stream belongs to another PDF.
+            pikepdf.DataDecodingError: If a stream cannot be decoded.
+
+        .. versionadded:: 9.5
         """
     def show_xref_table(self) -> None:
         """Pretty-print the Pdf's xref (cross-reference table)."""
@@ -2115,6 +2804,23 @@ class Pdf:
         Encryption settings may only be changed when a PDF is saved.
         """
     @property
+    def content_cache_info(self) -> ContentCacheInfo | None:
+        """Report the counters of the cache of parsed content streams.
+
+        Returns ``None`` unless :meth:`Pdf.enable_content_cache` was called.
+
+        .. versionadded:: 9.5
+        """
+    @property
+    def stream_cache_info(self) -> StreamCacheInfo | None:
+        """Report the block cache counters of a PDF opened with stream access.
+
+        Returns ``None`` if the PDF was not opened with stream access, for example
+        if it was memory mapped or created with :meth:`Pdf.new`.
+
+        .. versionadded:: 9.5
+        """
+    @property
     def extension_level(self) -> int:
         """Returns the extension level of this PDF.
 
@@ -2146,6 +2852,28 @@ class Pdf:
         parameter dictionary.  Does no additional validation.
         """
     @property
+    def release_gil(self) -> bool:
+        """Whether to release the GIL while qpdf works on this PDF.
+
+        By default, operations on a PDF hold the GIL, since qpdf's objects are not
+        thread-safe and the GIL is what keeps other threads from using a PDF while
+        qpdf works on it. When this is set to True, stream decoding, saving to a
+        file, content stream parsing and the other expensive operations that say
+        so release the GIL while they work, so that other Python threads may run
+        meanwhile, for example to work on other PDFs.
+
+        Operations that release the GIL on the same PDF take turns, but nothing
+        else is excluded. While any thread works on this PDF without the GIL, no
+        other thread may use the PDF or its objects in any other way.
+
+        Work that does not touch the PDF at all, such as decoding streams in
+        parallel with *workers*, always releases the GIL.
+
+        .. versionadded:: 9.5
+        """
+    @release_gil.setter
+    def release_gil(self, value: bool) -> None: ...
+    @property
     def objects(self) -> _ObjectList:
         """Return an iterable list of all objects in the PDF.
 
@@ -2476,6 +3204,13 @@ class ContentStreamInlineImage:
     @property
     def iimage(self) -> PdfInlineImage: ...
 
+class _ContentStreamIterator(
+    Iterator[ContentStreamInstruction | ContentStreamInlineImage]
+):
+    def __init__(self, page_or_stream: Object, operators: str) -> None: ...
+    def __iter__(self) -> _ContentStreamIterator: ...
+    def __next__(self) -> ContentStreamInstruction | ContentStreamInlineImage: ...
+
 class Job:
     """Provides access to the qpdf job interface.
 
@@ -2817,6 +3552,19 @@ def set_decimal_precision(prec: int) -> int:
 def unparse(obj: Any) -> bytes: ...
 def utf8_to_pdf_doc(utf8: str, unknown: bytes) -> tuple[bool, bytes]: ...
 def _unparse_content_stream(contentstream: Iterable[Any]) -> bytes: ...
+def _parse_content_stream_columnar(
+    page_or_stream: Object, operators: str
+) -> tuple[list[str], bytearray, bytearray, bytearray, dict[int, Any]]: ...
+def _unparse_content_stream_columnar(
+    operator_names: list[str],
+    operators: Any,
+    operand_offsets: Any,
+    numbers: Any,
+    objects: dict[int, Any],
+) -> bytes: ...
+
+_CONTENT_OPERATORS: list[str]
+
 def set_flate_compression_level(
     level: Literal[-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
 ) -> int:
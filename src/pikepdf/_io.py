@@ -3,14 +3,26 @@
 
 from __future__ import annotations
 
+import os
+import sys
 from collections.abc import Generator
 from contextlib import contextmanager, suppress
-from io import TextIOBase
+from io import SEEK_CUR, SEEK_END, SEEK_SET, RawIOBase, TextIOBase
 from os import PathLike
 from pathlib import Path
-from shutil import copystat
-from tempfile import NamedTemporaryFile
-from typing import IO
+from shutil import copyfileobj, copystat
+from tempfile import NamedTemporaryFile, TemporaryFile
+from typing import IO, TYPE_CHECKING, Union, cast
+
+if TYPE_CHECKING:
+    from pikepdf._core import _StreamReader
+
+# ioctl request number of FICLONE on Linux, which clones (reflinks) one file into
+# another on filesystems that support it, such as btrfs and XFS.
+_FICLONE = 0x40049409
+
+# What a Pdf was opened from: a path, a stream or an in-memory buffer
+PdfSource = Union[Path, IO[bytes], memoryview]
 
 
 def check_stream_is_usable(stream: IO) -> None:
@@ -85,3 +97,167 @@ def atomic_overwrite(filename: Path) -> Generator[IO[bytes], None, None]:
         with suppress(OSError):
             # Update modified time of the destination file
             filename.touch()
+
+
+def _reflink(src: IO[bytes], dst: IO[bytes]) -> bool:
+    """Try to make dst share the extents of src, copy-on-write."""
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    try:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        return False
+    return True
+
+
+def _copy_file_data(src: IO[bytes], dst: IO[bytes]) -> None:
+    """Copy all of src to dst, in the kernel if possible."""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while os.copy_file_range(src.fileno(), dst.fileno(), 1 << 30):
+                pass
+        except OSError:
+            # Not supported between these files; start over in userspace
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+        else:
+            return
+    copyfileobj(src, dst, 1 << 20)
+
+
+def snapshot_file(filename: Path) -> IO[bytes]:
+    """Return an anonymous temporary file containing a snapshot of filename.
+
+    The snapshot is unaffected by later changes to, or replacement of, the original
+    file, and is deleted when closed. It does not hold the file's data in memory.
+
+    The snapshot is created next to the original so that, where the filesystem
+    supports it, it can share the original's storage copy-on-write (reflink) and
+    costs almost nothing to create. Otherwise the data is copied, in the kernel
+    where possible. If a temporary file cannot be created next to the original,
+    the default temporary directory is used.
+    """
+    with filename.open('rb') as src:
+        try:
+            snapshot = TemporaryFile(
+                dir=filename.parent, prefix=f'.pikepdf.{filename.name}'
+            )
+        except OSError:
+            snapshot = TemporaryFile(prefix='pikepdf.')
+        try:
+            if not _reflink(src, snapshot):
+                _copy_file_data(src, snapshot)
+            snapshot.flush()
+            snapshot.seek(0)
+        except (Exception, KeyboardInterrupt):
+            snapshot.close()
+            raise
+    return snapshot
+
+
+def file_signature(file: Path | int) -> tuple[int, int]:
+    """Return the size and modification time of a file, to notice later changes."""
+    st = os.stat(file)
+    return st.st_size, st.st_mtime_ns
+
+
+@contextmanager
+def reopen_source(
+    source: PdfSource, position: int = 0
+) -> Generator[IO[bytes], None, None]:
+    """Open what a Pdf was opened from again, positioned at the start of its data.
+
+    Streams are reused rather than reopened, and are not closed.
+    """
+    if isinstance(source, Path):
+        with source.open('rb') as f:
+            yield f
+    elif isinstance(source, memoryview):
+        with _MemoryReader(source) as reader:
+            yield cast(IO[bytes], reader)
+    else:
+        source.seek(position)
+        yield source
+
+
+def find_last_xref(stream: IO[bytes], start: int = 0) -> tuple[int, int]:
+    """Locate the structures an incremental update to a PDF must refer to.
+
+    Returns the offset of the PDF header from *start*, which PDF offsets are relative
+    to, and the offset of the last cross-reference section, as given by the final
+    ``startxref``.
+    """
+    stream.seek(start)
+    header_offset = max(stream.read(1024).find(b'%PDF-'), 0)
+
+    end = stream.seek(0, SEEK_END)
+    stream.seek(max(start, end - 1024))
+    tail = stream.read()
+    pos = tail.rfind(b'startxref')
+    if pos < 0:
+        raise ValueError("could not find startxref at end of file")
+    try:
+        prev = int(tail[pos + len(b'startxref') :].split()[0])
+    except (IndexError, ValueError):
+        raise ValueError("invalid startxref at end of file") from None
+    return header_offset, prev
+
+
+class StreamReader(RawIOBase):
+    """A read-only file object for the data of a stream.
+
+    Returned by :meth:`pikepdf.Stream.open`. Data is decoded as it is read.
+    """
+
+    def __init__(self, reader: _StreamReader):
+        super().__init__()
+        self._reader = reader
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        return self._reader.readinto(b)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._reader.close()
+        super().close()
+
+
+class _MemoryReader(RawIOBase):
+    """A seekable, read-only file object over a buffer, which it does not copy."""
+
+    def __init__(self, data: memoryview):
+        super().__init__()
+        self._data = data
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self._data[self._pos : self._pos + len(b)]
+        n = len(chunk)
+        memoryview(b).cast('B')[:n] = chunk
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        if whence == SEEK_CUR:
+            offset += self._pos
+        elif whence == SEEK_END:
+            offset += len(self._data)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._pos = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._pos
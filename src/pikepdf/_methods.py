@@ -13,39 +13,75 @@ We can also move the implementation to C++ if desired.
 from __future__ import annotations
 
 import datetime
+import hashlib
 import mimetypes
+import os
 import shutil
-from collections.abc import ItemsView, Iterator, KeysView, MutableMapping, ValuesView
+from collections.abc import (
+    ItemsView,
+    Iterable,
+    Iterator,
+    KeysView,
+    MutableMapping,
+    ValuesView,
+)
 from contextlib import ExitStack, suppress
 from decimal import Decimal
-from io import BytesIO, RawIOBase
+from io import SEEK_END, BytesIO, RawIOBase
 from pathlib import Path
 from subprocess import run
 from tempfile import NamedTemporaryFile
 from typing import BinaryIO, Callable, TypeVar
-from warnings import warn
 
+from pikepdf import aio
 from pikepdf._augments import augment_override_cpp, augments
 from pikepdf._core import (
     AccessMode,
     AttachedFile,
     AttachedFileSpec,
     Attachments,
+    ContentCacheInfo,
     NameTree,
     NumberTree,
     ObjectStreamMode,
     Page,
+    PageList,
     Pdf,
+    PdfError,
     Rectangle,
+    StreamCacheInfo,
     StreamDecodeLevel,
     StreamParser,
     Token,
     _ObjectMapping,
+    _StreamReader,
+    _write_content_stream,
+)
+from pikepdf._io import (
+    PdfSource,
+    StreamReader,
+    atomic_overwrite,
+    check_different_files,
+    check_stream_is_usable,
+    file_signature,
+    find_last_xref,
+    reopen_source,
+    snapshot_file,
+)
+from pikepdf.models import (
+    ColumnarContentStream,
+    Encryption,
+    EncryptionInfo,
+    Outline,
+    Permissions,
+)
+from pikepdf.models._content_stream import (
+    PdfParsingError,
+    _column_arrays,
+    unparse_content_stream,
 )
-from pikepdf._io import atomic_overwrite, check_different_files, check_stream_is_usable
-from pikepdf.models import Encryption, EncryptionInfo, Outline, Permissions
 from pikepdf.models.metadata import PdfMetadata, decode_pdf_date, encode_pdf_date
-from pikepdf.objects import Array, Dictionary, Name, Object, Stream
+from pikepdf.objects import Array, Dictionary, Name, Object, Stream, String
 
 # pylint: disable=no-member,unsupported-membership-test,unsubscriptable-object
 # mypy: ignore-errors
@@ -54,6 +90,123 @@ __all__ = []
 
 Numeric = TypeVar('Numeric', int, float, Decimal)
 
+# Attached files are copied and checksummed in chunks of this size
+_ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+
+
+def _pdf_buffer(obj) -> memoryview | None:
+    """Return a flat view of *obj* if it should be opened as in-memory PDF data.
+
+    bytes are treated as PDF data only if they look like a PDF, since bytes may
+    also be a filename.
+    """
+    if isinstance(obj, bytes):
+        return memoryview(obj) if obj.startswith(b'%PDF-') else None
+    if isinstance(obj, (str, os.PathLike)) or hasattr(obj, 'read'):
+        return None
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        return None
+    return view.cast('B')
+
+
+def _is_same_file(file1: Path, file2: Path) -> bool:
+    try:
+        return file1.samefile(file2)
+    except FileNotFoundError:
+        return False
+
+
+def _save_incremental(pdf: Pdf, filename_or_stream: Path | str | BinaryIO) -> None:
+    """Append the changes made to pdf to its original data, as an incremental update.
+
+    Only new and modified objects are written, so for small changes this writes much
+    less than a full save, and leaves the original bytes, including any digital
+    signatures, intact. Finding the changes still compares every object with the
+    original. The update is appended in place when the destination is the file or
+    stream the Pdf was opened from.
+    """
+    source = getattr(pdf, '_original_source', None)
+    if source is None:
+        raise ValueError(
+            "Cannot save incrementally because this Pdf was not opened from a file, "
+            "stream or buffer"
+        )
+    if pdf.is_encrypted:
+        raise ValueError("Cannot save an encrypted PDF incrementally")
+    position = pdf._original_position
+    if isinstance(source, Path) and file_signature(source) != pdf._original_signature:
+        raise ValueError(
+            f"{source} was modified since it was opened; cannot save incrementally"
+        )
+
+    with ExitStack() as stack:
+        original = stack.enter_context(reopen_source(source, position))
+        header_offset, prev = find_last_xref(original, position)
+        # Follow a cross-reference stream with another, for readers that expect one
+        original.seek(position + header_offset + prev)
+        xref_stream = not original.read(16).lstrip().startswith(b'xref')
+        size = original.seek(0, SEEK_END) - position
+        original.seek(position + size - 1)
+        padding = b'' if original.read(1) in (b'\r', b'\n') else b'\n'
+
+        original.seek(position)
+        baseline = stack.enter_context(
+            Pdf.open(original, access_mode=AccessMode.stream, **pdf._open_options)
+        )
+        update = pdf._incremental_update(
+            baseline,
+            offset=size + len(padding) - header_offset,
+            prev=prev,
+            xref_stream=xref_stream,
+        )
+        if update:
+            update = padding + update
+
+        if hasattr(filename_or_stream, 'seek'):
+            check_stream_is_usable(filename_or_stream)
+            if filename_or_stream is source:
+                filename_or_stream.seek(0, SEEK_END)
+            else:
+                original.seek(position)
+                shutil.copyfileobj(original, filename_or_stream, 1 << 20)
+            filename_or_stream.write(update)
+            return
+
+        filename = Path(filename_or_stream)
+        snapshot = pdf._tmp_stream is not None and source is pdf._tmp_stream
+        if (isinstance(source, Path) and _is_same_file(source, filename)) or (
+            snapshot and _is_same_file(pdf._original_filename, filename)
+        ):
+            # Append to the file we were opened from, leaving its bytes untouched
+            with filename.open('r+b') as f:
+                if file_signature(f.fileno()) != pdf._original_signature:
+                    raise ValueError(
+                        f"{filename} was modified since it was opened; cannot "
+                        "append an incremental update"
+                    )
+                f.seek(0, SEEK_END)
+                try:
+                    f.write(update)
+                    f.flush()
+                except (Exception, KeyboardInterrupt):
+                    with suppress(OSError):
+                        f.truncate(size)
+                    raise
+                pdf._original_signature = file_signature(f.fileno())
+            if snapshot:
+                # Keep the snapshot identical to the file, for later saves
+                source.seek(0, SEEK_END)
+                source.write(update)
+                source.flush()
+            return
+
+        with atomic_overwrite(filename) as f:
+            original.seek(position)
+            shutil.copyfileobj(original, f, 1 << 20)
+            f.write(update)
+
 
 def _single_page_pdf(page: Page) -> bytes:
     """Construct a single page PDF from the provided page in memory."""
@@ -154,6 +307,69 @@ class Extend_Object:
 
         self._write(data, filter=filter, decode_parms=decode_parms)
 
+    def write_lazy(
+        self,
+        provider: str | os.PathLike | bytes | Callable[[], Iterable[bytes]],
+        *,
+        filter: Name | Array | None = None,
+        decode_parms: Dictionary | Array | None = None,
+        length_hint: int | None = None,
+        type_check: bool = True,
+    ):  # pylint: disable=redefined-builtin
+        if type_check and filter is not None:
+            filter, decode_parms = self._type_check_write(filter, decode_parms)
+        if length_hint is not None and length_hint < 0:
+            raise ValueError("length_hint must not be negative")
+
+        if isinstance(provider, (str, os.PathLike)):
+            provider = os.fsencode(provider)
+        elif isinstance(provider, Iterator):
+            raise TypeError(
+                "write_lazy: an iterator can only be read once, but the data may be "
+                "needed more than once; pass a function that returns a new iterator"
+            )
+        elif not callable(provider):
+            try:
+                view = memoryview(provider)
+            except TypeError:
+                raise TypeError(
+                    "write_lazy: provider must be a path, a bytes-like object or a "
+                    "function that returns an iterable of bytes-like objects"
+                ) from None
+
+            def provider():
+                return (view,)
+
+        self._write_lazy(
+            provider, filter=filter, decode_parms=decode_parms, length=length_hint
+        )
+
+    def write_instructions(self, instructions):
+        if not isinstance(self, Stream):
+            raise TypeError("write_instructions: object is not a stream")
+        if isinstance(instructions, ColumnarContentStream):
+            self.write(unparse_content_stream(instructions))
+            return
+        try:
+            _write_content_stream(self, instructions)
+        except (ValueError, TypeError, RuntimeError) as e:
+            raise PdfParsingError(
+                "While unparsing a content stream, an error occurred"
+            ) from e
+
+    def open(
+        self, decode_level: StreamDecodeLevel = StreamDecodeLevel.generalized
+    ) -> StreamReader:
+        return StreamReader(_StreamReader(self, decode_level))
+
+    async def read_bytes_async(
+        self, decode_level: StreamDecodeLevel = StreamDecodeLevel.generalized
+    ) -> bytes:
+        return await aio.read_bytes(self, decode_level)
+
+    async def read_raw_bytes_async(self) -> bytes:
+        return await aio.read_raw_bytes(self)
+
 
 @augments(Pdf)
 class Extend_Pdf:
@@ -231,6 +447,8 @@ class Extend_Pdf:
         self._close()
         if getattr(self, '_tmp_stream', None):
             self._tmp_stream.close()
+        # Release any buffer we were opened from
+        self._original_source = None
 
     def __enter__(self):
         return self
@@ -249,6 +467,14 @@ class Extend_Pdf:
     def encryption(self) -> EncryptionInfo:
         return EncryptionInfo(self._encryption_data)
 
+    @property
+    def stream_cache_info(self) -> StreamCacheInfo | None:
+        return getattr(self, '_stream_cache_info', None)
+
+    @property
+    def content_cache_info(self) -> ContentCacheInfo | None:
+        return getattr(self, '_content_cache_info', None)
+
     def check(self) -> list[str]:
         class DiscardingParser(StreamParser):
             def __init__(self):  # pylint: disable=useless-super-delegation
@@ -292,6 +518,9 @@ class Extend_Pdf:
         encryption: Encryption | bool | None = None,
         recompress_flate: bool = False,
         deterministic_id: bool = False,
+        output_buffer_size: int = 1024 * 1024,
+        incremental: bool = False,
+        workers: int = 1,
     ) -> None:
         if not filename_or_stream and getattr(self, '_original_filename', None):
             filename_or_stream = self._original_filename
@@ -304,7 +533,43 @@ class Extend_Pdf:
                 "Pdf.new(), you must specify a destination object since there is "
                 "no original filename to save to."
             )
+        if incremental:
+            # None of the other options apply to an incremental update
+            unsupported = [
+                name
+                for name, value, default in [
+                    ('static_id', static_id, False),
+                    ('preserve_pdfa', preserve_pdfa, True),
+                    ('min_version', min_version, ""),
+                    ('force_version', force_version, ""),
+                    ('fix_metadata_version', fix_metadata_version, True),
+                    ('compress_streams', compress_streams, True),
+                    ('stream_decode_level', stream_decode_level, None),
+                    (
+                        'object_stream_mode',
+                        object_stream_mode,
+                        ObjectStreamMode.preserve,
+                    ),
+                    ('normalize_content', normalize_content, False),
+                    ('linearize', linearize, False),
+                    ('qdf', qdf, False),
+                    ('progress', progress, None),
+                    ('encryption', encryption, None),
+                    ('recompress_flate', recompress_flate, False),
+                    ('deterministic_id', deterministic_id, False),
+                    ('output_buffer_size', output_buffer_size, 1024 * 1024),
+                    ('workers', workers, 1),
+                ]
+                if value != default
+            ]
+            if unsupported:
+                raise ValueError(
+                    f"Cannot use {', '.join(unsupported)} with incremental=True"
+                )
+            _save_incremental(self, filename_or_stream)
+            return
         with ExitStack() as stack:
+            native_output = False
             if hasattr(filename_or_stream, 'seek'):
                 stream = filename_or_stream
                 check_stream_is_usable(filename_or_stream)
@@ -318,6 +583,9 @@ class Extend_Pdf:
                 ):
                     check_different_files(self._original_filename, filename)
                 stream = stack.enter_context(atomic_overwrite(filename))
+                # We own this newly created file, so C++ may write to its file
+                # descriptor directly, without the GIL
+                native_output = True
             self._save(
                 stream,
                 static_id=static_id,
@@ -336,8 +604,18 @@ class Extend_Pdf:
                 samefile_check=getattr(self, '_tmp_stream', None) is None,
                 recompress_flate=recompress_flate,
                 deterministic_id=deterministic_id,
+                output_buffer_size=output_buffer_size,
+                native_output=native_output,
+                workers=workers,
             )
 
+    async def save_async(self, *args, **kwargs) -> None:
+        await aio.save(self, *args, **kwargs)
+
+    @staticmethod
+    async def open_async(*args, **kwargs) -> Pdf:
+        return await aio.open(*args, **kwargs)
+
     @staticmethod
     def open(
         filename_or_stream: Path | str | BinaryIO,
@@ -350,16 +628,9 @@ class Extend_Pdf:
         inherit_page_attributes: bool = True,
         access_mode: AccessMode = AccessMode.default,
         allow_overwriting_input: bool = False,
+        stream_block_size: int = 64 * 1024,
+        stream_cache_size: int = 1024 * 1024,
     ) -> Pdf:
-        if isinstance(filename_or_stream, bytes) and filename_or_stream.startswith(
-            b'%PDF-'
-        ):
-            warn(
-                "It looks like you called with Pdf.open(data) with a bytes-like object "
-                "containing a PDF. This will probably fail because this function "
-                "expects a filename or opened file-like object. Instead, please use "
-                "Pdf.open(BytesIO(data))."
-            )
         if isinstance(filename_or_stream, (int, float)):
             # Attempted to open with integer file descriptor?
             # TODO improve error
@@ -368,6 +639,10 @@ class Extend_Pdf:
         stream: RawIOBase | None = None
         closing_stream: bool = False
         original_filename: Path | None = None
+        source: PdfSource | None = None
+        position: int = 0
+        # Size and modification time of the file, to detect changes by others
+        signature: tuple[int, int] | None = None
 
         if allow_overwriting_input:
             try:
@@ -378,27 +653,37 @@ class Extend_Pdf:
                     'to be a file path'
                 ) from error
             original_filename = Path(filename_or_stream)
-            with open(original_filename, 'rb') as pdf_file:
-                stream = BytesIO()
-                shutil.copyfileobj(pdf_file, stream)
-                stream.seek(0)
-            # description = f"memory copy of {original_filename}"
+            signature = file_signature(original_filename)
+            stream = snapshot_file(original_filename)
+            source = stream
             description = str(original_filename)
+        elif (data := _pdf_buffer(filename_or_stream)) is not None:
+            # Read the buffer in place
+            stream = source = data
+            description = f"memory buffer {type(filename_or_stream).__name__}"
         elif hasattr(filename_or_stream, 'read') and hasattr(
             filename_or_stream, 'seek'
         ):
-            stream = filename_or_stream
+            stream = source = filename_or_stream
+            position = stream.tell()
             description = f"stream {stream}"
+        elif access_mode == AccessMode.native:
+            # The file is opened and read by C++ without involving Python
+            original_filename = source = Path(filename_or_stream)
+            signature = file_signature(original_filename)
+            description = str(filename_or_stream)
         else:
             stream = open(filename_or_stream, 'rb')
-            original_filename = Path(filename_or_stream)
+            original_filename = source = Path(filename_or_stream)
+            signature = file_signature(stream.fileno())
             description = str(filename_or_stream)
             closing_stream = True
 
         try:
-            check_stream_is_usable(stream)
-            pdf = Pdf._open(
-                stream,
+            if stream is not None and not isinstance(stream, memoryview):
+                check_stream_is_usable(stream)
+            pdf, stream_cache_info = Pdf._open(
+                stream if stream is not None else os.fsencode(filename_or_stream),
                 password=password,
                 hex_password=hex_password,
                 ignore_xref_streams=ignore_xref_streams,
@@ -408,13 +693,26 @@ class Extend_Pdf:
                 access_mode=access_mode,
                 description=description,
                 closing_stream=closing_stream,
+                stream_block_size=stream_block_size,
+                stream_cache_size=stream_cache_size,
             )
         except Exception:
             if stream is not None and closing_stream:
                 stream.close()
             raise
+        # Counters of the stream block cache, or None if it is not used
+        pdf._stream_cache_info = stream_cache_info
         pdf._tmp_stream = stream if allow_overwriting_input else None
         pdf._original_filename = original_filename
+        # Needed to find what changed for incremental saves
+        pdf._original_source = source
+        pdf._original_position = position
+        pdf._original_signature = signature
+        pdf._open_options = dict(
+            ignore_xref_streams=ignore_xref_streams,
+            attempt_recovery=attempt_recovery,
+            inherit_page_attributes=inherit_page_attributes,
+        )
         return pdf
 
 
@@ -681,6 +979,25 @@ class Extend_Page:
         return data
 
 
+@augments(PageList)
+class Extend_PageList:
+    def parse_all(
+        self,
+        operators: str = '',
+        *,
+        workers: int = 0,
+        format: str = 'instructions',
+    ):
+        if format not in ('instructions', 'columnar'):
+            raise ValueError(f"unknown content stream format {format!r}")
+        if format == 'columnar':
+            return [
+                ColumnarContentStream(*_column_arrays(parsed))
+                for parsed in self._parse_all(operators, True, workers)
+            ]
+        return self._parse_all(operators, False, workers)
+
+
 @augments(Token)
 class Extend_Token:
     def __repr__(self):
@@ -733,6 +1050,7 @@ class Extend_AttachedFileSpec:
         *,
         description: str = '',
         relationship: Name | None = Name.Unspecified,
+        lazy: bool = False,
     ):
         mime, _ = mimetypes.guess_type(str(path))
         if mime is None:
@@ -741,9 +1059,9 @@ class Extend_AttachedFileSpec:
             path = Path(path)
 
         stat = path.stat()
-        return AttachedFileSpec(
+        filespec = AttachedFileSpec(
             pdf,
-            path.read_bytes(),
+            b'' if lazy else path.read_bytes(),
             description=description,
             filename=str(path.name),
             mime_type=mime,
@@ -753,6 +1071,19 @@ class Extend_AttachedFileSpec:
             mod_date=encode_pdf_date(datetime.datetime.fromtimestamp(stat.st_mtime)),
             relationship=relationship,
         )
+        if lazy:
+            # The file is read once now to measure it, and again when saving
+            size = 0
+            checksum = hashlib.md5()
+            with path.open('rb') as f:
+                for chunk in iter(lambda: f.read(_ATTACHMENT_CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    checksum.update(chunk)
+            efstream = filespec.get_file().obj
+            efstream.write_lazy(path.resolve(), length_hint=size)
+            efstream.Params.Size = size
+            efstream.Params.CheckSum = String(checksum.digest())
+        return filespec
 
     @property
     def relationship(self) -> Name | None:
@@ -799,6 +1130,32 @@ class Extend_AttachedFile:
     def read_bytes(self) -> bytes:
         return self.obj.read_bytes()
 
+    def open(self) -> StreamReader:
+        return self.obj.open()
+
+    def extract_to(
+        self, target: Path | str | BinaryIO, *, verify: bool = True
+    ) -> bytes:
+        checksum = hashlib.md5()
+        with ExitStack() as stack:
+            if isinstance(target, (str, os.PathLike)):
+                target = Path(target)
+                stream = stack.enter_context(target.open('wb'))
+            else:
+                stream = target
+            reader = stack.enter_context(self.open())
+            for chunk in iter(lambda: reader.read(_ATTACHMENT_CHUNK_SIZE), b''):
+                checksum.update(chunk)
+                stream.write(chunk)
+        digest = checksum.digest()
+        if verify and self.md5 and digest != self.md5:
+            if isinstance(target, Path):
+                target.unlink()
+            raise PdfError(
+                f"attached file {self.obj.objgen} does not match its MD5 checksum"
+            )
+        return digest
+
     def __repr__(self):
         return (
             f'<pikepdf._core.AttachedFile objid={self.obj.objgen} size={self.size} '
@@ -0,0 +1,245 @@
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Use pikepdf from asyncio without blocking the event loop.
+
+Opening, saving and reading stream data are run on a dedicated thread pool.
+The expensive parts of these operations are implemented in C++ and release
+the GIL for a :class:`pikepdf.Pdf` whose :attr:`~pikepdf.Pdf.release_gil` is
+set, as it is for those opened by :func:`open`, so the event loop and other
+threads keep running while they work.
+
+The number of operations that may be submitted to the pool at once is limited
+(per event loop), so a burst of requests queues up cheaply in asyncio instead
+of piling up inside the executor. Waiting for a slot can be cancelled like
+any other await.
+
+Operations that were already started when the awaiting task is cancelled can
+not be interrupted, since qpdf has no way to abandon work part way. They run
+to completion in the background and their result is discarded; in particular,
+a :class:`pikepdf.Pdf` opened by a cancelled :func:`open` is closed.
+
+pikepdf objects are not thread-safe. Do not let coroutines work on the same
+:class:`pikepdf.Pdf` concurrently; await one operation before starting the
+next.
+
+.. versionadded:: 9.5
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from typing import Any, Callable, TypeVar
+from weakref import WeakKeyDictionary
+
+from pikepdf._core import Object, Pdf, StreamDecodeLevel
+
+T = TypeVar('T')
+
+__all__ = [
+    'configure',
+    'open',
+    'read_bytes',
+    'read_raw_bytes',
+    'run',
+    'save',
+]
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+# Operations that are waiting for a slot or running
+_in_flight: int = 0
+
+
+def _default_workers() -> int:
+    # Same default as ThreadPoolExecutor
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+_max_workers: int = _default_workers()
+_max_pending: int = _max_workers
+_semaphores: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    WeakKeyDictionary()
+)
+
+
+def configure(*, max_workers: int | None = None, max_pending: int | None = None):
+    """Configure the thread pool used for asynchronous operations.
+
+    This must be called while no operations are waiting or running, usually
+    before :mod:`pikepdf.aio` is first used. Arguments that are omitted or
+    ``None`` are restored to their defaults.
+
+    Args:
+        max_workers: The number of threads in the pool. By default, this is the
+            same as for :class:`concurrent.futures.ThreadPoolExecutor`.
+        max_pending: The number of operations that may be submitted to the pool
+            at once, for each event loop. Further operations wait in asyncio
+            until a slot is free. Defaults to *max_workers*, so that no work
+            queues inside the pool.
+
+    Raises:
+        RuntimeError: If any operations are waiting or running.
+    """
+    global _executor, _max_workers, _max_pending  # pylint: disable=global-statement
+
+    if max_workers is None:
+        max_workers = _default_workers()
+    if max_pending is None:
+        max_pending = max_workers
+    if max_workers < 1 or max_pending < 1:
+        raise ValueError("max_workers and max_pending must be at least 1")
+    with _lock:
+        if _in_flight:
+            raise RuntimeError(
+                "pikepdf.aio.configure() cannot be called while operations are "
+                "waiting or running"
+            )
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+        _max_workers = max_workers
+        _max_pending = max_pending
+        _semaphores.clear()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor  # pylint: disable=global-statement
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix='pikepdf-aio'
+            )
+        return _executor
+
+
+def _get_semaphore(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    with _lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _semaphores[loop] = asyncio.Semaphore(_max_pending)
+        return semaphore
+
+
+def _begin():
+    global _in_flight  # pylint: disable=global-statement
+
+    with _lock:
+        _in_flight += 1
+
+
+def _end():
+    global _in_flight  # pylint: disable=global-statement
+
+    with _lock:
+        _in_flight -= 1
+
+
+def _release_later(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+    def callback(_future: Future):
+        _end()
+        # The loop may have been closed while the operation ran
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(semaphore.release)
+
+    return callback
+
+
+def _cleanup_later(cleanup: Callable[[Any], object]):
+    def callback(future: Future):
+        if not future.cancelled() and future.exception() is None:
+            cleanup(future.result())
+
+    return callback
+
+
+async def run(
+    fn: Callable[..., T],
+    /,
+    *args,
+    cleanup: Callable[[T], object] | None = None,
+    **kwargs,
+) -> T:
+    """Run ``fn(*args, **kwargs)`` on the pikepdf thread pool and await its result.
+
+    If no slot is available, wait for one first. The slot is held until *fn*
+    returns, even if the awaiting task is cancelled in the meantime.
+
+    Args:
+        fn: The function to call.
+        *args: Positional arguments for *fn*.
+        **kwargs: Keyword arguments for *fn*.
+        cleanup: If the awaiting task is cancelled after *fn* was started, *fn*
+            still runs to completion, and its result is then passed to
+            *cleanup* to release any resources it holds.
+    """
+    loop = asyncio.get_running_loop()
+    _begin()
+    try:
+        semaphore = _get_semaphore(loop)
+        await semaphore.acquire()
+    except BaseException:
+        _end()
+        raise
+    try:
+        future = _get_executor().submit(functools.partial(fn, *args, **kwargs))
+    except BaseException:
+        _end()
+        semaphore.release()
+        raise
+    future.add_done_callback(_release_later(loop, semaphore))
+
+    try:
+        # If we are cancelled before fn starts, the future is cancelled too
+        return await asyncio.wrap_future(future, loop=loop)
+    except asyncio.CancelledError:
+        if cleanup is not None:
+            future.add_done_callback(_cleanup_later(cleanup))
+        raise
+
+
+def _open(*args, **kwargs) -> Pdf:
+    pdf = Pdf.open(*args, **kwargs)
+    pdf.release_gil = True
+    return pdf
+
+
+async def open(*args, **kwargs) -> Pdf:  # pylint: disable=redefined-builtin
+    """Open a PDF asynchronously.
+
+    Accepts the same arguments as :meth:`pikepdf.Pdf.open`. The PDF is returned
+    with :attr:`pikepdf.Pdf.release_gil` set.
+    """
+    return await run(_open, *args, cleanup=Pdf.close, **kwargs)
+
+
+async def save(pdf: Pdf, *args, **kwargs) -> None:
+    """Save a PDF asynchronously.
+
+    Accepts the same arguments as :meth:`pikepdf.Pdf.save`.
+    """
+    await run(pdf.save, *args, **kwargs)
+
+
+async def read_bytes(
+    stream: Object, decode_level: StreamDecodeLevel = StreamDecodeLevel.generalized
+) -> bytes:
+    """Read the decoded data of a stream asynchronously.
+
+    See :meth:`pikepdf.Stream.read_bytes`.
+    """
+    return await run(stream.read_bytes, decode_level)
+
+
+async def read_raw_bytes(stream: Object) -> bytes:
+    """Read the raw data of a stream asynchronously.
+
+    See :meth:`pikepdf.Stream.read_raw_bytes`.
+    """
+    return await run(stream.read_raw_bytes)
@@ -0,0 +1,18 @@
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Token filters for common content stream rewrites.
+
+These filters are implemented in C++, so unlike a subclass of
+:class:`pikepdf.TokenFilter`, they do not call Python for each token. Use them
+with :meth:`pikepdf.Page.add_content_token_filter` or
+:meth:`pikepdf.Page.get_filtered_contents`, as any other token filter.
+
+.. versionadded:: 9.5
+"""
+
+from __future__ import annotations
+
+from pikepdf._core import ColorMap, RemoveText, ReplaceOperator, StripMarkedContent
+
+__all__ = ['ColorMap', 'RemoveText', 'ReplaceOperator', 'StripMarkedContent']
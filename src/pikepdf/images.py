@@ -0,0 +1,227 @@
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: MPL-2.0
+
+"""Extract all of the images in a PDF at once.
+
+Each image is extracted once, however many pages use it. Images that can be
+saved as image files without decoding, such as most JPEGs, are copied to disk
+directly. The other images are decoded in the calling thread and encoded as PNG
+or TIFF by a pool of threads, so that decoding the next image overlaps with
+encoding the previous ones. Encoding in Pillow releases the GIL, and so does
+decoding in qpdf if :attr:`pikepdf.Pdf.release_gil` is set.
+
+Only the calling thread accesses the :class:`pikepdf.Pdf`, so the Pdf must not be
+used by other threads until extraction is finished.
+
+.. versionadded:: 9.5
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Collection
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from PIL import Image
+
+from pikepdf._core import ImageInfo, Pdf, PdfError
+from pikepdf._exceptions import DependencyError
+from pikepdf.models.image import (
+    InvalidPdfImageError,
+    NotExtractableError,
+    PdfImage,
+    UnsupportedImageTypeError,
+    _save_transcoded,
+    _transcoded_extension,
+)
+
+__all__ = ['ExtractedImage', 'extract_all']
+
+# Errors that mean an image cannot be extracted, rather than that extraction failed
+_NOT_EXTRACTABLE = (
+    DependencyError,
+    InvalidPdfImageError,
+    NotExtractableError,
+    UnsupportedImageTypeError,
+)
+
+
+class ExtractedImage(NamedTuple):
+    """The result of extracting one image with :func:`extract_all`."""
+
+    objgen: tuple[int, int]
+    """The object and generation number of the image."""
+
+    pages: list[int]
+    """The indexes of the pages that use the image."""
+
+    path: Path | None
+    """The file the image was written to, or ``None`` if it was not extracted."""
+
+    transcoded: bool
+    """Whether the image was decoded and encoded in another format."""
+
+    error: Exception | None
+    """Why the image was not extracted, if it was not."""
+
+
+_Pending = tuple[ImageInfo, 'Future[Path]']
+
+
+def _partial_path(stem: Path) -> Path:
+    return Path(str(stem) + '.partial')
+
+
+def _finish_path(partial: Path, stem: Path, extension: str) -> Path:
+    path = Path(str(stem) + extension)
+    os.replace(partial, path)
+    return path
+
+
+def _write_direct(
+    image: PdfImage, stem: Path, formats: frozenset[str] | None
+) -> Path | None:
+    """Copy the image to a file without decoding it, if possible."""
+    partial = _partial_path(stem)
+    try:
+        with partial.open('wb') as stream:
+            extension = image._extract_direct(stream=stream)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    if extension is None or (formats is not None and extension not in formats):
+        partial.unlink()
+        return None
+    return _finish_path(partial, stem, extension)
+
+
+def _decode(image: PdfImage) -> Image.Image:
+    # Images that could have been copied, but not in one of the allowed formats,
+    # are opened by Pillow, and decoded by the worker that encodes them
+    try:
+        return image.as_pil_image()
+    except PdfError as e:
+        if 'called on unfilterable stream' in str(e):
+            raise UnsupportedImageTypeError(repr(image)) from e
+        raise
+
+
+def _encode(im: Image.Image, stem: Path) -> Path:
+    """Save a decoded image to a file. Runs on a worker thread."""
+    partial = _partial_path(stem)
+    try:
+        with partial.open('wb') as stream:
+            extension = _save_transcoded(im, stream)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        im.close()
+    return _finish_path(partial, stem, extension)
+
+
+def _start(
+    info: ImageInfo,
+    stem: Path,
+    formats: frozenset[str] | None,
+    executor: ThreadPoolExecutor,
+) -> ExtractedImage | Future[Path]:
+    """Extract an image directly, or decode it and submit it to be encoded."""
+    try:
+        image = PdfImage(info.obj)
+        path = _write_direct(image, stem, formats)
+        if path is not None:
+            return ExtractedImage(info.objgen, info.pages, path, False, None)
+
+        im = _decode(image)
+        extension = _transcoded_extension(im)
+        if formats is not None and extension not in formats:
+            im.close()
+            raise NotExtractableError(f"{image!r} can only be extracted as {extension}")
+    except _NOT_EXTRACTABLE as e:
+        return ExtractedImage(info.objgen, info.pages, None, False, e)
+    return executor.submit(_encode, im, stem)
+
+
+def extract_all(
+    pdf: Pdf,
+    outdir: str | os.PathLike,
+    *,
+    workers: int = 0,
+    formats: Collection[str] | None = None,
+    progress: Callable[[ExtractedImage], object] | None = None,
+) -> list[ExtractedImage]:
+    """Extract every image used by the pages of a PDF to files.
+
+    The images are found with :meth:`pikepdf.Pdf.image_inventory`, and each is
+    written to ``outdir`` as ``image-<objnum>-<gen>`` followed by the file
+    extension, once however many pages use it. Like
+    :meth:`pikepdf.PdfImage.extract_to`, compressed data is copied to the file
+    without transcoding where possible, and other images are saved as PNG, or
+    as TIFF for CMYK images. Files are written under a temporary name and
+    renamed when they are complete.
+
+    Images that cannot be extracted, such as those in unsupported color spaces,
+    are skipped, and the reason is reported in the result.
+
+    Args:
+        pdf: The PDF to extract images from.
+        outdir: The directory to write images to. It is created if it does not
+            exist.
+        workers: The number of threads to encode images with. ``0`` uses one
+            per CPU.
+        formats: If given, the file extensions that may be written, such as
+            ``{'.jpg', '.png'}``. Images whose data would be copied to another
+            type of file are transcoded instead, and images that would be
+            transcoded to another type of file are skipped. The extensions are
+            those returned by :meth:`pikepdf.PdfImage.extract_to`: ``.jpg``,
+            ``.jp2``, ``.tif`` (copied), ``.png`` and ``.tiff`` (transcoded).
+        progress: Called with the result for each image when it is finished.
+
+    Returns:
+        The result for each image, in the order of
+        :meth:`pikepdf.Pdf.image_inventory`.
+
+    .. versionadded:: 9.5
+    """
+    if workers < 0:
+        raise ValueError("workers must be 0 or more")
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    allowed = frozenset(formats) if formats is not None else None
+    max_workers = workers or os.cpu_count() or 1
+    # Limit how many decoded images are held in memory waiting to be encoded
+    max_pending = 2 * max_workers
+
+    inventory = pdf.image_inventory()
+    results: dict[tuple[int, int], ExtractedImage] = {}
+    pending: deque[_Pending] = deque()
+
+    def finish(result: ExtractedImage):
+        results[result.objgen] = result
+        if progress is not None:
+            progress(result)
+
+    def finish_oldest():
+        info, future = pending.popleft()
+        finish(ExtractedImage(info.objgen, info.pages, future.result(), True, None))
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix='pikepdf-images'
+    ) as executor:
+        for (objnum, gen), info in inventory.items():
+            while len(pending) >= max_pending:
+                finish_oldest()
+            stem = outdir / f'image-{objnum}-{gen}'
+            started = _start(info, stem, allowed, executor)
+            if isinstance(started, ExtractedImage):
+                finish(started)
+            else:
+                pending.append((info, started))
+        while pending:
+            finish_oldest()
+
+    return [results[objgen] for objgen in inventory]
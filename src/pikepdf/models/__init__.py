@@ -6,9 +6,11 @@
 from __future__ import annotations
 
 from pikepdf.models._content_stream import (
+    ColumnarContentStream,
     ContentStreamInstructions,
     PdfParsingError,
     UnparseableContentStreamInstructions,
+    iter_content_stream,
     parse_content_stream,
     unparse_content_stream,
 )
@@ -24,9 +26,11 @@ from pikepdf.models.outlines import (
 )
 
 __all__ = [
+    'ColumnarContentStream',
     'ContentStreamInstructions',
     'PdfParsingError',
     'UnparseableContentStreamInstructions',
+    'iter_content_stream',
     'parse_content_stream',
     'unparse_content_stream',
     'Encryption',
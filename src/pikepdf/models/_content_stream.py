@@ -5,17 +5,21 @@
 
 from __future__ import annotations
 
-from collections.abc import Collection
-from typing import TYPE_CHECKING, Union, cast
+from collections.abc import Collection, Iterable, Iterator
+from typing import TYPE_CHECKING, Literal, Union, cast, overload
 
 from pikepdf._core import (
+    _CONTENT_OPERATORS,
     ContentStreamInlineImage,
     ContentStreamInstruction,
     Object,
     ObjectType,
     Page,
     PdfError,
+    _ContentStreamIterator,
+    _parse_content_stream_columnar,
     _unparse_content_stream,
+    _unparse_content_stream_columnar,
 )
 from pikepdf.objects import Operator
 
@@ -43,9 +47,132 @@ class PdfParsingError(Exception):
         self.line = line
 
 
+class ColumnarContentStream:
+    """A content stream as NumPy arrays, for vectorized analysis and rewriting.
+
+    Returned by ``parse_content_stream(..., format='columnar')``, and accepted by
+    :func:`unparse_content_stream`. Instruction ``i`` has the operator
+    ``operator_names[operators[i]]`` and the operands
+    ``numbers[operand_offsets[i]:operand_offsets[i + 1]]``. Operands that are not
+    numbers are NaN in ``numbers``; the operands themselves are stored in
+    ``objects``, keyed by their index in ``numbers``. An inline image is a single
+    instruction with the operator ``INLINE IMAGE``, whose only operand is a
+    :class:`pikepdf.PdfInlineImage`.
+
+    The standard PDF operators have the same code in every content stream, so
+    codes may be compared between content streams. Other operators are given
+    the following codes, in order of appearance.
+
+    For example, to scale every ``cm`` operator by 2:
+
+    .. code-block:: python
+
+        content = pikepdf.parse_content_stream(page, format='columnar')
+        cm = content.operators == content.operator_code('cm')
+        starts = content.operand_offsets[:-1][cm]
+        for k in range(4):
+            content.numbers[starts + k] *= 2
+        page.Contents = pdf.make_stream(pikepdf.unparse_content_stream(content))
+
+    Attributes:
+        operators: ``uint8`` array of the operator code of each instruction.
+        operand_offsets: ``int64`` array with one more item than ``operators``.
+        numbers: ``float64`` array with one item per operand.
+        objects: Operands that are not numbers, by index in ``numbers``.
+        operator_names: The operator of each code.
+
+    .. versionadded:: 9.5
+    """
+
+    def __init__(
+        self,
+        operators,
+        operand_offsets,
+        numbers,
+        objects: dict[int, Object | PdfInlineImage] | None = None,
+        operator_names: list[str] | None = None,
+    ):
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        self.operators = np.asarray(operators, dtype=np.uint8)
+        self.operand_offsets = np.asarray(operand_offsets, dtype=np.int64)
+        self.numbers = np.asarray(numbers, dtype=np.float64)
+        self.objects = dict(objects) if objects is not None else {}
+        self.operator_names = (
+            list(operator_names)
+            if operator_names is not None
+            else list(_CONTENT_OPERATORS)
+        )
+
+    def __len__(self) -> int:
+        return len(self.operators)
+
+    def __repr__(self) -> str:
+        return (
+            f'<pikepdf.ColumnarContentStream: {len(self)} instructions, '
+            f'{len(self.numbers)} operands>'
+        )
+
+    def operator_code(self, operator: str | Operator) -> int:
+        """Return the code of an operator, adding the operator if necessary."""
+        name = str(operator)
+        try:
+            return self.operator_names.index(name)
+        except ValueError:
+            if len(self.operator_names) > 255:
+                raise ValueError("too many different operators") from None
+            self.operator_names.append(name)
+            return len(self.operator_names) - 1
+
+    def operands(self, index: int) -> list[float | Object | PdfInlineImage]:
+        """Return the operands of one instruction as a list."""
+        begin, end = self.operand_offsets[index], self.operand_offsets[index + 1]
+        return [
+            self.objects[i] if i in self.objects else float(self.numbers[i])
+            for i in range(int(begin), int(end))
+        ]
+
+
+def _check_page_or_stream(page_or_stream: Object | Page, caller: str) -> Object:
+    if not isinstance(page_or_stream, (Object, Page)):
+        raise TypeError("stream must be a pikepdf.Object or pikepdf.Page")
+
+    if (
+        isinstance(page_or_stream, Object)
+        and page_or_stream._type_code != ObjectType.stream
+        and page_or_stream.get('/Type') != '/Page'
+    ):
+        raise TypeError(f"{caller} called on page or stream object")
+
+    if isinstance(page_or_stream, Page):
+        page_or_stream = page_or_stream.obj
+    return page_or_stream
+
+
+@overload
 def parse_content_stream(
-    page_or_stream: Object | Page, operators: str = ''
-) -> list[ContentStreamInstructions]:
+    page_or_stream: Object | Page,
+    operators: str = '',
+    *,
+    format: Literal['instructions'] = 'instructions',
+) -> list[ContentStreamInstructions]: ...
+
+
+@overload
+def parse_content_stream(
+    page_or_stream: Object | Page,
+    operators: str = '',
+    *,
+    format: Literal['columnar'],
+) -> ColumnarContentStream: ...
+
+
+def parse_content_stream(
+    page_or_stream: Object | Page,
+    operators: str = '',
+    *,
+    format: Literal['instructions', 'columnar'] = 'instructions',
+) -> list[ContentStreamInstructions] | ColumnarContentStream:
     """Parse a PDF content stream into a sequence of instructions.
 
     A PDF content stream is list of instructions that describe where to render
@@ -69,6 +196,11 @@ def parse_content_stream(
             that pertain to drawing images. Use 'BI ID EI' for inline images.
             All other operators and associated tokens are ignored. If blank,
             all tokens are accepted.
+        format: ``'instructions'`` to return a list of instructions, or
+            ``'columnar'`` to return a :class:`ColumnarContentStream`, which
+            requires NumPy. The columnar format stores numeric operands in one
+            array of floats instead of creating an object for each, which is
+            much faster for content streams with many instructions.
 
     Example:
         >>> with pikepdf.Pdf.open("../tests/resources/pal-1bit-trivial.pdf") as pdf:
@@ -84,21 +216,20 @@ def parse_content_stream(
         Returns a list of ``ContentStreamInstructions`` instead of a list
         of (operand, operator) tuples. The returned items are duck-type compatible
         with the previous returned items.
-    """
-    if not isinstance(page_or_stream, (Object, Page)):
-        raise TypeError("stream must be a pikepdf.Object or pikepdf.Page")
-
-    if (
-        isinstance(page_or_stream, Object)
-        and page_or_stream._type_code != ObjectType.stream
-        and page_or_stream.get('/Type') != '/Page'
-    ):
-        raise TypeError("parse_content_stream called on page or stream object")
-
-    if isinstance(page_or_stream, Page):
-        page_or_stream = page_or_stream.obj
 
+    .. versionchanged:: 9.5
+        Added the ``format`` parameter.
+    """
+    page_or_stream = _check_page_or_stream(page_or_stream, 'parse_content_stream')
+    if format not in ('instructions', 'columnar'):
+        raise ValueError(f"unknown content stream format {format!r}")
     try:
+        if format == 'columnar':
+            return ColumnarContentStream(
+                *_column_arrays(
+                    _parse_content_stream_columnar(page_or_stream, operators)
+                )
+            )
         if page_or_stream.get('/Type') == '/Page':
             page = page_or_stream
             instructions = cast(
@@ -119,8 +250,57 @@ def parse_content_stream(
     return instructions
 
 
+def iter_content_stream(
+    page_or_stream: Object | Page, operators: str = ''
+) -> Iterator[ContentStreamInstructions]:
+    """Parse a PDF content stream, yielding instructions as they are parsed.
+
+    This returns the same instructions as :func:`parse_content_stream`, but
+    creates them one at a time, as the iterator is advanced. Memory use stays
+    bounded no matter how many instructions a content stream has, apart from
+    the decoded content stream itself, which is read when this function is
+    called. Iteration may be stopped early.
+
+    Args:
+        page_or_stream: A page object, or the content
+            stream attached to another object such as a Form XObject.
+        operators: A space-separated string of operators to whitelist,
+            as for :func:`parse_content_stream`.
+
+    Example:
+        >>> with pikepdf.Pdf.open("../tests/resources/pal-1bit-trivial.pdf") as pdf:
+        ...     page = pdf.pages[0]
+        ...     for operands, command in pikepdf.iter_content_stream(page, 'Do'):
+        ...         print(operands[0])
+        /Im0
+
+    .. versionadded:: 9.5
+    """
+    page_or_stream = _check_page_or_stream(page_or_stream, 'iter_content_stream')
+    try:
+        return _ContentStreamIterator(page_or_stream, operators)
+    except PdfError as e:
+        if 'supposed to be a stream or an array' in str(e):
+            raise TypeError("iter_content_stream called on non-stream Object") from e
+        raise e from e
+
+
+def _column_arrays(parsed):
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    operator_names, operators, operand_offsets, numbers, objects = parsed
+    return (
+        np.frombuffer(operators, dtype=np.uint8),
+        np.frombuffer(operand_offsets, dtype=np.int64),
+        np.frombuffer(numbers, dtype=np.float64),
+        objects,
+        operator_names,
+    )
+
+
 def unparse_content_stream(
-    instructions: Collection[UnparseableContentStreamInstructions],
+    instructions: Iterable[UnparseableContentStreamInstructions | bytes]
+    | ColumnarContentStream,
 ) -> bytes:
     """Convert collection of instructions to bytes suitable for storing in PDF.
 
@@ -129,7 +309,11 @@ def unparse_content_stream(
 
     Args:
         instructions: collection of instructions such as is returned
-            by :func:`parse_content_stream()`
+            by :func:`parse_content_stream()`, or a
+            :class:`ColumnarContentStream`. Any iterable of instructions is
+            accepted, including a generator, which is consumed as the output
+            is written. Instructions given as ``bytes`` are copied to the
+            output as they are.
 
     Returns:
         A binary content stream, suitable for attaching to a Pdf.
@@ -139,8 +323,24 @@ def unparse_content_stream(
         Now accept collections that contain any mixture of
         ``ContentStreamInstruction``, ``ContentStreamInlineImage``, and the older
         operand-operator tuples from pikepdf 2.x.
+
+    .. versionchanged:: 9.5
+        Accepts a :class:`ColumnarContentStream`, any iterable of instructions,
+        and instructions that are ``bytes``. To replace the data of a stream,
+        :meth:`pikepdf.Stream.write_instructions` avoids creating the ``bytes``
+        of the whole content stream.
     """
     try:
+        if isinstance(instructions, ColumnarContentStream):
+            import numpy as np  # pylint: disable=import-outside-toplevel
+
+            return _unparse_content_stream_columnar(
+                instructions.operator_names,
+                np.ascontiguousarray(instructions.operators, dtype=np.uint8),
+                np.ascontiguousarray(instructions.operand_offsets, dtype=np.int64),
+                np.ascontiguousarray(instructions.numbers, dtype=np.float64),
+                instructions.objects,
+            )
         return _unparse_content_stream(instructions)
     except (ValueError, TypeError, RuntimeError) as e:
         raise PdfParsingError(
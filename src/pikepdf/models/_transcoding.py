@@ -4,11 +4,14 @@
 from __future__ import annotations
 
 import struct
-from typing import Any, Callable, NamedTuple, Union
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Union
 
 from PIL import Image
 from PIL.TiffTags import TAGS_V2 as TIFF_TAGS
 
+if TYPE_CHECKING:
+    import numpy as np
+
 BytesLike = Union[bytes, memoryview]
 MutableBytesLike = Union[bytearray, memoryview]
 
@@ -103,6 +106,43 @@ def _4bit_inner_loop(in_: BytesLike, out: MutableBytesLike, scale: int) -> None:
         out[2 * n + 1] = int((val & 0b1111) * scale)
 
 
+def samples_array(
+    data: BytesLike, width: int, height: int, components: int, bits: int
+) -> np.ndarray:
+    """Arrange packed image samples in an array of shape (height, width, components).
+
+    As in PDF, each row of samples begins on a byte boundary. 8-bit samples are
+    returned as a view of *data*. Samples of fewer bits are unpacked to one
+    ``uint8`` each, without rescaling, and 16-bit samples are converted from
+    big endian to ``uint16`` in native byte order.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    samples_per_row = width * components
+    row_bytes = (samples_per_row * bits + 7) // 8
+    packed = np.frombuffer(data, dtype=np.uint8)
+    if len(packed) < row_bytes * height:
+        raise ValueError(
+            f"image data is {len(packed)} bytes, but {row_bytes * height} are needed"
+        )
+    rows = packed[: row_bytes * height].reshape(height, row_bytes)
+
+    if bits == 8:
+        samples = rows
+    elif bits == 16:
+        samples = rows.view('>u2').astype(np.uint16)
+    elif bits == 1:
+        samples = np.unpackbits(rows, axis=1)
+    elif bits in (2, 4):
+        # Most significant bits first: for 2 bits, shift by 6, 4, 2 and 0
+        shifts = np.arange(8 - bits, -1, -bits, dtype=np.uint8)
+        samples = (rows[:, :, np.newaxis] >> shifts) & np.uint8((1 << bits) - 1)
+        samples = samples.reshape(height, -1)
+    else:
+        raise NotImplementedError(bits)
+    return samples[:, :samples_per_row].reshape(height, width, components)
+
+
 def image_from_byte_buffer(buffer: BytesLike, size: tuple[int, int], stride: int):
     """Use Pillow to create one-component image from a byte buffer.
 
@@ -12,7 +12,18 @@ from io import BytesIO
 from itertools import zip_longest
 from pathlib import Path
 from shutil import copyfileobj
-from typing import Any, BinaryIO, Callable, NamedTuple, TypeVar, Union, cast
+from tempfile import SpooledTemporaryFile
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    NamedTuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from PIL import Image
 from PIL.ImageCms import ImageCmsProfile
@@ -30,6 +41,9 @@ from pikepdf.objects import (
     String,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+
 T = TypeVar('T')
 
 RGBDecodeArray = tuple[float, float, float, float, float, float]
@@ -37,6 +51,10 @@ GrayDecodeArray = tuple[float, float]
 CMYKDecodeArray = tuple[float, float, float, float, float, float, float, float]
 DecodeArray = Union[RGBDecodeArray, GrayDecodeArray, CMYKDecodeArray]
 
+# Images extracted to a file are held in memory up to this size, and beyond it
+# in a temporary file, until we know which file extension to use
+_EXTRACT_SPOOL_SIZE = 16 * 1024 * 1024
+
 
 class UnsupportedImageTypeError(Exception):
     """This image is formatted in a way pikepdf does not supported."""
@@ -98,6 +116,21 @@ def _metadata_from_obj(
     raise NotImplementedError('Metadata access for ' + name)
 
 
+def _transcoded_extension(im: Image.Image) -> str:
+    """Return the file extension that a transcoded image is saved with."""
+    return '.tiff' if im.mode == 'CMYK' else '.png'
+
+
+def _save_transcoded(im: Image.Image, stream: IO[bytes]) -> str:
+    """Save a transcoded image to a stream and return its file extension."""
+    extension = _transcoded_extension(im)
+    if extension == '.tiff':
+        im.save(stream, format='tiff', compression='tiff_adobe_deflate')
+    else:
+        im.save(stream, format='png')
+    return extension
+
+
 class PaletteData(NamedTuple):
     """Returns the color space and binary representation of the palette.
 
@@ -249,6 +282,25 @@ class PdfImageBase(ABC):
         """Size of image as (width, height)."""
         return self.width, self.height
 
+    @property
+    def _components(self) -> int:
+        """Number of color components in each pixel of the image data."""
+        if self.image_mask or self.indexed:
+            return 1
+        cs = self._colorspaces
+        name = cs[0] if cs else None
+        if name in ('/DeviceGray', '/CalGray', '/Separation'):
+            return 1
+        if name in ('/DeviceRGB', '/CalRGB', '/Lab'):
+            return 3
+        if name in ('/DeviceCMYK', '/CalCMYK'):
+            return 4
+        if name == '/ICCBased':
+            return int(cs[1]['/N'])
+        if name == '/DeviceN':
+            return len(cs[1])
+        raise NotImplementedError(f"not sure how many components {cs!r} has")
+
     def _approx_mode_from_icc(self):
         if self.indexed:
             icc_profile = self._colorspaces[1][1]
@@ -464,8 +516,13 @@ class PdfImage(PdfImageBase):
                     ) from e
         return self._icc
 
-    def _remove_simple_filters(self):
-        """Remove simple lossless compression where it appears."""
+    def _simple_filters_removed(self) -> tuple[Stream, StreamDecodeLevel, list[str]]:
+        """Find how to read the image with simple lossless compression removed.
+
+        Returns:
+            The stream to read, the decode level to read it at, and the filters
+            that will remain.
+        """
         COMPLEX_FILTERS = {
             '/DCTDecode',
             '/JPXDecode',
@@ -480,19 +537,26 @@ class PdfImage(PdfImageBase):
             )
         if len(indices) == 0:
             # No complex filter indices, so all filters are simple - remove them all
-            return self.obj.read_bytes(StreamDecodeLevel.specialized), []
+            return self.obj, StreamDecodeLevel.specialized, []
 
         n = indices[0]
         if n == 0:
             # The only filter is complex, so return
-            return self.obj.read_raw_bytes(), self.filters
+            return self.obj, StreamDecodeLevel.none, self.filters
 
         obj_copy = copy(self.obj)
         obj_copy.Filter = Array([Name(f) for f in self.filters[:n]])
         obj_copy.DecodeParms = Array(self.decode_parms[:n])
-        return obj_copy.read_bytes(StreamDecodeLevel.specialized), self.filters[n:]
+        return obj_copy, StreamDecodeLevel.specialized, self.filters[n:]
+
+    def _remove_simple_filters(self) -> tuple[bytes, list[str]]:
+        """Remove simple lossless compression where it appears."""
+        obj, decode_level, filters = self._simple_filters_removed()
+        if decode_level == StreamDecodeLevel.none:
+            return obj.read_raw_bytes(), filters
+        return obj.read_bytes(decode_level), filters
 
-    def _extract_direct(self, *, stream: BinaryIO) -> str | None:
+    def _extract_direct(self, *, stream: IO[bytes]) -> str | None:
         """Attempt to extract the image directly to a usable image file.
 
         If there is no way to extract the image without decompressing or
@@ -528,9 +592,10 @@ class PdfImage(PdfImageBase):
                 )
             return self.mode == 'CMYK' and ct == DEFAULT_CT_CMYK
 
-        data, filters = self._remove_simple_filters()
+        obj, decode_level, filters = self._simple_filters_removed()
 
         if filters == ['/CCITTFaxDecode']:
+            data, _ = self._remove_simple_filters()
             if self.colorspace == '/ICCBased':
                 icc = self._iccstream.read_bytes()
             else:
@@ -541,7 +606,9 @@ class PdfImage(PdfImageBase):
         if filters == ['/DCTDecode'] and (
             self.mode == 'L' or normal_dct_rgb() or normal_dct_cmyk()
         ):
-            stream.write(data)
+            # JPEGs can be large, so copy without holding all of the data
+            with obj.open(decode_level) as reader:
+                copyfileobj(reader, stream)
             return '.jpg'
 
         return None
@@ -629,7 +696,7 @@ class PdfImage(PdfImageBase):
 
         return im
 
-    def _extract_to_stream(self, *, stream: BinaryIO) -> str:
+    def _extract_to_stream(self, *, stream: IO[bytes]) -> str:
         """Extract the image to a stream.
 
         If possible, the compressed data is extracted and inserted into
@@ -650,12 +717,8 @@ class PdfImage(PdfImageBase):
         im = None
         try:
             im = self._extract_transcoded()
-            if im.mode == 'CMYK':
-                im.save(stream, format='tiff', compression='tiff_adobe_deflate')
-                return '.tiff'
             if im:
-                im.save(stream, format='png')
-                return '.png'
+                return _save_transcoded(im, stream)
         except PdfError as e:
             if 'called on unfilterable stream' in str(e):
                 raise UnsupportedImageTypeError(repr(self)) from e
@@ -705,12 +768,12 @@ class PdfImage(PdfImageBase):
         if stream:
             return self._extract_to_stream(stream=stream)
 
-        bio = BytesIO()
-        extension = self._extract_to_stream(stream=bio)
-        bio.seek(0)
-        filepath = Path(str(Path(fileprefix)) + extension)
-        with filepath.open('wb') as target:
-            copyfileobj(bio, target)
+        with SpooledTemporaryFile(max_size=_EXTRACT_SPOOL_SIZE) as spool:
+            extension = self._extract_to_stream(stream=spool)
+            spool.seek(0)
+            filepath = Path(str(Path(fileprefix)) + extension)
+            with filepath.open('wb') as target:
+                copyfileobj(spool, target)
         return str(filepath)
 
     def read_bytes(
@@ -742,6 +805,91 @@ class PdfImage(PdfImageBase):
 
         return im
 
+    def as_array(self) -> np.ndarray:
+        """Return the samples of the image as a NumPy array.
+
+        The array has shape ``(height, width, components)``, with one component
+        for grayscale, indexed and stencil mask images, three for RGB and four
+        for CMYK. The values are the samples of the image data: palette indexes
+        for indexed images, and color values for other images, which are not
+        converted to another color space.
+
+        8-bit samples are returned as a view of the decoded image data, without
+        copying it. Samples of 1, 2 or 4 bits are unpacked to one ``uint8`` each,
+        without rescaling, and 16-bit samples are returned as ``uint16``. If the
+        image has a ``/Decode`` array other than the default, it is applied, so
+        that the samples have the same meaning for any ``/Decode`` array; for
+        example, 0 is always the painted part of a stencil mask.
+
+        Image data that qpdf cannot decode, such as JPEG, is decoded by Pillow,
+        and returned as Pillow decodes it.
+
+        NumPy must be installed.
+
+        .. versionadded:: 9.5
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        try:
+            buffer = cast(memoryview, self.get_stream_buffer())
+        except PdfError as e:
+            if 'called on unfilterable stream' not in str(e):
+                raise
+            with self.as_pil_image() as im:
+                array = np.asarray(im)
+            if array.dtype == np.bool_:
+                array = array.astype(np.uint8)
+            return array.reshape(self.height, self.width, -1)
+
+        bpc = self.bits_per_component
+        if bpc not in (1, 2, 4, 8, 16):
+            raise InvalidPdfImageError("BitsPerComponent must be 1, 2, 4, 8, or 16")
+        samples = _transcoding.samples_array(
+            buffer, self.width, self.height, self._components, bpc
+        )
+        return self._apply_decode_array(samples)
+
+    def _default_decode_ranges(self, components: int) -> list[float]:
+        """Return the range each component maps to when there is no /Decode."""
+        if self.image_mask:
+            return [0.0, 1.0]
+        if self.indexed:
+            return [0.0, float((1 << self.bits_per_component) - 1)]
+        cs = self._colorspaces
+        name = cs[0] if cs else None
+        if name == '/Lab':
+            ranges = cs[1].get('/Range', [-100, 100, -100, 100])
+            return [0.0, 100.0, *(float(value) for value in ranges)]
+        if name == '/ICCBased' and '/Range' in cs[1]:
+            return [float(value) for value in cs[1].Range]
+        return [0.0, 1.0] * components
+
+    def _apply_decode_array(self, samples: np.ndarray) -> np.ndarray:
+        """Map samples through the /Decode array, unless it is the default.
+
+        Samples are remapped so that decoding them with the colour space's
+        default ranges gives the values that the /Decode array specifies.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        decode = [float(value) for value in self._metadata('Decode', _ensure_list, [])]
+        components = samples.shape[2]
+        if len(decode) != 2 * components:
+            return samples
+        default = self._default_decode_ranges(components)
+        if len(default) != 2 * components or decode == default:
+            return samples
+        maxval = (1 << self.bits_per_component) - 1
+        dmin = np.array(decode[0::2], dtype=np.float32)
+        dmax = np.array(decode[1::2], dtype=np.float32)
+        rmin = np.array(default[0::2], dtype=np.float32)
+        rmax = np.array(default[1::2], dtype=np.float32)
+        if np.any(rmax == rmin):
+            return samples
+        values = dmin + samples * ((dmax - dmin) / maxval)
+        values = (values - rmin) * (maxval / (rmax - rmin))
+        return np.clip(np.rint(values), 0, maxval).astype(samples.dtype)
+
     def _generate_ccitt_header(self, data: bytes, icc: bytes | None = None) -> bytes:
         """Construct a CCITT G3 or G4 header from the PDF metadata."""
         # https://stackoverflow.com/questions/2641770/
@@ -835,7 +983,7 @@ class PdfJpxImage(PdfImage):
             and self._jpxpil == other._jpxpil
         )
 
-    def _extract_direct(self, *, stream: BinaryIO) -> str | None:
+    def _extract_direct(self, *, stream: IO[bytes]) -> str | None:
         data, filters = self._remove_simple_filters()
         if filters != ['/JPXDecode']:
             return None
@@ -1027,6 +1175,16 @@ class PdfInlineImage(PdfImageBase):
         """Return inline image as a Pillow Image."""
         return self._convert_to_pdfimage().as_pil_image()
 
+    def as_array(self) -> np.ndarray:
+        """Return the samples of the inline image as a NumPy array.
+
+        See:
+            :meth:`PdfImage.as_array`
+
+        .. versionadded:: 9.5
+        """
+        return self._convert_to_pdfimage().as_array()
+
     def extract_to(self, *, stream: BinaryIO | None = None, fileprefix: str = ''):
         """Extract the inline image directly to a usable image file.
 
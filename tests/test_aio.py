@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: CC0-1.0
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from io import BytesIO
+
+import pytest
+
+from pikepdf import Pdf, aio
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def single_worker():
+    aio.configure(max_workers=1)
+    yield
+    aio.configure()
+
+
+def test_open_save_read(resources):
+    async def main():
+        pdf = await Pdf.open_async(resources / 'graph.pdf')
+        assert pdf.release_gil
+        with pdf:
+            contents = pdf.pages[0].Contents
+            data = await contents.read_bytes_async()
+            raw = await contents.read_raw_bytes_async()
+            bio = BytesIO()
+            await pdf.save_async(bio)
+        return data, raw, bio
+
+    data, raw, bio = asyncio.run(main())
+    with Pdf.open(resources / 'graph.pdf') as pdf:
+        assert data == pdf.pages[0].Contents.read_bytes()
+        assert raw == pdf.pages[0].Contents.read_raw_bytes()
+    with Pdf.open(bio) as pdf:
+        assert len(pdf.pages) == 1
+
+
+def test_open_error(resources):
+    async def main():
+        await aio.open(resources / 'does-not-exist.pdf')
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(main())
+
+
+def test_backpressure(single_worker):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        threading.Event().wait(0.01)
+        with lock:
+            running -= 1
+        return threading.current_thread().name
+
+    async def main():
+        return await asyncio.gather(*(aio.run(work) for _ in range(5)))
+
+    names = asyncio.run(main())
+    assert peak == 1
+    assert all(name.startswith('pikepdf-aio') for name in names)
+
+
+def test_cancel_before_start(single_worker):
+    release = threading.Event()
+    calls = []
+
+    async def main():
+        first = asyncio.ensure_future(aio.run(release.wait))
+        second = asyncio.ensure_future(aio.run(calls.append, 'second'))
+        await asyncio.sleep(0.05)
+        second.cancel()
+        release.set()
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        # The slot held by the cancelled task was freed
+        await aio.run(calls.append, 'third')
+
+    asyncio.run(main())
+    assert calls == ['third']
+
+
+def test_cancel_after_start_cleans_up(single_worker):
+    started = threading.Event()
+    release = threading.Event()
+    cleaned = threading.Event()
+
+    def work():
+        started.set()
+        release.wait()
+        return 'result'
+
+    def cleanup(result):
+        assert result == 'result'
+        cleaned.set()
+
+    async def main():
+        task = asyncio.ensure_future(aio.run(work, cleanup=cleanup))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+
+    asyncio.run(main())
+    assert cleaned.wait(5)
+
+
+def test_configure_invalid():
+    with pytest.raises(ValueError):
+        aio.configure(max_workers=0)
+
+
+def test_configure_in_flight(single_worker):
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        started.set()
+        release.wait()
+
+    async def main():
+        task = asyncio.ensure_future(aio.run(work))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        with pytest.raises(RuntimeError):
+            aio.configure(max_workers=2)
+        release.set()
+        await task
+        aio.configure(max_workers=2)
+
+    asyncio.run(main())
@@ -6,6 +6,7 @@ from __future__ import annotations
 import datetime
 import os
 from hashlib import md5
+from io import BytesIO
 from pathlib import Path
 
 import pytest
@@ -108,6 +109,8 @@ def test_attachment_metadata(pal, data=b'some data', description='test filespec'
     assert attached_stream.mod_date == june_1
 
     assert attached_stream.size == len(data)
+    with attached_stream.open() as f:
+        assert f.read() == data
 
     assert attached_stream.mime_type == ''
     attached_stream.mime_type = 'text/plain'
@@ -163,3 +166,36 @@ def test_attach_direct(pal):
     data = b'some data'
     pal.attachments['direct.txt'] = data
     assert pal.attachments['direct.txt'].get_file().read_bytes() == data
+
+
+def test_from_filepath_lazy(pal, outdir, outpdf):
+    data = os.urandom(3 * 1024 * 1024 + 1)
+    bigfile = outdir / 'big.bin'
+    bigfile.write_bytes(data)
+    fs = AttachedFileSpec.from_filepath(pal, bigfile, lazy=True)
+    assert fs.get_file().size == len(data)
+    assert fs.get_file().md5 == md5(data).digest()
+    pal.attachments['big.bin'] = fs
+    pal.save(outpdf)
+
+    with Pdf.open(outpdf) as output:
+        assert output.attachments['big.bin'].get_file().read_bytes() == data
+
+
+def test_extract_to(pal, outdir):
+    data = b'some data' * 1000
+    pal.attachments['data.txt'] = data
+    attached = pal.attachments['data.txt'].get_file()
+
+    assert attached.extract_to(outdir / 'data.txt') == md5(data).digest()
+    assert (outdir / 'data.txt').read_bytes() == data
+
+    bio = BytesIO()
+    attached.extract_to(bio)
+    assert bio.getvalue() == data
+
+    attached.obj.Params.CheckSum = pikepdf.String(md5(b'other').digest())
+    with pytest.raises(pikepdf.PdfError, match='checksum'):
+        attached.extract_to(outdir / 'corrupt.txt')
+    assert not (outdir / 'corrupt.txt').exists()
+    attached.extract_to(BytesIO(), verify=False)
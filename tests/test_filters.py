@@ -5,7 +5,16 @@ from __future__ import annotations
 
 import pytest
 
-from pikepdf import Pdf, PdfError, Token, TokenFilter, TokenType
+from pikepdf import (
+    BatchTokenFilter,
+    Name,
+    Pdf,
+    PdfError,
+    Token,
+    TokenFilter,
+    TokenType,
+)
+from pikepdf.filters import ColorMap, RemoveText, ReplaceOperator, StripMarkedContent
 
 
 @pytest.fixture
@@ -45,6 +54,16 @@ class FilterCollectNames(TokenFilter):
         return None
 
 
+class BatchCollect(BatchTokenFilter):
+    def __init__(self, batch_size):
+        super().__init__(batch_size=batch_size)
+        self.batches = []
+
+    def handle_tokens(self, tokens):
+        self.batches.append(tokens)
+        return tokens
+
+
 def test_token_eq_token():
     token_42 = Token(TokenType.integer, b'42')
     assert Token(TokenType.space, b' ') != token_42
@@ -78,6 +97,48 @@ def test_filter_names(pal):
     assert after != b''
 
 
+@pytest.mark.parametrize('batch_size', [1, 4, 1000])
+def test_batch_filter(pal, batch_size):
+    page = pal.pages[0]
+    filter = BatchCollect(batch_size)
+    assert page.get_filtered_contents(filter) == page.get_filtered_contents(
+        FilterThru()
+    )
+    assert filter.batches[-1][-1].type_ == TokenType.eof
+    for batch in filter.batches[:-1]:
+        assert batch[-1].type_ == TokenType.word
+        assert len(batch) >= batch_size
+    if batch_size == 1:
+        assert [batch[-1].value for batch in filter.batches[:-1]] == [
+            'q',
+            'cm',
+            'Do',
+            'Q',
+        ]
+
+
+def test_batch_filter_inline_image(resources):
+    with Pdf.open(resources / 'image-mono-inline.pdf') as pdf:
+        filter = BatchCollect(1)
+        pdf.pages[0].get_filtered_contents(filter)
+        (batch,) = [b for b in filter.batches if b[-1].value == 'EI']
+        assert [t.value for t in batch if t.type_ == TokenType.word] == [
+            'BI',
+            'ID',
+            'EI',
+        ]
+
+
+def test_batch_filter_drop(pal):
+    class BatchDrop(BatchTokenFilter):
+        def handle_tokens(self, tokens):
+            return None
+
+    assert pal.pages[0].get_filtered_contents(BatchDrop()) == b''
+    with pytest.raises(ValueError):
+        BatchDrop(batch_size=0)
+
+
 class FilterInvalid(TokenFilter):
     def handle_token(self, token):
         return 42
@@ -124,3 +185,68 @@ def test_issue160_tokenfilter_refcounting(resources, outpdf):
             page.add_content_token_filter(f)
             num += 1
         pdf.save(outpdf)
+
+
+@pytest.fixture
+def marked():
+    with Pdf.new() as pdf:
+        pdf.add_blank_page()
+        pdf.pages[0].Contents = pdf.make_stream(
+            b'q 1 0 0 rg BT /F1 12 Tf (Hi) Tj ET '
+            b'/Artifact BMC 0 0 m (x) Tj EMC '
+            b'/Span <</MCID 1>> BDC 0.5 g EMC Q'
+        )
+        yield pdf
+
+
+@pytest.mark.parametrize(
+    'filter, expected',
+    [
+        (
+            RemoveText(),
+            b'q 1 0 0 rg BT /F1 12 Tf  ET /Artifact BMC 0 0 m  EMC '
+            b'/Span <</MCID 1>> BDC 0.5 g EMC Q',
+        ),
+        (
+            ReplaceOperator('Tf', b''),
+            b'q 1 0 0 rg BT  (Hi) Tj ET /Artifact BMC 0 0 m (x) Tj EMC '
+            b'/Span <</MCID 1>> BDC 0.5 g EMC Q',
+        ),
+        (
+            ReplaceOperator('rg', b'RG', keep_operands=True),
+            b'q 1 0 0 RG BT /F1 12 Tf (Hi) Tj ET /Artifact BMC 0 0 m (x) Tj EMC '
+            b'/Span <</MCID 1>> BDC 0.5 g EMC Q',
+        ),
+        (
+            StripMarkedContent([Name.Artifact]),
+            b'q 1 0 0 rg BT /F1 12 Tf (Hi) Tj ET  /Span <</MCID 1>> BDC 0.5 g EMC Q',
+        ),
+        (
+            StripMarkedContent(keep_content=True),
+            b'q 1 0 0 rg BT /F1 12 Tf (Hi) Tj ET  0 0 m (x) Tj   0.5 g  Q',
+        ),
+        (
+            ColorMap({(1, 0, 0): (0,), (0.5,): (0, 0, 1)}),
+            b'q 0 g BT /F1 12 Tf (Hi) Tj ET /Artifact BMC 0 0 m (x) Tj EMC '
+            b'/Span <</MCID 1>> BDC 0 0 1 rg EMC Q',
+        ),
+    ],
+)
+def test_builtin_filter(marked, filter, expected):
+    page = marked.pages[0]
+    assert page.get_filtered_contents(filter) == expected
+    # Filters can be reused
+    assert page.get_filtered_contents(filter) == expected
+    page.add_content_token_filter(filter)
+    assert page.obj.Contents.read_bytes() == expected
+
+
+def test_builtin_filter_invalid():
+    with pytest.raises(ValueError):
+        ReplaceOperator('', b'')
+    with pytest.raises(TypeError):
+        StripMarkedContent('Artifact')
+    with pytest.raises(ValueError):
+        ColorMap({(1, 0): (0,)})
+    with pytest.raises(ValueError):
+        ColorMap({(1,): (0,)}, tolerance=-1)
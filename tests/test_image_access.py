@@ -244,6 +244,94 @@ def test_bits_per_component_missing(congress):
     assert PdfImage(cong_im).bits_per_component == 8
 
 
+def test_image_inventory(congress):
+    cong_obj, pdf = congress
+    cong_im = PdfImage(cong_obj)
+    inventory = pdf.image_inventory()
+    assert list(inventory) == [cong_obj.objgen]
+    info = inventory[cong_obj.objgen]
+    assert info.obj == cong_obj
+    assert info.objgen == cong_obj.objgen
+    assert (info.width, info.height) == (cong_im.width, cong_im.height)
+    assert info.bits_per_component == cong_im.bits_per_component
+    assert not info.image_mask
+    assert info.colorspace == Name.DeviceRGB
+    assert info.filters == cong_im.filters
+    assert info.raw_length == len(cong_obj.read_raw_bytes())
+    assert info.pages == [0]
+
+
+@pytest.fixture
+def shared_images():
+    pdf = Pdf.new()
+    image = pdf.make_stream(
+        b'\xff',
+        Type=Name.XObject,
+        Subtype=Name.Image,
+        Width=1,
+        Height=1,
+        BitsPerComponent=8,
+        ColorSpace=Name.DeviceGray,
+    )
+    mask = pdf.make_stream(
+        b'\x00',
+        Type=Name.XObject,
+        Subtype=Name.Image,
+        Width=1,
+        Height=1,
+        ImageMask=True,
+    )
+    form = pdf.make_stream(
+        b'/Im0 Do /Mask Do',
+        Type=Name.XObject,
+        Subtype=Name.Form,
+        BBox=[0, 0, 1, 1],
+        Resources=Dictionary(XObject=Dictionary(Im0=image, Mask=mask)),
+    )
+    for resources in (
+        Dictionary(XObject=Dictionary(Im0=image, Im1=image)),
+        Dictionary(),
+        Dictionary(XObject=Dictionary(Fm0=form)),
+    ):
+        pdf.add_blank_page().Resources = resources
+    return pdf, image, mask, form
+
+
+def test_image_inventory_shared(shared_images):
+    pdf, image, mask, _form = shared_images
+    inventory = pdf.image_inventory()
+    assert set(inventory) == {image.objgen, mask.objgen}
+    assert inventory[image.objgen].pages == [0, 2]
+    assert inventory[mask.objgen].pages == [2]
+    assert inventory[mask.objgen].image_mask
+    assert inventory[mask.objgen].bits_per_component == 1
+    assert inventory[mask.objgen].colorspace is None
+    assert inventory[mask.objgen].filters == []
+
+
+def test_image_inventory_cached(shared_images):
+    pdf, image, mask, form = shared_images
+    first = pdf.image_inventory()
+    second = pdf.image_inventory()
+    assert first is not second
+    assert first[image.objgen] is second[image.objgen]
+
+    pdf.pages[1].Resources.XObject = Dictionary(Fm0=form)
+    assert pdf.image_inventory()[image.objgen].pages == [0, 1, 2]
+    del form.Resources.XObject.Mask
+    assert mask.objgen not in pdf.image_inventory()
+    image.write(zlib.compress(b'\xff'), filter=Name.FlateDecode)
+    assert pdf.image_inventory()[image.objgen].filters == ['/FlateDecode']
+    del pdf.pages[0]
+    assert pdf.image_inventory()[image.objgen].pages == [0, 1]
+
+
+def test_image_inventory_recursive_form(shared_images):
+    pdf, image, _mask, form = shared_images
+    form.Resources.XObject.Fm0 = form
+    assert pdf.image_inventory()[image.objgen].pages == [0, 2]
+
+
 class ImageSpec(NamedTuple):
     bpc: int
     width: int
@@ -345,6 +433,96 @@ def test_image_save_compare(tmp_path_factory, spec):
         assert pim.mode == im.mode
 
 
+def unpack_samples(data: bytes, width, height, components, bpc) -> list:
+    row_bytes = ceil(width * components * bpc / 8)
+    rows = []
+    for y in range(height):
+        bits = ''.join(f'{b:08b}' for b in data[y * row_bytes : (y + 1) * row_bytes])
+        samples = [
+            int(bits[n * bpc : (n + 1) * bpc], 2) for n in range(width * components)
+        ]
+        rows.append(
+            [samples[x * components : (x + 1) * components] for x in range(width)]
+        )
+    return rows
+
+
+@pytest.mark.parametrize('bpc', [1, 2, 4, 8, 16])
+@pytest.mark.parametrize(
+    'colorspace,components', [(Name.DeviceGray, 1), (Name.DeviceRGB, 3)]
+)
+def test_as_array(bpc, colorspace, components):
+    np = pytest.importorskip('numpy')
+    width, height = 3, 2
+    imbytes = bytes(range(7, 256, 13)) * 2
+    pdf = pdf_from_image_spec(ImageSpec(bpc, width, height, colorspace, imbytes))
+    pim = PdfImage(pdf.pages[0].Resources.XObject['/Im0'])
+
+    array = pim.as_array()
+    assert array.shape == (height, width, components)
+    assert array.dtype == (np.uint16 if bpc == 16 else np.uint8)
+    assert array.tolist() == unpack_samples(imbytes, width, height, components, bpc)
+
+
+def test_as_array_zero_copy():
+    pytest.importorskip('numpy')
+    pdf = pdf_from_image_spec(
+        ImageSpec(8, 3, 2, Name.DeviceRGB, bytes(range(18)) + b'extra')
+    )
+    array = PdfImage(pdf.pages[0].Resources.XObject['/Im0']).as_array()
+    assert not array.flags.owndata
+    assert array[1, 2].tolist() == [15, 16, 17]
+
+
+def test_as_array_decode():
+    pytest.importorskip('numpy')
+    pdf = pdf_from_image_spec(ImageSpec(2, 4, 1, Name.DeviceGray, b'\x1b'))
+    image = pdf.pages[0].Resources.XObject['/Im0']
+    image.Decode = Array([1, 0])
+    assert PdfImage(image).as_array()[..., 0].tolist() == [[3, 2, 1, 0]]
+
+    del image.ColorSpace
+    image.ImageMask = True
+    image.BitsPerComponent = 1
+    image.Width = 8
+    assert PdfImage(image).as_array()[..., 0].tolist() == [[1, 1, 1, 0, 0, 1, 0, 0]]
+
+
+def test_as_array_decode_lab():
+    pytest.importorskip('numpy')
+    imbytes = bytes([0, 128, 255, 255, 0, 64])
+    pdf = pdf_from_image_spec(ImageSpec(8, 2, 1, Name.DeviceRGB, imbytes))
+    image = pdf.pages[0].Resources.XObject['/Im0']
+    image.ColorSpace = Array(
+        [Name.Lab, Dictionary(WhitePoint=[0.9505, 1.0, 1.089], Range=[-128, 127] * 2)]
+    )
+    expected = [[[0, 128, 255], [255, 0, 64]]]
+
+    image.Decode = Array([0, 100, -128, 127, -128, 127])
+    assert PdfImage(image).as_array().tolist() == expected
+
+    image.Decode = Array([100, 0, -128, 127, -128, 127])
+    assert PdfImage(image).as_array().tolist() == [[[255, 128, 255], [0, 0, 64]]]
+
+    del image.ColorSpace[1].Range
+    image.Decode = Array([0, 100, -100, 100, -100, 100])
+    assert PdfImage(image).as_array().tolist() == expected
+
+
+def test_as_array_jpeg(congress):
+    np = pytest.importorskip('numpy')
+    pim = PdfImage(congress[0])
+    array = pim.as_array()
+    assert array.shape == (1520, 1000, 3)
+    assert np.array_equal(array, np.asarray(pim.as_pil_image()))
+
+
+def test_inline_as_array(inline):
+    pytest.importorskip('numpy')
+    iimage, _pdf = inline
+    assert iimage.as_array().shape == (8, 8, 3)
+
+
 @pytest.mark.parametrize(
     'filename,bpc,filters,ext,mode,format_',
     [
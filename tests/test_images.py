@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: CC0-1.0
+
+from __future__ import annotations
+
+import zlib
+
+import pytest
+from PIL import Image, ImageChops
+
+from pikepdf import Dictionary, Name, Pdf, PdfImage
+from pikepdf.images import extract_all
+from pikepdf.models.image import NotExtractableError, UnsupportedImageTypeError
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def congress(resources):
+    with Pdf.open(resources / 'congress.pdf') as pdf:
+        yield pdf
+
+
+@pytest.fixture
+def mixed():
+    pdf = Pdf.new()
+
+    def image(data, **kwargs):
+        return pdf.make_stream(
+            zlib.compress(data),
+            Type=Name.XObject,
+            Subtype=Name.Image,
+            Width=2,
+            Height=2,
+            Filter=Name.FlateDecode,
+            **kwargs,
+        )
+
+    gray = image(b'\x00\x40\x80\xff', BitsPerComponent=8, ColorSpace=Name.DeviceGray)
+    cmyk = image(bytes(range(16)), BitsPerComponent=8, ColorSpace=Name.DeviceCMYK)
+    # 1-bit RGB cannot be extracted
+    bad = image(b'\x00\x00', BitsPerComponent=1, ColorSpace=Name.DeviceRGB)
+    for xobjects in (
+        Dictionary(Im0=gray, Im1=cmyk),
+        Dictionary(Im0=gray),
+        Dictionary(Im0=bad),
+    ):
+        pdf.add_blank_page().Resources = Dictionary(XObject=xobjects)
+    return pdf, gray, cmyk, bad
+
+
+def test_extract_all_direct(congress, tmp_path):
+    image = congress.pages[0].images['/Im0']
+    (result,) = extract_all(congress, tmp_path / 'out', workers=1)
+    assert result.objgen == image.objgen
+    assert result.pages == [0]
+    assert result.path == tmp_path / 'out' / f'image-{image.objgen[0]}-0.jpg'
+    assert not result.transcoded
+    assert result.error is None
+    assert result.path.read_bytes() == image.read_raw_bytes()
+
+
+def test_extract_all_transcoded(mixed, tmp_path):
+    pdf, gray, cmyk, bad = mixed
+    finished = []
+    results = extract_all(pdf, tmp_path, workers=2, progress=finished.append)
+    assert sorted(r.objgen for r in finished) == [r.objgen for r in results]
+    assert [r.objgen for r in results] == sorted([gray.objgen, cmyk.objgen, bad.objgen])
+    by_objgen = {r.objgen: r for r in results}
+
+    assert by_objgen[gray.objgen].pages == [0, 1]
+    for obj, suffix in ((gray, '.png'), (cmyk, '.tiff')):
+        result = by_objgen[obj.objgen]
+        assert result.transcoded
+        assert result.path.suffix == suffix
+        with Image.open(result.path) as extracted:
+            expected = PdfImage(obj).as_pil_image()
+            assert not ImageChops.difference(extracted, expected).getbbox()
+
+    assert by_objgen[bad.objgen].path is None
+    assert isinstance(by_objgen[bad.objgen].error, UnsupportedImageTypeError)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        r.path.name for r in results if r.path
+    )
+
+
+def test_extract_all_formats(congress, mixed, tmp_path):
+    (result,) = extract_all(congress, tmp_path, formats={'.png'})
+    assert result.transcoded
+    assert result.path.suffix == '.png'
+
+    pdf, gray, cmyk, _bad = mixed
+    results = {r.objgen: r for r in extract_all(pdf, tmp_path, formats={'.tiff'})}
+    assert results[cmyk.objgen].path.suffix == '.tiff'
+    assert results[gray.objgen].path is None
+    assert isinstance(results[gray.objgen].error, NotExtractableError)
+
+
+def test_extract_all_invalid_workers(congress, tmp_path):
+    with pytest.raises(ValueError):
+        extract_all(congress, tmp_path, workers=-1)
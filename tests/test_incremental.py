@@ -0,0 +1,182 @@
+# SPDX-FileCopyrightText: 2022 James R. Barlow
+# SPDX-License-Identifier: CC0-1.0
+
+from __future__ import annotations
+
+import os
+import shutil
+from io import BytesIO
+
+import pytest
+
+from pikepdf import Dictionary, Name, ObjectStreamMode, Pdf, Stream
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def sandwich_path(resources, tmp_path):
+    path = tmp_path / 'sandwich.pdf'
+    shutil.copy(resources / 'sandwich.pdf', path)
+    return path
+
+
+def test_incremental_to_stream(sandwich_path):
+    original = sandwich_path.read_bytes()
+    with Pdf.open(sandwich_path) as pdf:
+        pdf.pages[0].Rotate = 90
+        bio = BytesIO()
+        pdf.save(bio, incremental=True)
+
+    data = bio.getvalue()
+    assert data.startswith(original)
+    assert len(data) - len(original) < 10_000
+    assert data.count(b'%%EOF') == original.count(b'%%EOF') + 1
+    with Pdf.open(bio) as pdf:
+        assert pdf.pages[0].Rotate == 90
+        assert pdf.check() == []
+
+
+def test_incremental_in_place(sandwich_path):
+    original = sandwich_path.read_bytes()
+    with Pdf.open(sandwich_path) as pdf:
+        pdf.Root.Lang = 'en-US'
+        pdf.save(sandwich_path, incremental=True)
+        first_update = sandwich_path.read_bytes()
+        assert first_update.startswith(original)
+
+        pdf.pages[0].Rotate = 180
+        pdf.save(sandwich_path, incremental=True)
+        assert sandwich_path.read_bytes().startswith(first_update)
+
+    with Pdf.open(sandwich_path) as pdf:
+        assert pdf.Root.Lang == 'en-US'
+        assert pdf.pages[0].Rotate == 180
+        assert pdf.check() == []
+
+
+def test_incremental_overwriting_input(sandwich_path):
+    original = sandwich_path.read_bytes()
+    with Pdf.open(sandwich_path, allow_overwriting_input=True) as pdf:
+        pdf.pages[0].Rotate = 90
+        pdf.save(incremental=True)
+        pdf.pages[0].Rotate = 270
+        pdf.save(incremental=True)
+
+    assert sandwich_path.read_bytes().startswith(original)
+    with Pdf.open(sandwich_path) as pdf:
+        assert pdf.pages[0].Rotate == 270
+
+
+def test_incremental_new_objects(sandwich_path, tmp_path):
+    with Pdf.open(sandwich_path) as pdf:
+        stream = Stream(pdf, b'q Q')
+        pdf.pages[0].Contents = pdf.make_indirect(
+            [pdf.pages[0].Contents, pdf.make_indirect(stream)]
+        )
+        pdf.Root.Extra = pdf.make_indirect(Dictionary(Type=Name.Test))
+        pdf.save(tmp_path / 'out.pdf', incremental=True)
+
+    with Pdf.open(tmp_path / 'out.pdf') as pdf:
+        assert pdf.Root.Extra.Type == Name.Test
+        assert pdf.pages[0].Contents[1].read_bytes() == b'q Q'
+
+
+def test_incremental_stream_data(sandwich_path, tmp_path):
+    with Pdf.open(sandwich_path) as pdf:
+        pdf.pages[0].Contents.write(b'q Q')
+        pdf.save(tmp_path / 'out.pdf', incremental=True)
+
+    with Pdf.open(tmp_path / 'out.pdf') as pdf:
+        assert pdf.pages[0].Contents.read_bytes() == b'q Q'
+
+
+def test_incremental_unchanged(sandwich_path, tmp_path):
+    with Pdf.open(sandwich_path) as pdf:
+        pdf.save(tmp_path / 'out.pdf', incremental=True)
+    assert (tmp_path / 'out.pdf').read_bytes() == sandwich_path.read_bytes()
+
+
+def test_incremental_source_modified(sandwich_path):
+    with Pdf.open(sandwich_path) as pdf:
+        pdf.pages[0].Rotate = 90
+        data = bytearray(sandwich_path.read_bytes())
+        data[-1:] = b'\n' if data[-1:] != b'\n' else b' '
+        sandwich_path.write_bytes(data)
+        stat = sandwich_path.stat()
+        os.utime(sandwich_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with pytest.raises(ValueError, match='modified since it was opened'):
+            pdf.save(sandwich_path, incremental=True)
+    assert sandwich_path.read_bytes() == data
+
+
+def test_incremental_from_memory(sandwich_path):
+    data = bytearray(sandwich_path.read_bytes())
+    with Pdf.open(data) as pdf:
+        pdf.pages[0].Rotate = 90
+        bio = BytesIO()
+        pdf.save(bio, incremental=True)
+    assert bio.getvalue().startswith(data)
+
+
+def test_incremental_same_stream(sandwich_path):
+    original = sandwich_path.read_bytes()
+    bio = BytesIO(original)
+    with Pdf.open(bio) as pdf:
+        pdf.pages[0].Rotate = 90
+        pdf.save(bio, incremental=True)
+    assert bio.getvalue().startswith(original)
+    with Pdf.open(bio) as pdf:
+        assert pdf.pages[0].Rotate == 90
+
+
+def test_incremental_new_pdf():
+    with pytest.raises(ValueError, match='not opened'):
+        Pdf.new().save(BytesIO(), incremental=True)
+
+
+def test_incremental_encrypted(resources):
+    with Pdf.open(resources / 'graph-encrypted.pdf', password='owner') as pdf:
+        with pytest.raises(ValueError, match='encrypted'):
+            pdf.save(BytesIO(), incremental=True)
+
+
+def test_incremental_unsupported_options(sandwich_path):
+    with Pdf.open(sandwich_path) as pdf:
+        with pytest.raises(ValueError, match='linearize'):
+            pdf.save(BytesIO(), incremental=True, linearize=True)
+
+
+@pytest.mark.parametrize(
+    'option',
+    [
+        {'compress_streams': False},
+        {'object_stream_mode': ObjectStreamMode.generate},
+        {'fix_metadata_version': False},
+        {'static_id': True},
+        {'workers': 2},
+    ],
+)
+def test_incremental_non_default_options(sandwich_path, option):
+    with Pdf.open(sandwich_path) as pdf:
+        with pytest.raises(ValueError, match=next(iter(option))):
+            pdf.save(BytesIO(), incremental=True, **option)
+
+
+def test_incremental_xref_stream(sandwich_path, tmp_path):
+    path = tmp_path / 'xref-stream.pdf'
+    with Pdf.open(sandwich_path) as pdf:
+        pdf.save(path, object_stream_mode=ObjectStreamMode.generate)
+    original = path.read_bytes()
+    assert b'/XRef' in original
+
+    with Pdf.open(path) as pdf:
+        pdf.pages[0].Rotate = 90
+        pdf.save(path, incremental=True)
+
+    update = path.read_bytes()[len(original) :]
+    assert b'/Type /XRef' in update
+    assert b'xref\n' not in update.replace(b'startxref\n', b'')
+    with Pdf.open(path) as pdf:
+        assert pdf.pages[0].Rotate == 90
+        assert pdf.check() == []
@@ -7,14 +7,19 @@ import logging
 import os
 import os.path
 import pathlib
-from io import BytesIO, FileIO
+from io import SEEK_END, BytesIO, FileIO, UnsupportedOperation
 from shutil import copy
 
 import pytest
 
 import pikepdf
-from pikepdf import Pdf, PdfError
-from pikepdf._io import atomic_overwrite
+from pikepdf import AccessMode, Pdf, PdfError, Stream
+from pikepdf._io import (
+    _copy_file_data,
+    atomic_overwrite,
+    reopen_source,
+    snapshot_file,
+)
 
 # pylint: disable=redefined-outer-name
 
@@ -101,6 +106,43 @@ def test_invalid_output_stream(sandwich, bio_class, exc_type):
         sandwich.save(bio, static_id=True)
 
 
+class CountingWritesBytesIO(BytesIO):
+    """Version of BytesIO that counts how often it is written."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.writes = 0
+
+    def write(self, b):
+        self.writes += 1
+        return super().write(b)
+
+
+def test_output_buffer_size(sandwich):
+    unbuffered = CountingWritesBytesIO()
+    sandwich.save(unbuffered, static_id=True, output_buffer_size=0)
+    buffered = CountingWritesBytesIO()
+    sandwich.save(buffered, static_id=True)
+    small = CountingWritesBytesIO()
+    sandwich.save(small, static_id=True, output_buffer_size=1000)
+
+    assert buffered.getvalue() == unbuffered.getvalue() == small.getvalue()
+    assert buffered.writes == 1
+    assert buffered.writes < small.writes < unbuffered.writes
+
+
+def test_save_path_matches_stream(sandwich, tmp_path):
+    bio = BytesIO()
+    sandwich.save(bio, static_id=True)
+    sandwich.save(tmp_path / 'new.pdf', static_id=True)
+    assert (tmp_path / 'new.pdf').read_bytes() == bio.getvalue()
+
+    # Again, this time replacing an existing file
+    (tmp_path / 'existing.pdf').write_bytes(b'x' * 1_000_000)
+    sandwich.save(tmp_path / 'existing.pdf', static_id=True)
+    assert (tmp_path / 'existing.pdf').read_bytes() == bio.getvalue()
+
+
 class ExpectedError(Exception):
     pass
 
@@ -248,6 +290,46 @@ def test_atomic_ovewrite_stat_preservation(tmp_path):
         assert stat.st_mode & 0o777 == 0o755
 
 
+def test_snapshot_file(tmp_path):
+    original = tmp_path / 'original.pdf'
+    original.write_bytes(b'original' * 1000)
+
+    with snapshot_file(original) as snapshot:
+        original.write_bytes(b'modified')
+        assert snapshot.read() == b'original' * 1000
+    assert list(tmp_path.iterdir()) == [original], "Snapshot was not cleaned up"
+
+
+def test_copy_file_data_userspace(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, 'copy_file_range', raising=False)
+    (tmp_path / 'src').write_bytes(b'data' * 1000)
+    with (tmp_path / 'src').open('rb') as src, (tmp_path / 'dst').open('w+b') as dst:
+        _copy_file_data(src, dst)
+    assert (tmp_path / 'dst').read_bytes() == b'data' * 1000
+
+
+def test_reopen_source_memory():
+    data = bytearray(b'%PDF-1.7\n' + bytes(range(256)))
+    with reopen_source(memoryview(data)) as f:
+        assert f.read(12) == b'%PDF-1.7\n' + bytes([0, 1, 2])
+        # Reads the buffer in place, rather than a copy of it
+        data[-1] = 0
+        assert f.seek(-2, SEEK_END) == len(data) - 2
+        assert f.read() == bytes([254, 0])
+        assert f.read() == b''
+
+
+def test_overwrite_input_snapshot(resources, tmp_path):
+    copy(resources / 'sandwich.pdf', tmp_path / 'sandwich.pdf')
+    with Pdf.open(tmp_path / 'sandwich.pdf', allow_overwriting_input=True) as pdf:
+        # Truncating the original does not disturb the open Pdf
+        (tmp_path / 'sandwich.pdf').write_bytes(b'')
+        pdf.pages[0].Rotate = 90
+        pdf.save()
+    with Pdf.open(tmp_path / 'sandwich.pdf') as pdf:
+        assert pdf.pages[0].Rotate == 90
+
+
 def test_memory_to_path(resources, tmp_path):
     bio = BytesIO((resources / 'sandwich.pdf').read_bytes())
     with Pdf.open(bio) as pdf:
@@ -266,3 +348,105 @@ def test_newline_handling(resources):
         access_mode=pikepdf._core.AccessMode.stream,
     ) as pdf:
         assert pdf.check() == []
+    with Pdf.open(
+        resources / 'newline-buffer-test.pdf',
+        access_mode=pikepdf._core.AccessMode.native,
+    ) as pdf:
+        assert pdf.check() == []
+
+
+class CountingBytesIO(BytesIO):
+    """Version of BytesIO that counts how often it is read."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = 0
+
+    def readinto(self, b):
+        self.reads += 1
+        return super().readinto(b)
+
+    def read(self, *args):
+        self.reads += 1
+        return super().read(*args)
+
+
+def _all_stream_data(pdf):
+    return [obj.read_raw_bytes() for obj in pdf.objects if isinstance(obj, Stream)]
+
+
+def test_stream_cache(resources):
+    data = (resources / 'graph.pdf').read_bytes()
+
+    cached = CountingBytesIO(data)
+    with Pdf.open(cached, access_mode=AccessMode.stream) as pdf:
+        cached_data = _all_stream_data(pdf)
+        info = pdf.stream_cache_info
+        assert info.block_size == 64 * 1024
+        assert info.hits > 0
+        assert info.misses > 0
+
+    uncached = CountingBytesIO(data)
+    with Pdf.open(uncached, access_mode=AccessMode.stream, stream_cache_size=0) as pdf:
+        assert _all_stream_data(pdf) == cached_data
+        assert pdf.stream_cache_info.hits == pdf.stream_cache_info.misses == 0
+
+    assert cached.reads < uncached.reads
+
+
+def test_stream_cache_eviction(resources):
+    with Pdf.open(resources / 'graph.pdf', access_mode=AccessMode.mmap_only) as pdf:
+        expected = _all_stream_data(pdf)
+    with Pdf.open(
+        resources / 'graph.pdf',
+        access_mode=AccessMode.stream,
+        stream_block_size=1024,
+        stream_cache_size=4096,
+    ) as pdf:
+        assert _all_stream_data(pdf) == expected
+        assert pdf.stream_cache_info.evictions > 0
+
+
+def test_stream_cache_info_not_stream(resources):
+    with Pdf.open(resources / 'pal.pdf', access_mode=AccessMode.mmap_only) as pdf:
+        assert pdf.stream_cache_info is None
+    assert Pdf.new().stream_cache_info is None
+
+
+def test_stream_cache_invalid_block_size(resources):
+    with pytest.raises(ValueError, match='stream_block_size'):
+        Pdf.open(resources / 'pal.pdf', stream_block_size=0)
+
+
+def test_native_path(resources):
+    with Pdf.open(resources / 'graph.pdf', access_mode=AccessMode.mmap_only) as pdf:
+        expected = _all_stream_data(pdf)
+    with Pdf.open(resources / 'graph.pdf', access_mode=AccessMode.native) as pdf:
+        assert _all_stream_data(pdf) == expected
+        assert pdf.filename == str(resources / 'graph.pdf')
+        assert pdf.stream_cache_info is None
+
+
+def test_native_file_object(resources, tmp_path):
+    data = (resources / 'pal.pdf').read_bytes()
+    padded = tmp_path / 'padded.bin'
+    padded.write_bytes(b'garbage' + data)
+    with padded.open('rb') as f:
+        f.seek(len(b'garbage'))
+        with Pdf.open(f, access_mode=AccessMode.native) as pdf:
+            f.close()  # We read from our own copy of the file descriptor
+            assert pdf.check() == []
+            assert len(pdf.pages) == 1
+
+
+def test_native_requires_fileno(resources):
+    with pytest.raises(UnsupportedOperation):
+        Pdf.open(
+            BytesIO((resources / 'pal.pdf').read_bytes()),
+            access_mode=AccessMode.native,
+        )
+
+
+def test_native_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Pdf.open(tmp_path / 'missing.pdf', access_mode=AccessMode.native)
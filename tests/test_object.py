@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
 from decimal import Decimal, InvalidOperation
 from math import isclose, isfinite
@@ -683,6 +684,104 @@ class TestStreamReadWrite:
         raw_buffer = stream_object.get_raw_stream_buffer()
         assert bytes(raw_buffer) == b'abc123xyz'
 
+    def test_open(self, stream_object):
+        data = bytes(range(256)) * 20_000
+        stream_object.write(compress(data), filter=Name.FlateDecode)
+        with stream_object.open() as f:
+            assert f.readable()
+            assert f.read(10) == data[:10]
+            assert f.read() == data[10:]
+            assert f.read() == b''
+        assert f.closed
+        with pytest.raises(ValueError):
+            f.read()
+
+    def test_open_raw(self, stream_object):
+        stream_object.write(compress(b'raw'), filter=Name.FlateDecode)
+        with stream_object.open(pikepdf.StreamDecodeLevel.none) as f:
+            assert f.read() == compress(b'raw')
+
+    def test_open_close_early(self, stream_object):
+        stream_object.write(compress(b'x' * 10_000_000), filter=Name.FlateDecode)
+        with stream_object.open() as f:
+            assert f.read(1) == b'x'
+
+    def test_open_not_stream(self):
+        with pytest.raises(TypeError):
+            Dictionary().open()
+
+    def test_write_lazy_path(self, stream_object, tmp_path):
+        path = tmp_path / 'data.bin'
+        path.write_bytes(compress(b'from a file'))
+        stream_object.write_lazy(path, filter=Name.FlateDecode)
+        assert stream_object.read_bytes() == b'from a file'
+
+    def test_write_lazy_buffer(self, stream_object):
+        stream_object.write_lazy(bytearray(b'from a buffer'))
+        assert stream_object.read_bytes() == b'from a buffer'
+
+    def test_write_lazy_function(self, stream_object):
+        calls = []
+
+        def provider():
+            calls.append(1)
+            yield b'from '
+            yield memoryview(b'a function')
+
+        stream_object.write_lazy(provider)
+        assert stream_object.read_bytes() == b'from a function'
+        assert calls
+
+    def test_write_lazy_save(self, tmp_path):
+        with pikepdf.new() as pdf:
+            pdf.Root.Lazy = pdf.make_stream(b'')
+            pdf.Root.Lazy.write_lazy(lambda: [b'x' * 100_000], length_hint=100_000)
+            pdf.save(tmp_path / 'lazy.pdf')
+        with pikepdf.open(tmp_path / 'lazy.pdf') as saved:
+            assert saved.Root.Lazy.read_bytes() == b'x' * 100_000
+
+    def test_write_lazy_length_mismatch(self, tmp_path):
+        with pikepdf.new() as pdf:
+            pdf.Root.Lazy = pdf.make_stream(b'')
+            with pytest.raises(RuntimeError, match='instead of expected'):
+                pdf.Root.Lazy.write_lazy(lambda: [b'short'], length_hint=100)
+                pdf.save(tmp_path / 'lazy.pdf')
+
+    def test_write_lazy_rejects_iterator(self, stream_object):
+        with pytest.raises(TypeError, match='function'):
+            stream_object.write_lazy(iter([b'abc']))
+        with pytest.raises(TypeError):
+            stream_object.write_lazy(42)
+
+
+def test_release_gil():
+    with pikepdf.new() as pdf:
+        assert not pdf.release_gil
+        pdf.release_gil = True
+        assert pdf.release_gil
+
+
+def test_read_bytes_threads():
+    # Decoding may release the GIL, so threads may read from one or several Pdfs
+    pdfs = [pikepdf.new() for _ in range(2)]
+    for pdf in pdfs:
+        pdf.release_gil = True
+    streams = [
+        Stream(pdf, compress(bytes([n]) * 100_000), Filter=Name.FlateDecode)
+        for pdf in pdfs
+        for n in range(8)
+    ]
+
+    def read(stream):
+        return stream.read_bytes(), stream.read_raw_bytes()
+
+    expected = [read(stream) for stream in streams]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(5):
+            assert list(executor.map(read, streams)) == expected
+    for pdf in pdfs:
+        pdf.close()
+
 
 def test_copy():
     d = Dictionary(
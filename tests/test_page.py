@@ -252,6 +252,97 @@ def test_push_stack(fourpages, outpdf):
     pdf.save(outpdf)
 
 
+@pytest.fixture
+def placed():
+    pdf = Pdf.new()
+    page = pdf.add_blank_page()
+    image = pdf.make_stream(
+        b'\xff',
+        Type=Name.XObject,
+        Subtype=Name.Image,
+        Width=1,
+        Height=1,
+        BitsPerComponent=8,
+        ColorSpace=Name.DeviceGray,
+    )
+    form = pdf.make_stream(
+        b'q 10 0 0 10 0 0 cm /Im0 Do Q',
+        Type=Name.XObject,
+        Subtype=Name.Form,
+        BBox=[0, 0, 10, 10],
+        Matrix=[2, 0, 0, 2, 0, 0],
+        Resources=Dictionary(XObject=Dictionary(Im0=image)),
+    )
+    page.Resources = Dictionary(XObject=Dictionary(Fm0=form, Im0=image))
+    page.Contents = pdf.make_stream(
+        b'q 1 0 0 1 100 100 cm /Fm0 Do Q /Fm0 Do q 50 0 0 50 0 0 cm /Im0 Do Q'
+    )
+    return pdf
+
+
+def test_placements(placed):
+    placements = placed.pages[0].placements()
+    assert [(p.name, p.subtype, p.depth) for p in placements] == [
+        (Name.Fm0, Name.Form, 0),
+        (Name.Im0, Name.Image, 1),
+        (Name.Fm0, Name.Form, 0),
+        (Name.Im0, Name.Image, 1),
+        (Name.Im0, Name.Image, 0),
+    ]
+    assert [p.matrix for p in placements] == [
+        Matrix(2, 0, 0, 2, 100, 100),
+        Matrix(20, 0, 0, 20, 100, 100),
+        Matrix(2, 0, 0, 2, 0, 0),
+        Matrix(20, 0, 0, 20, 0, 0),
+        Matrix(50, 0, 0, 50, 0, 0),
+    ]
+    assert placements[0].bbox == Rectangle(100, 100, 120, 120)
+    assert placements[1].bbox == Rectangle(100, 100, 120, 120)
+    assert placements[4].bbox == Rectangle(0, 0, 50, 50)
+    assert placements[1].objgen == placements[4].objgen
+    assert placements[1].xobject == placed.pages[0].Resources.XObject.Im0
+
+
+def test_placements_form_changed(placed):
+    page = placed.pages[0]
+    assert len(page.placements()) == 5
+    page.Resources.XObject.Fm0.write(b'/Im0 Do /Im0 Do')
+    assert [p.matrix for p in page.placements()[:3]] == [
+        Matrix(2, 0, 0, 2, 100, 100),
+        Matrix(2, 0, 0, 2, 100, 100),
+        Matrix(2, 0, 0, 2, 100, 100),
+    ]
+
+
+def test_placements_recursive_form(placed):
+    form = placed.pages[0].Resources.XObject.Fm0
+    form.Resources.XObject.Fm1 = form
+    form.write(b'/Fm1 Do')
+    placements = placed.pages[0].placements()
+    assert [(p.name, p.depth) for p in placements] == [
+        (Name.Fm0, 0),
+        (Name.Fm1, 1),
+        (Name.Fm0, 0),
+        (Name.Fm1, 1),
+        (Name.Im0, 0),
+    ]
+
+
+def test_placements_match_interpreter(fourpages):
+    pdf = Pdf.new()
+    page = pdf.add_blank_page(page_size=(1000, 1000))
+    pdf.pages.extend(fourpages.pages)
+    page.add_overlay(pdf.pages[1], Rectangle(0, 500, 500, 1000))
+    page.add_overlay(pdf.pages[2], Rectangle(500, 500, 1000, 1000))
+
+    expected = list(_simple_interpret_content_stream(page))
+    placements = [p for p in page.placements() if p.depth == 0]
+    assert [(p.name, p.matrix) for p in placements] == [
+        (name, Matrix(page.Resources.XObject[name].Matrix) @ ctm)
+        for name, ctm in expected
+    ]
+
+
 def test_page_equal(fourpages, graph):
     assert fourpages.pages[0] == fourpages.pages[0]
     assert fourpages.pages[0] != fourpages.pages[1]
@@ -293,7 +384,8 @@ def test_page_attrs(graph):
 
     del graph.pages[0].Resources
     with pytest.raises(
-        AttributeError, match=r"can't delete|property( '')? of 'Page' object has no deleter"
+        AttributeError,
+        match=r"can't delete|property( '')? of 'Page' object has no deleter",
     ):
         del graph.pages[0].obj
     del graph.pages[0]['/Contents']
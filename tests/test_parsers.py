@@ -4,12 +4,14 @@
 from __future__ import annotations
 
 import shutil
+import warnings
 from subprocess import PIPE, run
 
 import pytest
 
 import pikepdf
 from pikepdf import (
+    ColumnarContentStream,
     ContentStreamInlineImage,
     ContentStreamInstruction,
     Dictionary,
@@ -22,6 +24,7 @@ from pikepdf import (
     PdfInlineImage,
     Stream,
     _core,
+    iter_content_stream,
     parse_content_stream,
     unparse_content_stream,
 )
@@ -257,6 +260,43 @@ def test_unparse_invalid_inline_image():
         unparse_content_stream(instructions)
 
 
+def test_unparse_operand_types():
+    instructions = [
+        ContentStreamInstruction(
+            [Name('/F1'), Name('/A B#'), 12, -0.25, True, b'(s)', [1, Name.X]],
+            Operator('Tf'),
+        ),
+        ([Name.Im0, 3, -4.5], 'Do'),
+    ]
+    unparsed = unparse_content_stream(instructions)
+    assert unparsed == slow_unparse_content_stream(instructions)
+    assert unparsed.startswith(b'/F1 /A#20B#23 12 -0.25 true ')
+
+
+def test_unparse_generator_and_bytes(graph):
+    instructions = parse_content_stream(graph.pages[0])
+    expected = unparse_content_stream(instructions)
+    assert unparse_content_stream(instr for instr in instructions) == expected
+    assert (
+        unparse_content_stream([b'q', *instructions, b'Q'])
+        == b'q\n' + expected + b'\nQ'
+    )
+
+
+def test_write_instructions(graph):
+    page = graph.pages[0]
+    instructions = parse_content_stream(page)
+    stream = graph.make_stream(b'', Filter=Name.FlateDecode)
+    stream.write_instructions(instr for instr in instructions)
+    assert Name.Filter not in stream
+    assert stream.read_bytes() == unparse_content_stream(instructions)
+    with pytest.raises(PdfParsingError):
+        stream.write_instructions([([float('nan')], Operator('cm'))])
+    assert stream.read_bytes() == unparse_content_stream(instructions)
+    with pytest.raises(TypeError, match='not a stream'):
+        Dictionary().write_instructions(instructions)
+
+
 def test_inline_copy(inline):
     for instr in parse_content_stream(inline.pages[0].Contents):
         if not isinstance(instr, ContentStreamInlineImage):
@@ -293,6 +333,292 @@ def test_end_inline_parse():
     assert unparse_content_stream(cs).split() == stream.split()
 
 
+@pytest.mark.parametrize('operators', ['', 'cm Do', 'BI ID EI'])
+def test_iter_content_stream(inline, graph, operators):
+    for page in (inline.pages[0], graph.pages[0]):
+        expected = parse_content_stream(page, operators)
+        actual = list(iter_content_stream(page, operators))
+        assert [type(instr) for instr in actual] == [type(i) for i in expected]
+        assert unparse_content_stream(actual) == unparse_content_stream(expected)
+
+
+def test_iter_content_stream_objects():
+    pdf = pikepdf.new()
+    stream = pdf.make_stream(
+        b'/Span << /MCID 0 /Alt (a b) /A [1 -2.5 true null /N#20x] >> BDC\n'
+        b'[(Hello) -250 <576f726c64>] TJ EMC'
+    )
+    instructions = list(iter_content_stream(stream))
+    assert unparse_content_stream(instructions) == unparse_content_stream(
+        parse_content_stream(stream)
+    )
+    assert [instr.operator for instr in instructions] == [
+        Operator('BDC'),
+        Operator('TJ'),
+        Operator('EMC'),
+    ]
+    props = instructions[0].operands[1]
+    assert props.Alt == 'a b'
+    assert props.A == [1, -2.5, True, None, Name('/N x')]
+    assert instructions[1].operands[0][2] == b'World'
+
+
+def test_iter_content_stream_early_stop(graph):
+    instructions = iter_content_stream(graph.pages[0])
+    first = next(instructions)
+    expected = parse_content_stream(graph.pages[0])[0]
+    assert unparse_content_stream([first]) == unparse_content_stream([expected])
+
+
+def test_iter_content_stream_invalid():
+    with pytest.raises(TypeError, match="called on page or stream"):
+        iter_content_stream(Dictionary({"/Hi": 3}))
+    with pytest.raises(TypeError, match="non-stream Object"):
+        iter_content_stream(Dictionary(Type=Name.Page, Contents=42))
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_parse_all(resources, workers):
+    with Pdf.open(resources / 'fourpages.pdf') as pdf:
+        page = pdf.add_blank_page()
+        page.Contents = Array([pdf.make_stream(b'0 0 m 1'), pdf.make_stream(b'1 l S')])
+        parsed = pdf.pages.parse_all(workers=workers)
+        assert len(parsed) == len(pdf.pages)
+        for page, instructions in zip(pdf.pages, parsed):
+            assert unparse_content_stream(instructions) == unparse_content_stream(
+                parse_content_stream(page)
+            )
+        assert [instr.operator for instr in parsed[-1]] == [
+            Operator('m'),
+            Operator('l'),
+            Operator('S'),
+        ]
+
+
+@pytest.mark.parametrize(
+    'content',
+    [
+        b'/Span << 1 /A 2 >> BDC EMC',
+        b'/Span << /A 1 2 /B 3 >> BDC EMC',
+        b'/Span << /A 1 /A 2 >> BDC EMC',
+        b'/Span << /A 1 /B >> BDC EMC',
+        b'[1 >> 2 } 3] TJ 1 w',
+        b'[1 ) ) ) ) ) ) ) ) 2] TJ 1 w',
+        b'(a) Tj ] >> { 1 w',
+        b'[' * 600 + b'1' + b']' * 600 + b' TJ 1 w',
+        b'/N#zz 1 w',
+        b'1 w [1 2 TJ',
+        b'1 w << /A [1 2',
+    ],
+)
+def test_damaged_content_matches_qpdf(content):
+    # Every parser must repair damaged content as qpdf's parser does
+    with pikepdf.new() as pdf, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        page = pdf.add_blank_page()
+        page.Contents = pdf.make_stream(content)
+        expected = unparse_content_stream(parse_content_stream(page))
+        expected_warnings = len(pdf.get_warnings())
+        parsers = {
+            'iter': lambda: list(iter_content_stream(page)),
+            'parse_all': lambda: pdf.pages.parse_all()[0],
+            'columnar': lambda: parse_content_stream(page, format='columnar'),
+        }
+        for name, parse in parsers.items():
+            assert unparse_content_stream(parse()) == expected, name
+            assert len(pdf.get_warnings()) == expected_warnings, name
+
+
+class TestContentCache:
+    @pytest.fixture
+    def pdf(self):
+        pdf = Pdf.new()
+        for n in range(3):
+            page = pdf.add_blank_page()
+            page.Contents.write(b'q %d 0 0 1 0 0 cm Q' % (n + 1))
+        pdf.enable_content_cache()
+        return pdf
+
+    def test_hit(self, pdf):
+        page = pdf.pages[0]
+        first = parse_content_stream(page)
+        second = parse_content_stream(page)
+        assert second is not first
+        assert unparse_content_stream(second) == unparse_content_stream(first)
+        second.clear()
+        assert len(parse_content_stream(page.Contents)) == 3
+        parse_content_stream(page, 'cm')
+        info = pdf.content_cache_info
+        assert (info.hits, info.misses) == (2, 2)
+        assert (info.entries, info.instructions) == (2, 4)
+        assert 'hits=2' in repr(info)
+
+    def test_hit_not_shared(self, pdf):
+        page = pdf.pages[0]
+        page.Contents.write(b'[1 2] 0 d')
+        parse_content_stream(page)[0].operands[0].append(3)
+        second = parse_content_stream(page)
+        assert second[0].operands[0] == [1, 2]
+        second[0].operands[0].append(3)
+        assert parse_content_stream(page)[0].operands[0] == [1, 2]
+        assert pdf.content_cache_info.hits == 2
+
+    def test_hit_warns(self, pdf):
+        contents = pdf.pages[0].Contents
+        contents.write(b'q 1 0 0 1 0 0')
+        for _ in range(2):
+            with pytest.warns(UserWarning, match='Unexpected end of stream'):
+                parse_content_stream(contents)
+        assert pdf.content_cache_info.hits == 1
+
+    @pytest.mark.parametrize(
+        'change',
+        [
+            lambda page: page.Contents.write(b'1 g'),
+            lambda page: page.Contents.write_instructions([b'1 g']),
+            lambda page: page.contents_add(b'1 g'),
+            lambda page: page.contents_coalesce(),
+            lambda page: page.add_content_token_filter(pikepdf.filters.RemoveText()),
+            lambda page: setattr(page.Contents, 'DecodeParms', Dictionary()),
+            lambda page: setattr(page.Contents, 'stream_dict', Dictionary()),
+            lambda page: page.externalize_inline_images(),
+        ],
+    )
+    def test_invalidate(self, pdf, change):
+        page = pdf.pages[0]
+        parse_content_stream(page)
+        parse_content_stream(pdf.pages[1])
+        change(page)
+        info = pdf.content_cache_info
+        assert (info.entries, info.invalidations) == (1, 1)
+
+    def test_invalidate_form_xobjects(self, pdf):
+        page = pdf.pages[0]
+        form = pdf.make_stream(
+            b'0 g', Type=Name.XObject, Subtype=Name.Form, BBox=[0, 0, 1, 1]
+        )
+        page.Resources = Dictionary(XObject=Dictionary(Fm0=form))
+        parse_content_stream(form)
+        page.externalize_inline_images(shallow=True)
+        assert pdf.content_cache_info.entries == 1
+        page.externalize_inline_images()
+        assert pdf.content_cache_info.entries == 0
+
+    def test_changed_content_reparsed(self, pdf):
+        page = pdf.pages[0]
+        parse_content_stream(page)
+        page.Contents.write(b'1 g')
+        assert [instr.operator for instr in parse_content_stream(page)] == [
+            Operator('g')
+        ]
+        pdf._swap_objects(page.Contents.objgen, pdf.pages[1].Contents.objgen)
+        assert pdf.content_cache_info.invalidations == 2
+        assert [instr.operator for instr in parse_content_stream(page)] == [
+            Operator('q'),
+            Operator('cm'),
+            Operator('Q'),
+        ]
+
+    def test_eviction(self, pdf):
+        pdf.enable_content_cache(max_instructions=6)
+        for page in pdf.pages:
+            parse_content_stream(page)
+        info = pdf.content_cache_info
+        assert (info.entries, info.instructions, info.evictions) == (2, 6, 1)
+        parse_content_stream(pdf.pages[0])
+        assert info.misses == 4
+
+    def test_disable(self, pdf):
+        with pytest.raises(ValueError):
+            pdf.enable_content_cache(max_instructions=0)
+        pdf.disable_content_cache()
+        assert pdf.content_cache_info is None
+        parse_content_stream(pdf.pages[0])
+
+
+class TestColumnar:
+    @pytest.fixture(autouse=True)
+    def numpy(self):
+        return pytest.importorskip('numpy')
+
+    def test_roundtrip(self, inline, graph, numpy):
+        for pdf in (inline, graph):
+            page = pdf.pages[0]
+            content = parse_content_stream(page, format='columnar')
+            assert len(content) == len(parse_content_stream(page))
+            unparsed = pdf.make_stream(unparse_content_stream(content))
+            reparsed = parse_content_stream(unparsed, format='columnar')
+            assert (reparsed.operators == content.operators).all()
+            assert (reparsed.operand_offsets == content.operand_offsets).all()
+            numpy.testing.assert_array_equal(reparsed.numbers, content.numbers)
+
+    def test_columns(self, numpy):
+        pdf = pikepdf.new()
+        stream = pdf.make_stream(
+            b'q 1 0 0 1 10.5 -20 cm /Im0 Do Q 0 0 m 100 100 l S 1 2 BX EX'
+        )
+        content = parse_content_stream(stream, format='columnar')
+        assert content.operators.dtype == numpy.uint8
+        assert [content.operator_names[code] for code in content.operators] == [
+            'q',
+            'cm',
+            'Do',
+            'Q',
+            'm',
+            'l',
+            'S',
+            'BX',
+            'EX',
+        ]
+        assert content.operand_offsets.tolist() == [0, 0, 6, 7, 7, 9, 11, 11, 13, 13]
+        assert content.numbers[:6].tolist() == [1, 0, 0, 1, 10.5, -20]
+        assert numpy.isnan(content.numbers[6])
+        assert content.objects == {6: Name.Im0}
+        assert content.operands(2) == [Name.Im0]
+        assert content.operator_code('cm') == parse_content_stream(
+            pdf.make_stream(b'1 0 0 1 0 0 cm'), format='columnar'
+        ).operator_code(Operator('cm'))
+
+    def test_vectorized_rewrite(self, graph):
+        content = parse_content_stream(graph.pages[0], format='columnar')
+        cm = content.operators == content.operator_code('cm')
+        starts = content.operand_offsets[:-1][cm]
+        for k in range(4):
+            content.numbers[starts + k] *= 0.5
+        cs = parse_content_stream(
+            graph.make_stream(unparse_content_stream(content)), 'cm'
+        )
+        assert [float(x) for x in cs[0].operands] == [272.64, 0, 0, 221.76, 0, 0]
+
+    def test_parse_all(self, graph, numpy):
+        (content,) = graph.pages.parse_all('cm Do', workers=2, format='columnar')
+        expected = parse_content_stream(graph.pages[0], 'cm Do', format='columnar')
+        assert (content.operators == expected.operators).all()
+        numpy.testing.assert_array_equal(content.numbers, expected.numbers)
+        assert content.objects == expected.objects
+        with pytest.raises(ValueError, match='format'):
+            graph.pages.parse_all(format='rows')
+
+    def test_new_operator(self):
+        content = ColumnarContentStream([], [0], [])
+        content.operators = [content.operator_code('q'), content.operator_code('Foo')]
+        content.operand_offsets = [0, 0, 1]
+        content.numbers = [0.25]
+        assert unparse_content_stream(content) == b'q\n0.25 Foo'
+
+    def test_invalid(self, graph):
+        with pytest.raises(ValueError, match='format'):
+            parse_content_stream(graph.pages[0], format='rows')
+        content = ColumnarContentStream([], [0], [float('nan')])
+        content.operators = [content.operator_code('w')]
+        content.operand_offsets = [0, 1]
+        with pytest.raises(PdfParsingError):
+            unparse_content_stream(content)
+        content = ColumnarContentStream([0, 0], [0, 0], [])
+        with pytest.raises(PdfParsingError):
+            unparse_content_stream(content)
+
+
 class TestMalformedContentStreamInstructions:
     def test_rejects_not_list_of_pairs(self):
         with pytest.raises(PdfParsingError):
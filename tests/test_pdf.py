@@ -186,9 +186,32 @@ class TestStreams:
 class TestMemory:
     def test_memory(self, resources):
         data = (resources / 'pal-1bit-trivial.pdf').read_bytes()
-        with pytest.warns(UserWarning, match="bytes-like object containing a PDF"):
-            with pytest.raises(Exception):
-                Pdf.open(data)
+        with Pdf.open(data) as pdf:
+            assert len(pdf.pages) == 1
+
+    @pytest.mark.parametrize('buffer_type', [bytearray, memoryview])
+    def test_memory_buffer(self, resources, buffer_type):
+        data = buffer_type((resources / 'graph.pdf').read_bytes())
+        with Pdf.open(data) as pdf:
+            assert pdf.check() == []
+            assert pdf.filename.startswith('memory buffer')
+
+    def test_memory_buffer_pinned(self, resources):
+        data = bytearray((resources / 'pal-1bit-trivial.pdf').read_bytes())
+        with Pdf.open(data):
+            with pytest.raises(BufferError):
+                data.extend(b'garbage')
+        data.extend(b'garbage')
+
+    def test_memory_not_contiguous(self, resources):
+        data = (resources / 'pal-1bit-trivial.pdf').read_bytes()
+        with pytest.raises(TypeError):
+            Pdf.open(memoryview(data)[::2])
+
+    def test_memory_overwriting_input(self, resources):
+        data = bytearray((resources / 'pal-1bit-trivial.pdf').read_bytes())
+        with pytest.raises(ValueError, match='file path'):
+            Pdf.open(data, allow_overwriting_input=True)
 
 
 def test_remove_unreferenced(resources, outdir):
@@ -359,6 +382,93 @@ def test_recompress(resources, outdir):
         assert smaller.stat().st_size < bigger.stat().st_size
 
 
+def test_workers(resources, outdir):
+    with pikepdf.open(resources / 'image-mono-inline.pdf') as pdf:
+        obj = pdf.get_object((7, 0))
+        data = obj.read_bytes()
+        obj.write(zlib.compress(data, level=0), filter=pikepdf.Name.FlateDecode)
+        pdf.Root.Extra = pdf.make_stream(b'q Q ' * 1000)
+        pdf.Root.Short = pdf.make_stream(
+            zlib.compress(b'Q q ' * 1000, level=0), Filter=Name.Fl
+        )
+        n_objects = len(pdf.objects)
+        pdf.save(outdir / 'serial.pdf', recompress_flate=True, static_id=True)
+        pdf.save(outdir / 'w2.pdf', recompress_flate=True, static_id=True, workers=2)
+        pdf.save(outdir / 'w4.pdf', recompress_flate=True, static_id=True, workers=4)
+
+        # The Pdf that was saved is unchanged
+        assert len(pdf.objects) == n_objects
+        assert obj.read_raw_bytes() == zlib.compress(data, level=0)
+        assert Name.Filter not in pdf.Root.Extra
+        assert pdf.Root.Extra.read_raw_bytes() == b'q Q ' * 1000
+        assert pdf.Root.Short.Filter == Name.Fl
+        assert pdf.Root.Short.read_raw_bytes() == zlib.compress(b'Q q ' * 1000, level=0)
+
+    assert (outdir / 'w2.pdf').read_bytes() == (outdir / 'w4.pdf').read_bytes()
+    assert (outdir / 'w4.pdf').stat().st_size <= (outdir / 'serial.pdf').stat().st_size
+    with pikepdf.open(outdir / 'w4.pdf') as pdf:
+        assert pdf.pages[0].Contents.read_bytes() == data
+        assert pdf.Root.Extra.read_bytes() == b'q Q ' * 1000
+        assert pdf.Root.Short.read_bytes() == b'Q q ' * 1000
+        assert len(pdf.Root.Short.read_raw_bytes()) < 1000
+        assert pdf.check() == []
+
+
+def test_read_streams():
+    with pikepdf.new() as pdf:
+        payloads = [bytes([n]) * (n * 10_000) for n in range(8)]
+        streams = [
+            pikepdf.Stream(pdf, zlib.compress(p), Filter=pikepdf.Name.FlateDecode)
+            for p in payloads
+        ]
+        streams.append(pikepdf.Stream(pdf, b'unfiltered'))
+        payloads.append(b'unfiltered')
+
+        for workers in (1, 4):
+            buffers = pdf.read_streams(streams, workers=workers)
+            assert [bytes(b) for b in buffers] == payloads
+        raw = pdf.read_streams(streams[:2], decode_level=pikepdf.StreamDecodeLevel.none)
+        assert [bytes(b) for b in raw] == [s.read_raw_bytes() for s in streams[:2]]
+
+        with pytest.raises(TypeError):
+            pdf.read_streams([pikepdf.Dictionary()])
+        with pikepdf.new() as other:
+            with pytest.raises(ValueError):
+                pdf.read_streams([pikepdf.Stream(other, b'')])
+
+
+def test_read_streams_error():
+    with pikepdf.new() as pdf:
+        bad = pikepdf.Stream(pdf, b'\x00' * 20_000, Filter=pikepdf.Name.FlateDecode)
+        with pytest.raises(pikepdf.DataDecodingError):
+            pdf.read_streams([bad], workers=2)
+
+
+def test_read_streams_indirect_decode_parms():
+    with pikepdf.new() as pdf:
+        rows = bytes([0, 1, 2, 3, 4]) * 10_000
+        stream = pikepdf.Stream(
+            pdf,
+            zlib.compress(rows),
+            Filter=pikepdf.Name.FlateDecode,
+            DecodeParms=pikepdf.Dictionary(
+                Predictor=pdf.make_indirect(12), Columns=pdf.make_indirect(4)
+            ),
+        )
+        expected = stream.read_bytes()
+        assert len(expected) == 40_000
+        (data,) = pdf.read_streams([stream], workers=2)
+        assert bytes(data) == expected
+
+
+def test_read_streams_warnings():
+    with pikepdf.new() as pdf:
+        data = zlib.compress(bytes(range(256)) * 400)[:-50]
+        truncated = pikepdf.Stream(pdf, data, Filter=pikepdf.Name.FlateDecode)
+        pdf.read_streams([truncated], workers=2)
+        assert pdf.get_warnings()
+
+
 def test_invalid_flate_compression_level():
     # We don't want to change the compression level because it's global state
     # and will change subsequent test results, so just ping it with an invalid